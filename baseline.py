@@ -10,107 +10,156 @@ modeling techniques to work with the respective IPython notebook.
 
 import math
 import numpy
-import random
+
+import ingest
+import stats
+from sensorframe import SensorFrame
+
+
+BOUNDARY_RESOLUTION = 100 # points of a parametric ellipsoid boundary
+BOUNDARY_CACHE_SIZE = 1024
+
+# Parametric boundaries by (a, b, theta, resolution), see ellipsoid_boundary
+_boundaries = {}
 
 
 """Begin data input functions"""
-def read_ibrl_data(data_file):
+def read_ibrl_data(data_file, cache=False, mapped=False):
     """Reads IBRL data from file and returns dict mapping
     temp./humidity sensor data to the node that collected them
 
+    The dataset is parsed in bulk by ingest.read_ibrl_columns into a
+    SensorFrame, a dict-like container in which each sensor's array is a view
+    into a single contiguous array of readings.
+
     :param data_file: string representing path to ibrl dataset
-    :return: dictionary mapping sensor node to list of tuples containing sensor data
+    :param cache: optionally load the readings from a binary cache next to the
+    dataset, (re)building it whenever the dataset has changed
+    :param mapped: optionally memory-map the dataset instead of reading it
+    :return: SensorFrame mapping sensor node to a 2D array of temp. and humidity readings
     """
-    with open(data_file, 'r') as fp:
-        row_count = 0
-        bad_count = 0
-        input_readings = {}
-        for line in fp:
-
-            row_count = row_count + 1
-            line = line.strip() # remove edge whitespace
-            tokens = line.split(',') # segregate each section
-
-            try:
-                if len(tokens) == 5: #
-                    temp_reading = tokens[0]
-                    humidity_reading = tokens[1]
-                    sensor_id = tokens[3]
-
-                    # if sensor id is in the input_readings dict
-                    if sensor_id in input_readings:
-                        # add the temp and humidity values
-                        input_readings[sensor_id]['temp_readings'].append(temp_reading)
-                        input_readings[sensor_id]['humidity_readings'].append(humidity_reading)
-                    else:
-                        # add the sensor id and new temp and humidity values
-                        input_readings[sensor_id] = {
-                            'temp_readings': [tokens[0]],
-                            'humidity_readings': [tokens[1]]
-                        }
-                else: # Note and dump bad data
-                    bad_count = bad_count + 1
-
-            except Exception as e:
-                raise e
-
-        # Convert data points to numpy arrays
-        measurements = {sensor: numpy.array([readings['temp_readings'], readings['humidity_readings']], float)
-                        for (sensor, readings) in input_readings.iteritems()}
-
-        print "Total rows: %s" % row_count
-        print "Total incomplete rows: %s" % bad_count
-
-    return measurements
+    if cache:
+        columns = ingest.read_cached_ibrl_columns(data_file, mapped=mapped)
+    else:
+        columns = ingest.read_ibrl_columns(data_file, mapped=mapped)
+
+    print "Total rows: %s" % columns['row_count']
+    print "Total incomplete rows: %s" % columns['bad_count']
+
+    return SensorFrame.from_columns(columns)
 
 """Begin data transformation functions"""
-def randomize_readings(sensors):
+def randomize_readings(sensors, seed=None, permutations=None):
     """ Pseudo randomly shuffles location of each pair of temperature and
     humidity observations
 
     :param sensors: Dictionary of sensors containing temp. and humidity readings
+    :param seed: optional seed making the shuffle reproducible
+    :param permutations: optional dictionary filled with the permutation
+    applied to each sensor's readings, as returned by permute_readings
     :return: Dictionary of sensors containing shuffled temp. and humid. readings
     """
-    for sensor in sensors:
-        tuples = [(sensors[sensor][0][i],sensors[sensor][1][i])
-                  for i in range(len(sensors[sensor][0]))]
-        random.shuffle(tuples)
-        sensors[sensor] = numpy.array([[reading[0] for reading in tuples], [reading[1] for reading in tuples]], float)
+    shuffles = permute_readings(sensors, seed)
+    if permutations is not None:
+        permutations.update(shuffles)
 
     return sensors
 
-def generate_differences(sensors):
+def permute_readings(sensors, seed=None):
+    """ Shuffles the readings of each sensor in place with a seeded permutation
+
+    Sensors are permuted in sorted order so a seed always produces the same
+    shuffle. Reading i of a shuffled sensor is its original reading
+    permutations[sensor][i].
+
+    :param sensors: Dictionary of sensors containing temp. and humidity readings
+    :param seed: optional seed making the shuffle reproducible
+    :return: Dictionary mapping sensors to the permutation applied to their readings
+    """
+    random_state = numpy.random.RandomState(seed)
+    permutations = {}
+
+    for sensor in sorted(sensors):
+        permutations[sensor] = permute_sensor_readings(sensors[sensor], random_state)
+
+    return permutations
+
+def permute_sensor_readings(readings, random_state):
+    """ Shuffles a single sensor's readings in place
+
+    :param readings: 2D array of temp. and humidity readings
+    :param random_state: numpy.random.RandomState drawing the permutation
+    :return: the permutation applied to the readings
+    """
+    permutation = random_state.permutation(readings.shape[1]).astype(numpy.int32)
+    readings[0] = readings[0][permutation]
+    readings[1] = readings[1][permutation]
+
+    return permutation
+
+def generate_differences(sensors, permutations=None):
     """Generates a dictionary mapping sensors to a 2D array containing
     the successive differences of temp. and humidity measurements as well as
     a look up table mapping the resulting differences to their original
     measurements.
 
+    The look up table maps each sensor to an int32 array holding the raw index
+    of each of its readings in the order they were differenced, i.e. the
+    shuffle permutation. Difference i was calculated from raw readings
+    lookup_table[sensor][i] and lookup_table[sensor][i + 1], so the table
+    costs one int32 per reading and no pairs need to be stored.
+
     :param sensor: Dictionary mapping sensors to original arrays of temp.
        and humidity readings
+    :param permutations: optional dictionary mapping sensors to the
+       permutations their readings were shuffled with, as returned by
+       permute_readings; readings are taken to be in their raw order otherwise
     :return: tuple containing dictionary mapping sensors to successive
        differences and look up table mapping the results to their original
-       measurements
+       measurements; the differences of a SensorFrame are a SensorFrame
     """
     differences = {}
     lookup_table = {}
 
+    for sensor in sensors:
+        if permutations is not None:
+            lookup_table[sensor] = numpy.asarray(permutations[sensor], numpy.int32)
+        else:
+            lookup_table[sensor] = numpy.arange(sensors[sensor].shape[1], dtype=numpy.int32)
+
+    if isinstance(sensors, SensorFrame):
+        return (sensors.successive_differences(), lookup_table)
+
     for sensor in sensors:
         differences[sensor] = calc_succ_diff(sensors[sensor])
 
     return (differences, lookup_table)
 
+def lookup_raw_readings(lookup_table, indices):
+    """ Maps differences back to the raw readings they were calculated from
+
+    :param lookup_table: look up table as returned by generate_differences
+    :param indices: dictionary mapping sensors to index arrays of their
+    differences, e.g. the anomalies returned by inverse_transformation
+    :return: dictionary mapping sensors to 2xK int32 arrays, column k holding
+    the raw indices of the two readings behind difference indices[sensor][k]
+    """
+    raw_readings = {}
+    for sensor, difference_indices in indices.iteritems():
+        order = lookup_table[sensor]
+        difference_indices = numpy.asarray(difference_indices, numpy.intp)
+        raw_readings[sensor] = numpy.vstack([order[difference_indices],
+                                             order[difference_indices + 1]])
+
+    return raw_readings
+
 def calc_succ_diff(sensor):
     """ Calculates the successive differences of for a given sensor
 
     :param sensor: Sensor to be operated on
     :return: numpy array of successive differences
     """
-    sensor = [
-        successive_diff(sensor[0]),
-        successive_diff(sensor[1])
-    ]
-
-    return numpy.array(sensor, float)
+    return numpy.diff(numpy.asarray(sensor, float), axis=1)
 
 def successive_diff(array):
     """ Calculates the successive differences for an array
@@ -119,29 +168,110 @@ def successive_diff(array):
     :return: Array of resulting successive differences
     """
 
-    return [array[i+1] - array[i] for i in range(len(array) - 1)]
+    return numpy.diff(array)
+
+def standardize_readings(sensors, statistics=None, dtype=None):
+    """ Standardizes the temp. and humidity readings of every sensor
+
+    The means and standard deviations of both channels come from one pass
+    over each sensor's readings, kept as stats.SufficientStatistics. Passing
+    the statistics returned by an earlier call skips that pass, and they are
+    what inverse_standardization needs to map back to raw units.
+
+    Readings are standardized in place unless a different dtype is requested,
+    e.g. float32, in which case a new frame of that dtype is returned and the
+    original readings are left untouched.
+
+    :param sensors: SensorFrame or dictionary of sensors containing temp. and
+    humidity readings
+    :param statistics: optional dictionary mapping sensors to their cached
+    stats.SufficientStatistics
+    :param dtype: optional dtype of the standardized readings
+    :return: tuple containing the sensors mapped to their standardized readings
+    and the dictionary mapping sensors to their statistics
+    """
+    if statistics is None:
+        statistics = {}
+
+    if dtype is not None and len(sensors) and numpy.dtype(dtype) != sensors[next(iter(sensors))].dtype:
+        if isinstance(sensors, SensorFrame):
+            sensors = SensorFrame(sensors.readings.astype(dtype), sensors.sensors, sensors.offsets)
+        else:
+            sensors = SensorFrame.from_measurements(sensors, dtype)
+
+    for sensor in sensors:
+        readings = sensors[sensor]
+        if sensor not in statistics:
+            statistics[sensor] = stats.SufficientStatistics.from_readings(readings)
+        means = numpy.array(statistics[sensor].mean(), readings.dtype)[:, numpy.newaxis]
+        deviations = numpy.array(statistics[sensor].std(), readings.dtype)[:, numpy.newaxis]
+
+        readings -= means
+        readings /= deviations
+
+    return (sensors, statistics)
+
+def inverse_standardization(sensors, statistics):
+    """ Maps standardized readings back to raw units in place
+
+    :param sensors: SensorFrame or dictionary of sensors containing
+    standardized temp. and humidity readings
+    :param statistics: dictionary mapping sensors to the
+    stats.SufficientStatistics returned by standardize_readings
+    :return: sensors mapped to their readings in raw units
+    """
+    for sensor in sensors:
+        readings = sensors[sensor]
+        readings *= numpy.array(statistics[sensor].std(), readings.dtype)[:, numpy.newaxis]
+        readings += numpy.array(statistics[sensor].mean(), readings.dtype)[:, numpy.newaxis]
+
+    return sensors
 
 """Begin ellipsoid modeling functions"""
-def generate_regional_ellipsoid_parameters(sensors_ellipsoid_parameters):
+def generate_regional_ellipsoid_parameters(sensors_ellipsoid_parameters, weighted=False):
     """ Generates the aggregate ellipsoid parameters from a list of ellipsoids
      within a region
 
+    Ellipsoids modeled from no readings or with a non-finite parameter, such as
+    the NaN theta of a sensor without readings, are left out of the aggregate.
+
     :param ellipsoid_parameters: list of dictionaries representing ellipsoid
     parameters from individual sensors
+    :param weighted: whether each ellipsoid is weighted by its number of
+    readings 'n' rather than counted once
     :return: dictionary representing the aggregate ellipsoid parameters for a
     given region
     """
-    num_of_ellipsoids = len(sensors_ellipsoid_parameters)
-    ave_a = sum([sensors_ellipsoid_parameters[ellipsoid]['a'] for ellipsoid in sensors_ellipsoid_parameters]) / num_of_ellipsoids
-    ave_b = sum([sensors_ellipsoid_parameters[ellipsoid]['b'] for ellipsoid in sensors_ellipsoid_parameters]) / num_of_ellipsoids
-    ave_theta = sum([sensors_ellipsoid_parameters[ellipsoid]['theta'] for ellipsoid in sensors_ellipsoid_parameters]) / num_of_ellipsoids
-
-    return (ave_a, ave_b, ave_theta)
+    total_weight = sum_a = sum_b = sum_theta = 0
+    for ellipsoid in sensors_ellipsoid_parameters.itervalues():
+        weight = ellipsoid['n'] if weighted else 1
+        if not is_usable_ellipsoid(weight, ellipsoid['a'], ellipsoid['b'], ellipsoid['theta']):
+            continue
+        total_weight += weight
+        sum_a += weight * ellipsoid['a']
+        sum_b += weight * ellipsoid['b']
+        sum_theta += weight * ellipsoid['theta']
+
+    return (sum_a / total_weight, sum_b / total_weight, sum_theta / total_weight)
+
+def is_usable_ellipsoid(weight, a, b, theta):
+    """ Returns whether an ellipsoid can contribute to a regional aggregate
+
+    :param weight: weight of the ellipsoid in the aggregate
+    :param a: a parameter of the ellipsoid
+    :param b: b parameter of the ellipsoid
+    :param theta: theta of the ellipsoid
+    :return: True if the weight is positive and every parameter is finite
+    """
+    return weight > 0 and numpy.isfinite([weight, a, b, theta]).all()
 
 def generate_ellipsoid(sensor, a, b, theta=None):
     """ Calculates points representing an ellipsoid for a given a and b
     over from sensor readings.
 
+    The boundary is evaluated over every temperature reading at once; points
+    where a temperature falls outside of the ellipsoid are NaN.
+
     :param sensor: sensor mapped to a 2D array of temp. and humidity readings
     :param a: a parameter used in calculating ellipsoid parameters
     :param b: b parameter used in calculating ellipsoid parameters
@@ -153,55 +283,85 @@ def generate_ellipsoid(sensor, a, b, theta=None):
         theta = calculate_ellipsoid_orientation(sensor)
     A = calc_A(a, b, theta) # A is independent of the temperatures
 
+    temperature_readings = numpy.asarray(sensor[0], float)
+    B = calc_B(a, b, temperature_readings, theta)
+    C = calc_C(a, b, temperature_readings, theta)
+    hi1, hi2 = calc_hi_roots(A, B, C)
+
+    # (temp, hi1) and (temp, hi2) pairs for each reading in order
+    ellipsoid_points = numpy.empty((2 * len(temperature_readings), 2), float)
+    ellipsoid_points[0::2, 0] = temperature_readings
+    ellipsoid_points[1::2, 0] = temperature_readings
+    ellipsoid_points[0::2, 1] = hi1
+    ellipsoid_points[1::2, 1] = hi2
+
     ellipsoid_parameters = {
         'a': a,
         'b': b,
         'theta': theta,
+        'n': len(temperature_readings),
         'original_sensor_readings': sensor,
-        'ellipsoid_points': []
+        'ellipsoid_points': ellipsoid_points
     }
 
-    for temp_reading in sensor[0]:
-        B = calc_B(a, b, temp_reading, theta)
-        C = calc_C(a, b, temp_reading, theta)
-        hi1 = calc_hi1(A, B, C)
-        ellipsoid_parameters['ellipsoid_points'].append((temp_reading, hi1))
-        hi2 = calc_hi2(A, B, C)
-        ellipsoid_parameters['ellipsoid_points'].append((temp_reading, hi2))
-
     return ellipsoid_parameters
 
-def calculate_ellipsoid_orientation(sensor):
-    """ Calculates the orientation of raw sensor data points
-    :param sensor: sensor mapped to a 2D array of temp. and humidity readings
-    :return: float, theta of ellipsoid orientation
-    """
-    n = len(sensor[0])
-    temperature_readings = sensor[0]
-    humidity_readings = sensor[1]
+def generate_ellipsoid_parameters(sensor, a, b, theta=None):
+    """ Models the ellipsoid of a sensor by its parameters alone
 
-    #FIXME(hrybacki): Come up with a better way of breaking this components down
+    Unlike generate_ellipsoid no boundary points are calculated or readings
+    kept, the result is the same few values whatever the number of readings.
+    The boundary can be drawn from the parameters with ellipsoid_boundary.
 
-    # part_one
-    part_one_multiplicands = [temperature_readings[i]*humidity_readings[i] for i in range(n)]
-    part_one_value = n * sum(part_one_multiplicands)
+    :param sensor: sensor mapped to a 2D array of temp. and humidity readings
+    :param a: a parameter used in calculating ellipsoid parameters
+    :param b: b parameter used in calculating ellipsoid parameters
+    :param theta: optional hardcoded theta value
+    :return: dictionary containing the 'a', 'b' and 'theta' of the ellipsoid
+    and the number of readings 'n' it was modeled from
+    """
+    if theta is None:
+        theta = calculate_ellipsoid_orientation(sensor)
 
-    # part two
-    part_two_value = sum(temperature_readings) * sum(humidity_readings)
+    return {'a': a, 'b': b, 'theta': theta, 'n': numpy.shape(sensor)[1]}
 
-    # part three
-    part_three_value = n * sum([math.pow(temp, 2) for temp in temperature_readings])
+def ellipsoid_boundary(a, b, theta, resolution=BOUNDARY_RESOLUTION):
+    """ Returns points evenly spaced in angle around the boundary of an ellipsoid
 
-    # part four
-    part_four_value = math.pow(sum(temperature_readings), 2)
+    Boundaries are cached by their parameters, the returned array is shared
+    and read-only.
 
-    # arctan(theta)
-    tan_theta = (part_one_value - part_two_value) / (part_three_value - part_four_value)
+    :param a: a parameter of the ellipsoid
+    :param b: b parameter of the ellipsoid
+    :param theta: orientation of the ellipsoid
+    :param resolution: number of points along the boundary
+    :return: (resolution + 1)x2 array of (temp., humidity) points, the first
+    point repeated last to close the boundary
+    """
+    key = (a, b, theta, resolution)
+    if key not in _boundaries:
+        if len(_boundaries) >= BOUNDARY_CACHE_SIZE:
+            _boundaries.clear()
+
+        angles = numpy.linspace(0, 2 * math.pi, resolution + 1)
+        u = a * numpy.cos(angles)
+        v = b * numpy.sin(angles)
+        boundary = numpy.column_stack([u * math.cos(theta) - v * math.sin(theta),
+                                       u * math.sin(theta) + v * math.cos(theta)])
+        boundary[-1] = boundary[0]
+        boundary.setflags(write=False)
+        _boundaries[key] = boundary
+
+    return _boundaries[key]
 
-    #return math.atan(tan_theta)
+def calculate_ellipsoid_orientation(sensor):
+    """ Calculates the orientation of raw sensor data points
+    :param sensor: sensor mapped to a 2D array of temp. and humidity readings
+    :return: float, theta of ellipsoid orientation
+    """
     # @FIXME(hrybacki): Dr. Shan want's this to be absolute value. Do we need that? Why?
-    #return math.fabs(math.atan(tan_theta))
-    return math.atan(tan_theta)
+    #return math.fabs(stats.SufficientStatistics.from_readings(sensor).orientation())
+    return stats.SufficientStatistics.from_readings(sensor).orientation()
 
 
 def calc_A(a, b, theta):
@@ -221,7 +381,8 @@ def calc_B(a, b, ti, theta):
 
     :param a: represents the major axis of the ellipsoid
     :param b: represents the mini axis os the ellipsoid
-    :param ti: temperature (independent variable) used in calculation
+    :param ti: temperature (independent variable) used in calculation, either a
+    single reading or an array of readings
     :param theta: represents the orientation of the raw measurements
     :return: B value used in ellipsoid boundary modeling
     """
@@ -234,12 +395,13 @@ def calc_C(a, b, ti, theta):
 
     :param a: represents the major axis of the ellipsoid
     :param b: represents the mini axis os the ellipsoid
-    :param ti: temperature (independent variable) used in calculation
+    :param ti: temperature (independent variable) used in calculation, either a
+    single reading or an array of readings
     :param theta: represents the orientation of the raw measurements
     :return: C value used in ellipsoid boundary modeling
     """
-    C = ((math.pow(ti, 2) * math.pow(math.cos(theta), 2)) / math.pow(a, 2)) + \
-        ((math.pow(ti, 2) * math.pow(math.sin(theta), 2)) / math.pow(b, 2)) - 1
+    C = (((ti * ti) * math.pow(math.cos(theta), 2)) / math.pow(a, 2)) + \
+        (((ti * ti) * math.pow(math.sin(theta), 2)) / math.pow(b, 2)) - 1
 
     return C
 
@@ -269,22 +431,173 @@ def calc_hi2(A, B, C):
     except ValueError:
         pass # ignore domain errors
 
-"""Begin incomplete functions"""
-def inverse_transformation(lookup_table, aggregate_ellipsoid):
+def calc_hi_roots(A, B, C):
+    """ Calculates the upper and lower points modeling an ellipsoid for an
+    array of temperatures
+
+    Temperatures without a real solution are masked with NaN rather than
+    raising and catching a domain error for each of them.
+
+    :param A: A value used in ellipsoid boundary modeling
+    :param B: array of B values used in ellipsoid boundary modeling
+    :param C: array of C values used in ellipsoid boundary modeling
+    :return: tuple containing arrays of the upper and lower points
+    """
+    discriminant = numpy.square(B) - (4*A*C)
+    root = numpy.sqrt(numpy.where(discriminant >= 0, discriminant, numpy.nan))
+
+    return ((-B + root) / (2*A), (-B - root) / (2*A))
+
+"""Begin streaming functions"""
+def batch_readings(batch):
+    """ Returns the dictionary of readings of a batch
+
+    :param batch: dictionary mapping sensors to 2D arrays of readings or a
+    (batch, row_count, bad_count) tuple as yielded by ingest.stream_ibrl_data
+    :return: dictionary mapping sensors to 2D arrays of readings
+    """
+    return batch[0] if isinstance(batch, tuple) else batch
+
+def stream_differences(batches):
+    """ Generates the successive differences of batches of sensor readings
+    without holding more than one batch in memory
+
+    The last reading of every sensor is carried over to the next batch so the
+    differences match those of the concatenated readings. Batches may be
+    shuffled beforehand, e.g. with randomize_readings, to permute the readings
+    within each batch.
+
+    :param batches: iterable of dictionaries mapping sensors to 2D arrays of
+    temp. and humidity readings, or of the (batch, row_count, bad_count)
+    tuples yielded by ingest.stream_ibrl_data
+    :return: generator of dictionaries mapping sensors to 2D arrays of
+    successive differences
+    """
+    last_readings = {}
+
+    for batch in batches:
+        differences = {}
+        for sensor, readings in batch_readings(batch).iteritems():
+            if not readings.shape[1]:
+                continue
+            if sensor in last_readings:
+                readings = numpy.hstack((last_readings[sensor], readings))
+            last_readings[sensor] = readings[:, -1:].copy()
+            if readings.shape[1] > 1:
+                differences[sensor] = numpy.diff(readings, axis=1)
+
+        yield differences
+
+def stream_statistics(batches):
+    """ Accumulates the sufficient statistics of each sensor's readings over
+    batches of readings
+
+    :param batches: iterable of dictionaries mapping sensors to 2D arrays of
+    temp. and humidity readings or differences, or of the tuples yielded by
+    ingest.stream_ibrl_data
+    :return: dictionary mapping sensors to their stats.SufficientStatistics
+    """
+    statistics = {}
+
+    for batch in batches:
+        for sensor, readings in batch_readings(batch).iteritems():
+            if sensor not in statistics:
+                statistics[sensor] = stats.SufficientStatistics()
+            statistics[sensor].update(readings)
+
+    return statistics
+
+def stream_orientation(batches):
+    """ Calculates the orientation of each sensor's readings over batches of
+    readings
+
+    :param batches: iterable of dictionaries mapping sensors to 2D arrays of
+    temp. and humidity readings or differences, or of the tuples yielded by
+    ingest.stream_ibrl_data
+    :return: dictionary mapping sensors to theta of their ellipsoid orientation
+    """
+    return {sensor: statistics.orientation()
+            for (sensor, statistics) in stream_statistics(batches).iteritems()}
+
+"""Begin anomaly detection functions"""
+def inverse_transformation(differences, aggregate_ellipsoid):
     """ Generates a tuple of two dicts mapping sensors to anomalies and true measurements
 
-    :param lookup_table: dictionary mapping difference readings to their raw measurements
+    Difference i of a sensor was calculated from its (shuffled) readings i and
+    i + 1; lookup_raw_readings maps the index arrays back to raw readings.
+
+    :param differences: dictionary mapping sensors to 2D arrays of successive
+    differences
     :param aggregate_ellipsoid: 3-tuple containing aggregate ellipsoid parameters
     :return: tuple containing two dicts, one of true measurements and another of anomalies
-    each mapped to their original sensors
+    each mapping the original sensors to index arrays of their differences
     """
-    pass
+    anomaly_masks = detect_anomalies(differences, aggregate_ellipsoid)
+
+    true_measurements = {sensor: numpy.flatnonzero(~mask)
+                         for (sensor, mask) in anomaly_masks.iteritems()}
+    anomalies = {sensor: numpy.flatnonzero(mask)
+                 for (sensor, mask) in anomaly_masks.iteritems()}
+
+    return (true_measurements, anomalies)
+
+def detect_anomalies(differences, aggregate_ellipsoid):
+    """ Determines which successive differences of every sensor are anomalies
+    with respect to an ellipsoid
+
+    The differences of all sensors are classified by a single evaluation of
+    the ellipsoid's quadratic form, directly over the flat readings of a
+    SensorFrame or over the concatenated arrays of a dictionary.
+
+    :param differences: SensorFrame or dictionary mapping sensors to 2D arrays
+    of successive differences
+    :param aggregate_ellipsoid: 3-tuple containing aggregate ellipsoid parameters
+    :return: dictionary mapping sensors to boolean arrays, True for anomalies
+    """
+    if isinstance(differences, SensorFrame):
+        sensors = differences.sensors
+        offsets = differences.offsets
+        points = differences.readings
+    else:
+        sensors = list(differences)
+        offsets = numpy.cumsum([0] + [differences[sensor].shape[1] for sensor in sensors])
+        if not sensors:
+            return {}
+        points = numpy.hstack([differences[sensor] for sensor in sensors])
+
+    mask = is_anomaly(points, aggregate_ellipsoid)
+
+    return {sensor: mask[offsets[i]:offsets[i + 1]] for (i, sensor) in enumerate(sensors)}
 
 def is_anomaly(reading, aggregate_ellipsoid):
     """ Determines if reading is anomaly with respect to an ellipsoid
 
-    :param reading: temperature and humidity readings
+    Rotated onto the axes of the ellipsoid a reading (u, v) is an anomaly when
+    u^2 / a^2 + v^2 / b^2 > 1. Expanded in t and h this is the quadratic form
+    whose coefficients calc_A and calc_B use to trace the boundary in
+    generate_ellipsoid.
+
+    :param reading: temperature and humidity readings, either a single pair or
+    a 2D array of temp. and humidity readings
     :param aggregate_ellipsoid: parameters for aggregate ellipsoid
-    :return: True if an anomaly, else False
+    :return: True if an anomaly, else False; a boolean array for a 2D array of
+    readings
     """
-    pass
+    a, b, theta = aggregate_ellipsoid
+    reading = numpy.asarray(reading, float)
+
+    coefficient_tt = (math.pow(math.cos(theta), 2) / math.pow(a, 2)) + \
+        (math.pow(math.sin(theta), 2) / math.pow(b, 2))
+    coefficient_hh = calc_A(a, b, theta)
+    coefficient_th = calc_B(a, b, 1.0, theta)
+
+    temperature_readings = reading[0]
+    humidity_readings = reading[1]
+    quadratic_form = (coefficient_tt * temperature_readings * temperature_readings) + \
+        (coefficient_hh * humidity_readings * humidity_readings) + \
+        (coefficient_th * temperature_readings * humidity_readings)
+
+    if reading.ndim == 1:
+        return bool(quadratic_form > 1)
+
+    return quadratic_form > 1
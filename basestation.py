@@ -0,0 +1,321 @@
+""" This file contains the base station service collecting the ellipsoid
+parameters that the sensors of a deployment model locally.
+
+Every sensor (node) reports its a, b, theta and number of readings over a TCP
+connection as a fixed-size little-endian record of UPDATE_DTYPE, and every
+update is acknowledged with a record of ACK_DTYPE carrying its status and the
+regional ellipsoid as it stands after the update. Updates from unknown
+sensors or with parameters that are not finite are rejected without
+touching the regional values. The station keeps the parameters in
+a regions.RegionTree, so an update adjusts the regional values in O(depth)
+instead of averaging all of the sensors again, and the records arriving
+together on a connection are decoded in one pass as a NumPy record array.
+Connections are served concurrently by a single-threaded tornado IOLoop.
+
+The load generator simulates many nodes multiplexed over a pool of
+connections and measures the update throughput and round trip latency, by
+default against a station started in-process on the loopback interface.
+
+Usage:
+    python basestation.py serve --sensors 54 --port 8890
+    python basestation.py load --nodes 5000 --updates 10 --connections 200
+"""
+
+import argparse
+import math
+import timeit
+
+import numpy
+from tornado import gen, ioloop, iostream, netutil, tcpclient, tcpserver
+
+import regions
+
+
+DEFAULT_PORT = 8890
+READ_SIZE = 1 << 16 # bytes read from a connection at a time
+
+# Wire records, packed little-endian: 36 bytes per update and 29 per ack
+UPDATE_DTYPE = numpy.dtype([('sensor_id', '<u4'), ('sequence', '<u4'), ('a', '<f8'),
+                            ('b', '<f8'), ('theta', '<f8'), ('n', '<u4')])
+ACK_DTYPE = numpy.dtype([('sequence', '<u4'), ('status', 'u1'), ('a', '<f8'),
+                         ('b', '<f8'), ('theta', '<f8')])
+
+STATUS_OK = 0
+STATUS_UNKNOWN_SENSOR = 1
+STATUS_INVALID = 2 # a, b or theta is NaN or infinite
+
+
+"""Begin protocol functions"""
+def encode_updates(updates):
+    """ Encodes parameter updates as wire records
+
+    :param updates: list of (sensor_id, sequence, a, b, theta, n) tuples
+    :return: string of UPDATE_DTYPE records
+    """
+    return numpy.array(updates, UPDATE_DTYPE).tobytes()
+
+def decode_updates(data):
+    """ Decodes the complete update records at the start of a buffer
+
+    :param data: string of received bytes
+    :return: tuple containing the record array of UPDATE_DTYPE and the bytes
+    of a trailing partial record
+    """
+    count = len(data) // UPDATE_DTYPE.itemsize
+
+    return (numpy.frombuffer(data, UPDATE_DTYPE, count), data[count * UPDATE_DTYPE.itemsize:])
+
+def decode_acks(data):
+    """ Decodes acknowledgement records
+
+    :param data: string of a whole number of ACK_DTYPE records
+    :return: record array of ACK_DTYPE
+    """
+    return numpy.frombuffer(data, ACK_DTYPE)
+
+"""Begin base station"""
+class BaseStation(object):
+    """ Regional ellipsoid of the parameters reported by the sensors
+
+    Unweighted, the regional values are those of
+    generate_regional_ellipsoid_parameters over the latest parameters of every
+    sensor that has reported.
+    """
+
+    def __init__(self, sensor_regions, parent_regions=None, weighted=False):
+        """
+        :param sensor_regions: dictionary mapping sensor ids to their regions
+        :param parent_regions: optional dictionary mapping regions to their parents
+        :param weighted: whether sensors are weighted by their number of readings
+        """
+        self.tree = regions.RegionTree(sensor_regions, parent_regions, weighted)
+        self.updates = 0
+        self.rejected = 0
+
+    def regional_ellipsoid(self, region=regions.ROOT_REGION):
+        """ Returns the aggregate ellipsoid parameters of a region
+
+        :param region: region of the deployment, defaults to all of it
+        :return: tuple (a, b, theta) or None if no sensor of the region reported
+        """
+        return self.tree.regional_ellipsoid(region)
+
+    def apply_updates(self, updates):
+        """ Applies parameter updates in order and acknowledges each of them
+
+        :param updates: record array of UPDATE_DTYPE
+        :return: record array of ACK_DTYPE, one per update, holding its status
+        (STATUS_OK, STATUS_UNKNOWN_SENSOR or STATUS_INVALID) and the regional
+        ellipsoid after the update or NaN while no sensor reported
+        """
+        acks = numpy.zeros(len(updates), ACK_DTYPE)
+        update = self.tree.update
+        regional_ellipsoid = self.tree.regional_ellipsoid
+        unknown = (float('nan'),) * 3
+        finite = (numpy.isfinite(updates['a']) & numpy.isfinite(updates['b'])
+                  & numpy.isfinite(updates['theta'])).tolist()
+
+        for i, (sensor_id, sequence, a, b, theta, n) in enumerate(updates.tolist()):
+            status = STATUS_OK
+            if not finite[i]:
+                status = STATUS_INVALID
+            else:
+                try:
+                    update(sensor_id, a, b, theta, n)
+                except KeyError:
+                    status = STATUS_UNKNOWN_SENSOR
+            if status != STATUS_OK:
+                self.rejected += 1
+            acks[i] = (sequence, status) + (regional_ellipsoid() or unknown)
+        self.updates += len(updates)
+
+        return acks
+
+
+class BaseStationServer(tcpserver.TCPServer):
+    """ Serves parameter updates from any number of concurrent node connections """
+
+    def __init__(self, station, **kwargs):
+        """
+        :param station: BaseStation the updates are applied to
+        :param kwargs: keyword arguments of tornado's TCPServer
+        """
+        tcpserver.TCPServer.__init__(self, **kwargs)
+        self.station = station
+
+    @gen.coroutine
+    def handle_stream(self, stream, address):
+        """ Applies the updates of a connection until the node disconnects """
+        remainder = b''
+        try:
+            while True:
+                data = yield stream.read_bytes(READ_SIZE, partial=True)
+                updates, remainder = decode_updates(remainder + data)
+                if len(updates):
+                    yield stream.write(self.station.apply_updates(updates).tobytes())
+        except iostream.StreamClosedError:
+            pass
+
+"""Begin load generator functions"""
+@gen.coroutine
+def simulate_nodes(host, port, sensor_ids, updates, random_state, latencies, reported):
+    """ Reports rounds of parameters for a group of nodes sharing one
+    connection, one update at a time
+
+    :param host: address of the base station
+    :param port: port of the base station
+    :param sensor_ids: ids of the simulated nodes
+    :param updates: number of updates reported by each node
+    :param random_state: numpy RandomState drawing the parameters
+    :param latencies: list the round trip time of every update is appended to
+    :param reported: dictionary filled with the latest (a, b, theta) of every node
+    :return: number of updates that were not acknowledged with STATUS_OK
+    """
+    stream = yield tcpclient.TCPClient().connect(host, port)
+    failed = 0
+    try:
+        for sequence in range(updates):
+            for sensor_id in sensor_ids:
+                a, b = 8.7886 * (1 + 0.1 * random_state.random_sample(2)) # near the IBRL values
+                theta = random_state.uniform(-math.pi / 2, math.pi / 2)
+                message = encode_updates([(sensor_id, sequence, a, b, theta,
+                                           random_state.randint(100, 10000))])
+
+                start = timeit.default_timer()
+                yield stream.write(message)
+                ack = decode_acks((yield stream.read_bytes(ACK_DTYPE.itemsize)))[0]
+                latencies.append(timeit.default_timer() - start)
+
+                if ack['status'] != STATUS_OK or ack['sequence'] != sequence:
+                    failed += 1
+                reported[sensor_id] = (a, b, theta)
+    finally:
+        stream.close()
+
+    raise gen.Return(failed)
+
+@gen.coroutine
+def generate_load(host, port, nodes, updates, connections, seed=None):
+    """ Simulates nodes 1 to nodes reporting to a base station concurrently
+
+    :param host: address of the base station
+    :param port: port of the base station
+    :param nodes: number of simulated nodes
+    :param updates: number of updates reported by each node
+    :param connections: number of connections the nodes are spread over
+    :param seed: optional seed of the simulated parameters
+    :return: dictionary as returned by summarize_load
+    """
+    random_state = numpy.random.RandomState(seed)
+    sensor_ids = numpy.arange(1, nodes + 1)
+    connections = max(1, min(connections, nodes))
+    latencies = []
+    reported = {}
+
+    start = timeit.default_timer()
+    failed = yield [simulate_nodes(host, port, sensor_ids[i::connections].tolist(), updates,
+                                   numpy.random.RandomState(random_state.randint(1 << 30)),
+                                   latencies, reported)
+                    for i in range(connections)]
+    seconds = timeit.default_timer() - start
+
+    summary = summarize_load(latencies, seconds)
+    summary.update(connections=connections, failed=sum(failed), reported=reported)
+
+    raise gen.Return(summary)
+
+def summarize_load(latencies, seconds):
+    """ Summarizes the round trip times of a load test
+
+    :param latencies: list of round trip times in seconds
+    :param seconds: wall time of the load test
+    :return: dictionary containing the number of 'updates', the 'seconds',
+    the 'throughput' in updates per second and the mean, median, 99th
+    percentile and maximum latencies
+    """
+    latencies = numpy.array(latencies or [float('nan')])
+
+    return {
+        'updates': len(latencies),
+        'seconds': seconds,
+        'throughput': len(latencies) / seconds if seconds else float('nan'),
+        'latency_mean': float(latencies.mean()),
+        'latency_p50': float(numpy.percentile(latencies, 50)),
+        'latency_p99': float(numpy.percentile(latencies, 99)),
+        'latency_max': float(latencies.max())
+    }
+
+def run_load_test(nodes=1000, updates=10, connections=100, host=None, port=DEFAULT_PORT,
+                  weighted=False, seed=None):
+    """ Runs the load generator to completion
+
+    Without a host, a base station for the simulated nodes is started on an
+    ephemeral loopback port of the same IOLoop as a local stand-in.
+
+    :param nodes: number of simulated nodes
+    :param updates: number of updates reported by each node
+    :param connections: number of connections the nodes are spread over
+    :param host: optional address of a running base station
+    :param port: port of the running base station
+    :param weighted: whether the stand-in weights sensors by their number of readings
+    :param seed: optional seed of the simulated parameters
+    :return: dictionary as returned by generate_load, with the stand-in's
+    'regional_ellipsoid' when one was started
+    """
+    station = server = None
+    if host is None:
+        station = BaseStation({sensor_id: regions.ROOT_REGION for sensor_id in range(1, nodes + 1)},
+                              weighted=weighted)
+        server = BaseStationServer(station)
+        sockets = netutil.bind_sockets(0, '127.0.0.1')
+        server.add_sockets(sockets)
+        host, port = sockets[0].getsockname()[:2]
+
+    try:
+        summary = ioloop.IOLoop.current().run_sync(
+            lambda: generate_load(host, port, nodes, updates, connections, seed))
+    finally:
+        if server is not None:
+            server.stop()
+
+    if station is not None:
+        summary['regional_ellipsoid'] = station.regional_ellipsoid()
+
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Collect the ellipsoid parameters of a deployment')
+    subparsers = parser.add_subparsers(dest='command')
+
+    subparser = subparsers.add_parser('serve')
+    subparser.add_argument('--sensors', type=int, default=54, help='sensors 1 to SENSORS may report')
+    subparser.add_argument('--address', default='', help='address to listen on')
+    subparser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    subparser.add_argument('--weighted', action='store_true', help='weight sensors by their readings')
+
+    subparser = subparsers.add_parser('load')
+    subparser.add_argument('--nodes', type=int, default=1000)
+    subparser.add_argument('--updates', type=int, default=10, help='updates reported by each node')
+    subparser.add_argument('--connections', type=int, default=100)
+    subparser.add_argument('--host', help='address of a running base station, '
+                                          'otherwise one is started in-process')
+    subparser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    subparser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        station = BaseStation({sensor_id: regions.ROOT_REGION for sensor_id in range(1, args.sensors + 1)},
+                              weighted=args.weighted)
+        BaseStationServer(station).listen(args.port, args.address)
+        print "Base station listening on port %d" % args.port
+        ioloop.IOLoop.current().start()
+    else:
+        summary = run_load_test(args.nodes, args.updates, args.connections, args.host, args.port,
+                                seed=args.seed)
+        print "%d updates from %d nodes over %d connections in %.3fs (%d failed)" % (
+            summary['updates'], args.nodes, summary['connections'], summary['seconds'],
+            summary['failed'])
+        print "Throughput: %.0f updates/s" % summary['throughput']
+        print "Latency: mean %.3fms, p50 %.3fms, p99 %.3fms, max %.3fms" % tuple(
+            1000 * summary[key] for key in ('latency_mean', 'latency_p50', 'latency_p99', 'latency_max'))
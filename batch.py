@@ -0,0 +1,272 @@
+""" This file contains the batch command line tool processing many datasets,
+e.g. the daily logs of a whole deployment, in one job.
+
+Each subcommand runs the pipeline over every dataset up to one of its
+phases, in a pool of worker processes, one dataset per task:
+
+    ingest  parses the datasets (and builds their binary caches with --cache)
+    model   models the ellipsoids and the regional ellipsoid of each dataset
+    detect  also segregates the anomalies of each dataset
+    report  summarizes the results already written by the other subcommands
+
+The results of every dataset are written as JSON to the output directory and
+combined into a summary of the whole batch.
+
+Usage:
+    python batch.py detect ./datasets/ --processes 4 --output results
+    python batch.py report --output results
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+import timeit
+import traceback
+
+import pipeline
+
+
+COMMAND_STAGES = {'ingest': 'ingest', 'model': 'regional', 'detect': 'detection'}
+COMMAND_ORDER = ('ingest', 'model', 'detect') # from least to most progressed
+DATASET_PATTERN = '*.csv'
+OUTPUT_DIR = 'batch_results'
+SUMMARY_FILE = 'summary.json'
+
+
+"""Begin input functions"""
+def find_datasets(paths, pattern=DATASET_PATTERN):
+    """ Expands files and directories into a sorted list of datasets
+
+    :param paths: list of strings representing paths to datasets or
+    directories containing them
+    :param pattern: glob pattern of the datasets within directories
+    :return: sorted list of dataset paths
+    """
+    datasets = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                datasets.update(os.path.join(root, name) for name in fnmatch.filter(files, pattern))
+        else:
+            datasets.add(path)
+
+    return sorted(datasets)
+
+"""Begin processing functions"""
+def summarize_state(state, command):
+    """ Extracts the results of a subcommand from a pipeline state
+
+    :param state: dictionary as returned by pipeline.run_pipeline
+    :param command: name of the subcommand, one of COMMAND_STAGES
+    :return: dictionary of JSON serializable results
+    """
+    columns = state['columns']
+    result = {
+        'rows': int(columns['row_count']),
+        'incomplete_rows': int(columns['bad_count']),
+        'sensors': len(columns['sensors']),
+        'readings': int(columns['readings'].shape[1])
+    }
+
+    if command in ('model', 'detect'):
+        result['regional_ellipsoid'] = [float(value) for value in state['regional_ellipsoid']]
+        result['thetas'] = {sensor: float(ellipsoid['theta'])
+                            for (sensor, ellipsoid) in state['ellipsoid_parameters'].iteritems()}
+
+    if command == 'detect':
+        result['anomalies'] = {sensor: len(anomalies)
+                               for (sensor, anomalies) in state['anomalies'].iteritems()}
+        result['anomaly_count'] = sum(result['anomalies'].itervalues())
+        result['differences'] = int(state['differences'].readings.shape[1])
+
+    return result
+
+def process_dataset(args):
+    """ Runs a subcommand over one dataset, inside a worker process
+
+    Failures are reported in the result rather than raised, so one bad file
+    does not abort the batch.
+
+    :param args: tuple containing the subcommand, the dataset path, the
+    output directory and the dictionary of pipeline parameters
+    :return: dictionary of the dataset's results, its 'data_file', 'command'
+    and 'seconds' or 'error'
+    """
+    command, data_file, output_dir, parameters = args
+
+    start = timeit.default_timer()
+    try:
+        state = pipeline.run_pipeline(data_file, until=COMMAND_STAGES[command], **parameters)
+        result = summarize_state(state, command)
+    except Exception:
+        result = {'error': traceback.format_exc()}
+    result.update(data_file=data_file, command=command, seconds=timeit.default_timer() - start)
+
+    with open(result_file(output_dir, data_file, command), 'w') as fp:
+        json.dump(result, fp, indent=2, sort_keys=True)
+
+    return result
+
+def result_file(output_dir, data_file, command):
+    """ Returns the path of the results of a dataset, named after the
+    dataset's file name and a hash of its absolute path so datasets of
+    different directories never collide """
+    path_hash = hashlib.sha1(os.path.abspath(data_file)).hexdigest()[:16]
+
+    return os.path.join(output_dir, '%s.%s.%s.json' % (os.path.basename(data_file), path_hash, command))
+
+def run_batch(command, datasets, output_dir=OUTPUT_DIR, processes=None, **parameters):
+    """ Runs a subcommand over many datasets concurrently
+
+    :param command: name of the subcommand, one of COMMAND_STAGES
+    :param datasets: list of dataset paths
+    :param output_dir: directory the results are written to
+    :param processes: number of worker processes, defaults to the number of CPUs
+    :param parameters: pipeline parameters overriding pipeline.DEFAULT_PARAMETERS
+    :return: summary of the batch as returned by summarize_results
+    """
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    tasks = [(command, data_file, output_dir, parameters) for data_file in datasets]
+
+    if processes == 1:
+        results = map(process_dataset, tasks)
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = list(pool.imap_unordered(process_dataset, tasks))
+        finally:
+            pool.close()
+            pool.join()
+
+    return write_summary(summarize_results(results), output_dir)
+
+"""Begin report functions"""
+def load_results(output_dir, command=None):
+    """ Loads the per-dataset results written to an output directory
+
+    :param output_dir: directory the results were written to
+    :param command: optional subcommand the results are restricted to
+    :return: list of result dictionaries
+    """
+    results = []
+    for name in sorted(os.listdir(output_dir)):
+        if name == SUMMARY_FILE or not name.endswith('.json'):
+            continue
+        if command is not None and not name.endswith('.%s.json' % command):
+            continue
+        with open(os.path.join(output_dir, name)) as fp:
+            results.append(json.load(fp))
+
+    return results
+
+def summarize_results(results):
+    """ Combines the results of many datasets into a summary
+
+    A dataset with the results of several subcommands, e.g. when reporting on
+    an output directory shared by ingest and detect runs, is summarized by
+    its furthest progressed subcommand.
+
+    :param results: list of result dictionaries as returned by process_dataset
+    :return: dictionary containing the totals over all datasets, the list of
+    'failed' datasets and the results of every dataset by path
+    """
+    latest = {}
+    for result in results:
+        current = latest.get(result['data_file'])
+        if current is None or \
+                COMMAND_ORDER.index(result['command']) > COMMAND_ORDER.index(current['command']):
+            latest[result['data_file']] = result
+    results = [latest[data_file] for data_file in sorted(latest)]
+
+    succeeded = [result for result in results if 'error' not in result]
+    summary = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'datasets': len(results),
+        'failed': sorted(result['data_file'] for result in results if 'error' in result),
+        'rows': sum(result['rows'] for result in succeeded),
+        'incomplete_rows': sum(result['incomplete_rows'] for result in succeeded),
+        'readings': sum(result['readings'] for result in succeeded),
+        'seconds': sum(result['seconds'] for result in results),
+        'results': {result['data_file']: result for result in results}
+    }
+
+    detected = [result for result in succeeded if 'anomaly_count' in result]
+    if detected:
+        summary['anomaly_count'] = sum(result['anomaly_count'] for result in detected)
+        summary['differences'] = sum(result['differences'] for result in detected)
+
+    return summary
+
+def write_summary(summary, output_dir):
+    """ Writes the summary of a batch to the output directory
+
+    :param summary: dictionary as returned by summarize_results
+    :param output_dir: directory the summary is written to
+    :return: the summary
+    """
+    with open(os.path.join(output_dir, SUMMARY_FILE), 'w') as fp:
+        json.dump(summary, fp, indent=2, sort_keys=True)
+
+    return summary
+
+def format_summary(summary):
+    """ Formats a batch summary for the terminal
+
+    :param summary: dictionary as returned by summarize_results
+    :return: string containing one line per dataset and the totals
+    """
+    lines = []
+    for data_file in sorted(summary['results']):
+        result = summary['results'][data_file]
+        if 'error' in result:
+            lines.append('%-40s FAILED' % data_file)
+        else:
+            lines.append('%-40s %10d rows %8.3fs%s' % (
+                data_file, result['rows'], result['seconds'],
+                ' %8d anomalies' % result['anomaly_count'] if 'anomaly_count' in result else ''))
+    lines.append('Total: %d datasets, %d rows, %d failed' % (
+        summary['datasets'], summary['rows'], len(summary['failed'])))
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the anomaly detection pipeline over many datasets')
+    subparsers = parser.add_subparsers(dest='command')
+
+    for command in ('ingest', 'model', 'detect'):
+        subparser = subparsers.add_parser(command)
+        subparser.add_argument('paths', nargs='+', help='datasets or directories of datasets')
+        subparser.add_argument('--pattern', default=DATASET_PATTERN, help='datasets within directories')
+        subparser.add_argument('--processes', type=int, default=None, help='number of worker processes')
+        subparser.add_argument('--output', default=OUTPUT_DIR, help='directory of the results')
+        subparser.add_argument('--cache', action='store_true', help='read through the binary caches')
+        subparser.add_argument('--mapped', action='store_true', help='memory-map the datasets')
+        if command != 'ingest':
+            subparser.add_argument('-a', type=float, default=None, help='defaults to %g, or %g with --standardize' % (
+                pipeline.RAW_AXES[0], pipeline.STANDARDIZED_AXES[0]))
+            subparser.add_argument('-b', type=float, default=None, help='defaults to %g, or %g with --standardize' % (
+                pipeline.RAW_AXES[1], pipeline.STANDARDIZED_AXES[1]))
+            subparser.add_argument('--seed', type=int, default=None)
+            subparser.add_argument('--standardize', action='store_true')
+
+    subparser = subparsers.add_parser('report')
+    subparser.add_argument('--output', default=OUTPUT_DIR, help='directory of the results')
+    subparser.add_argument('--only', choices=sorted(COMMAND_STAGES), help='subcommand to report on')
+    args = parser.parse_args()
+
+    if args.command == 'report':
+        summary = write_summary(summarize_results(load_results(args.output, args.only)), args.output)
+    else:
+        parameters = {'cache': args.cache, 'mapped': args.mapped}
+        if args.command != 'ingest':
+            parameters.update(a=args.a, b=args.b, seed=args.seed, standardize=args.standardize)
+        summary = run_batch(args.command, find_datasets(args.paths, args.pattern), args.output,
+                            args.processes, **parameters)
+
+    print format_summary(summary)
@@ -0,0 +1,305 @@
+""" This file contains the benchmarking harness for the phases of the anomaly
+detection algorithm as implemented in baseline.py.
+
+Each phase (block) of the pipeline is timed on its own, producing the
+block_benchmarks of a run. Repeated runs are then combined into a composite
+benchmark_report that can be written as JSON and printed as a summary table.
+
+Usage:
+    python benchmark.py ./datasets/Reduced2530K.csv --trials 5 --cold --output report.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+import timeit
+
+import baseline
+
+
+PHASES = ('ingest', 'randomize', 'differences', 'orientation', 'ellipsoid',
+          'regional', 'detection')
+
+# a and b for non-standardized successive differences with the IBRL dataset
+DEFAULT_A = 8.7886
+DEFAULT_B = 22.9904
+
+
+"""Begin measurement functions"""
+def process_status(field):
+    """ Reads a memory field of the current process from /proc/self/status
+
+    :param field: name of the field, e.g. 'VmHWM' or 'VmRSS'
+    :return: value of the field in kilobytes or None where it is unavailable
+    """
+    try:
+        with open('/proc/self/status') as fp:
+            for line in fp:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except IOError:
+        pass
+
+    return None
+
+def reset_peak_memory():
+    """ Resets the resident memory high-water mark of the current process to
+    its current resident set size, which Linux supports through clear_refs
+
+    :return: whether the high-water mark was reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as fp:
+            fp.write('5')
+    except IOError:
+        return False
+
+    return process_status('VmHWM') is not None
+
+def peak_memory():
+    """ Returns the peak resident memory of the current process in kilobytes
+
+    :return: high-water mark of the resident set size since the process
+    started or since it was last reset by reset_peak_memory
+    """
+    peak = process_status('VmHWM')
+    if peak is not None:
+        return peak
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin': # reported in bytes rather than kilobytes
+        peak = peak / 1024
+
+    return peak
+
+def measure_block(function, *args):
+    """ Runs a single block of the pipeline and measures it
+
+    The high-water mark is reset before the block where the platform allows,
+    so 'peak_memory' is the peak reached during the block itself. Otherwise
+    it is the process' lifetime peak and 'memory_growth' only shows blocks
+    that raised it.
+
+    :param function: function implementing the block
+    :param args: arguments passed to the function
+    :return: tuple containing the function's result and a dictionary of its
+    'wall_time' and 'cpu_time' in seconds, its 'peak_memory' and the
+    'memory_growth' of that peak over the memory resident before the block in
+    kilobytes
+    """
+    if reset_peak_memory():
+        memory_before = process_status('VmRSS')
+    else:
+        memory_before = peak_memory()
+    cpu_before = sum(os.times()[:2])
+    wall_before = timeit.default_timer()
+
+    result = function(*args)
+
+    wall_time = timeit.default_timer() - wall_before
+    cpu_time = sum(os.times()[:2]) - cpu_before
+    peak_after = peak_memory()
+
+    return (result, {
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+        'peak_memory': peak_after,
+        'memory_growth': peak_after - memory_before
+    })
+
+"""Begin pipeline functions"""
+def run_blocks(data_file, a=DEFAULT_A, b=DEFAULT_B, functions=baseline):
+    """ Runs every phase of the pipeline once and benchmarks each of them
+
+    :param data_file: string representing path to ibrl dataset
+    :param a: a parameter used in calculating ellipsoid parameters
+    :param b: b parameter used in calculating ellipsoid parameters
+    :param functions: module implementing the baseline functions
+    :return: block_benchmarks, dictionary mapping each phase to its
+    measurements, the number of 'rows' it processed and its 'rows_per_second'
+    """
+    block_benchmarks = {}
+
+    def record(phase, function, *args):
+        result, block_benchmarks[phase] = measure_block(function, *args)
+        return result
+
+    def count(phase, rows):
+        wall_time = block_benchmarks[phase]['wall_time']
+        block_benchmarks[phase]['rows'] = rows
+        block_benchmarks[phase]['rows_per_second'] = rows / wall_time if wall_time else None
+
+    measurements = record('ingest', functions.read_ibrl_data, data_file)
+    readings = sum(sensor_readings.shape[1] for sensor_readings in measurements.values())
+    count('ingest', readings)
+
+    shuffled_measurements = record('randomize', functions.randomize_readings, measurements)
+    count('randomize', readings)
+
+    differences, lookup_table = record('differences', functions.generate_differences,
+                                       shuffled_measurements)
+    count('differences', readings)
+    difference_count = sum(sensor_readings.shape[1] for sensor_readings in differences.values())
+
+    thetas = record('orientation', lambda: {
+        sensor: functions.calculate_ellipsoid_orientation(sensor_readings)
+        for (sensor, sensor_readings) in differences.iteritems()})
+    count('orientation', difference_count)
+
+    ellipsoid_parameters = record('ellipsoid', lambda: {
+        sensor: functions.generate_ellipsoid(sensor_readings, a, b, thetas[sensor])
+        for (sensor, sensor_readings) in differences.iteritems()})
+    count('ellipsoid', difference_count)
+
+    regional_ellipsoid = record('regional', functions.generate_regional_ellipsoid_parameters,
+                                ellipsoid_parameters)
+    count('regional', len(ellipsoid_parameters))
+
+    record('detection', functions.inverse_transformation, differences, regional_ellipsoid)
+    count('detection', difference_count)
+
+    return block_benchmarks
+
+# Run by a cold trial's fresh interpreter, printing its block_benchmarks as JSON
+COLD_TRIAL = """import json, sys
+sys.path[:0] = %r
+import benchmark
+print json.dumps(benchmark.run_blocks(%r, %r, %r, __import__(%r)))
+"""
+
+def run_cold_trial(data_file, a=DEFAULT_A, b=DEFAULT_B, functions=baseline):
+    """ Runs the pipeline once in a new Python interpreter, which shares no
+    imports, allocator state or memory with the current process
+
+    :param data_file: string representing path to ibrl dataset
+    :param a: a parameter used in calculating ellipsoid parameters
+    :param b: b parameter used in calculating ellipsoid parameters
+    :param functions: module implementing the baseline functions
+    :return: block_benchmarks as returned by run_blocks
+    """
+    paths = [os.path.dirname(os.path.abspath(module.__file__))
+             for module in (sys.modules[__name__], functions)]
+    output = subprocess.check_output([sys.executable, '-c', COLD_TRIAL % (
+        paths, os.path.abspath(data_file), a, b, functions.__name__)])
+
+    return json.loads(output.splitlines()[-1])
+
+def run_trials(data_file, trials=3, cold=False, a=DEFAULT_A, b=DEFAULT_B, functions=baseline):
+    """ Benchmarks the pipeline over repeated trials
+
+    Warm trials run in the current process after an untimed warm-up run, so
+    caches, imports and the allocator are primed. Cold trials each run in a
+    new Python interpreter, as run_cold_trial; only the OS page cache of the
+    dataset is still shared between them.
+
+    :param data_file: string representing path to ibrl dataset
+    :param trials: number of timed trials
+    :param cold: whether each trial runs in a fresh process
+    :param a: a parameter used in calculating ellipsoid parameters
+    :param b: b parameter used in calculating ellipsoid parameters
+    :param functions: module implementing the baseline functions
+    :return: list of the block_benchmarks of each trial
+    """
+    if cold:
+        return [run_cold_trial(data_file, a, b, functions) for trial in range(trials)]
+
+    run_blocks(data_file, a, b, functions) # warm-up
+    return [run_blocks(data_file, a, b, functions) for trial in range(trials)]
+
+"""Begin report functions"""
+def benchmark_report(trial_benchmarks, data_file=None, cold=False):
+    """ Combines the block_benchmarks of repeated trials into a composite report
+
+    :param trial_benchmarks: list of block_benchmarks as returned by run_trials
+    :param data_file: string representing path to the benchmarked dataset
+    :param cold: whether the trials were cold runs
+    :return: dictionary containing the run's settings, the min/mean/max of
+    every measurement of each block and the totals over all blocks
+    """
+    blocks = {}
+    for phase in PHASES:
+        runs = [trial[phase] for trial in trial_benchmarks if phase in trial]
+        if not runs:
+            continue
+        blocks[phase] = {'rows': runs[0]['rows']}
+        for measurement in ('wall_time', 'cpu_time', 'peak_memory', 'memory_growth', 'rows_per_second'):
+            values = [run[measurement] for run in runs if run[measurement] is not None]
+            if values:
+                blocks[phase][measurement] = {
+                    'min': min(values),
+                    'mean': sum(values) / float(len(values)),
+                    'max': max(values)
+                }
+
+    return {
+        'data_file': data_file,
+        'mode': 'cold' if cold else 'warm',
+        'trials': len(trial_benchmarks),
+        'python': platform.python_version(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'blocks': blocks,
+        'total': {
+            'wall_time': sum(blocks[phase]['wall_time']['mean'] for phase in blocks),
+            'cpu_time': sum(blocks[phase]['cpu_time']['mean'] for phase in blocks),
+            'peak_memory': max(blocks[phase]['peak_memory']['max'] for phase in blocks) if blocks else 0
+        },
+        'block_benchmarks': trial_benchmarks
+    }
+
+def write_benchmark_report(report, output_file):
+    """ Writes a benchmark report to a JSON file
+
+    :param report: dictionary as returned by benchmark_report
+    :param output_file: string representing path of the JSON file
+    """
+    with open(output_file, 'w') as fp:
+        json.dump(report, fp, indent=2, sort_keys=True, default=float)
+
+def format_benchmark_table(report):
+    """ Formats the mean measurements of a benchmark report as a table
+
+    :param report: dictionary as returned by benchmark_report
+    :return: string containing the summary table
+    """
+    header = '%-12s %12s %10s %10s %12s %14s' % (
+        'block', 'rows', 'wall (s)', 'cpu (s)', 'peak (KB)', 'rows/s')
+    lines = [header, '-' * len(header)]
+
+    for phase in PHASES:
+        if phase not in report['blocks']:
+            continue
+        block = report['blocks'][phase]
+        rows_per_second = block.get('rows_per_second', {}).get('mean', 0)
+        lines.append('%-12s %12d %10.4f %10.4f %12d %14.0f' % (
+            phase, block['rows'], block['wall_time']['mean'], block['cpu_time']['mean'],
+            block['peak_memory']['max'], rows_per_second))
+
+    lines.append('-' * len(header))
+    lines.append('%-12s %12s %10.4f %10.4f %12d' % (
+        'total', '', report['total']['wall_time'], report['total']['cpu_time'],
+        report['total']['peak_memory']))
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the blocks of the anomaly detection pipeline')
+    parser.add_argument('data_file', help='path to an ibrl dataset')
+    parser.add_argument('--trials', type=int, default=3, help='number of timed trials')
+    parser.add_argument('--cold', action='store_true', help='run every trial in a fresh process')
+    parser.add_argument('-a', type=float, default=DEFAULT_A, help='a parameter of the ellipsoids')
+    parser.add_argument('-b', type=float, default=DEFAULT_B, help='b parameter of the ellipsoids')
+    parser.add_argument('--output', default='benchmark_report.json', help='path of the JSON report')
+    args = parser.parse_args()
+
+    report = benchmark_report(run_trials(args.data_file, args.trials, args.cold, args.a, args.b),
+                              args.data_file, args.cold)
+    write_benchmark_report(report, args.output)
+
+    print format_benchmark_table(report)
+    print "Report written to %s" % args.output
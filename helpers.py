@@ -38,31 +38,44 @@ def read_ibrl_data(data_file):
     return measurements
 
 """Begin data transformation functions"""
-def randomize_readings(dictionary):
+def randomize_readings(dictionary, permutations=None):
     """For each list mapped to a sensor, randomize the tuples within and returns the resulting dictionary
 
     :param dictionary: Dictionary of sensors whose lists will be shuffled
+    :param permutations: optional dictionary filled with the int32 array of raw indices of each sensor's shuffled
+    readings
     :return: Dictionary mapping sensors to randomized lists of temp. and humidity readings
     """
-    import random
     for sensor in dictionary:
-        random.shuffle(dictionary[sensor])
+        readings = dictionary[sensor]
+        order = range(len(readings))
+        random.shuffle(order) # draws the same shuffle as shuffling the readings themselves
+        readings[:] = [readings[index] for index in order]
+        if permutations is not None:
+            permutations[sensor] = numpy.array(order, numpy.int32)
 
     return dictionary
 
-def generate_differences(dictionary):
+def generate_differences(dictionary, permutations=None):
     """Generates a dictionary that maps each sensor to a list of length n and containing tuples of temp. and humidity
     data to a new list of tuples size n-1 where each tuple is the difference between the original list at index n+1 and
     the original list at index n
 
     :param dictionary: dictionary mapping sensors to original tuples of temp. and humidity data.
+    :param permutations: optional dictionary mapping sensors to the permutations filled in by randomize_readings
     :return: tuple containing dictionary mapping sensors to new list of tuple differences and a lookup table containing
-    back references to the raw measurements used to calculate the new measurements in the differences dict
+    back references to the raw measurements used to calculate the new measurements in the differences dict; as in
+    baseline.generate_differences difference i was calculated from raw readings lookup_table[sensor][i] and
+    lookup_table[sensor][i + 1]
     """
     differences = {}
     lookup_table = {}
 
     for sensor in dictionary:
+        if permutations is not None:
+            lookup_table[sensor] = numpy.asarray(permutations[sensor], numpy.int32)
+        else:
+            lookup_table[sensor] = numpy.arange(len(dictionary[sensor]), dtype=numpy.int32)
         for index in range(len(dictionary[sensor]) - 1):
             difference_tuple =  (
                 dictionary[sensor][index + 1][0] - dictionary[sensor][index][0],
@@ -83,11 +96,10 @@ def standardize_readings(sensor_readings):
     """
     for sensor, readings in sensor_readings.iteritems():
         # Calculate temperature and humidity means
-        temp_mean = numpy.mean([reading[0] for reading in readings])
-        humidity_mean = numpy.mean([reading[1] for reading in readings])
+        temp_mean = calculate_temp_mean(readings)
+        humidity_mean = calculate_humidity_mean(readings)
         # Calculate tempeature and humidity standard deviations
-        temp_sd = numpy.std([reading[0] for reading in readings])
-        humidity_sd = numpy.std([reading[0] for reading in readings])
+        temp_sd, humidity_sd = calculate_std_dev(readings)
 
         standardized_readings = []
 
@@ -286,6 +298,16 @@ def calculate_temp_mean(sensor_readings):
 
     return numpy.mean([reading[0] for reading in sensor_readings])
 
+def calculate_std_dev(sensor_readings):
+    """Calculates the std. dev. of the temp. and humidity of a given sensors list of readings
+
+    :param list: list of tuples representing sensor readings (temp., humidity)
+    :return: tuple containing the temp. and humidity std. devs.
+    """
+
+    return (numpy.std([reading[0] for reading in sensor_readings]),
+            numpy.std([reading[1] for reading in sensor_readings]))
+
 """Begin incomplete functions"""
 def model_ellipsoid(sensor_data):
     """Generates and returns a three tuple of ellipsoid parameter for a single sensor
@@ -295,23 +317,26 @@ def model_ellipsoid(sensor_data):
     """
     pass
 
-def inverse_transformation(lookup_table, aggregate_ellipsoid):
+def inverse_transformation(differences, aggregate_ellipsoid):
     """ Generates a tuple of two dicts mapping sensors to anomalies and true measurements
 
-    :param lookup_table: dictionary mapping difference readings to their raw measurements
+    :param differences: dictionary mapping sensors to lists of (temperature,
+    humidity) successive differences
     :param aggregate_ellipsoid: 3-tuple containing aggregate ellipsoid parameters
     :return: tuple containing two dicts, one of true measurements and another of anomalies
-    each mapped to their original sensors
+    each mapping the original sensors to lists of their differences
     """
     true_measurements = {}
     anomalies = {}
 
-    for sensor in lookup_table:
-        for reading in sensor:
-            if is_anomaly(reading):
-                anomalies[sensor] = reading
+    for sensor in differences:
+        true_measurements[sensor] = []
+        anomalies[sensor] = []
+        for reading in differences[sensor]:
+            if is_anomaly(reading, aggregate_ellipsoid):
+                anomalies[sensor].append(reading)
             else:
-                true_measurements[sensor] = reading
+                true_measurements[sensor].append(reading)
 
     return (true_measurements, anomalies)
 
@@ -322,4 +347,11 @@ def is_anomaly(reading, aggregate_ellipsoid):
     :param aggregate_ellipsoid: parameters for aggregate ellipsoid
     :return: True if an anomaly, else False
     """
-    pass
\ No newline at end of file
+    a, b, theta = aggregate_ellipsoid
+    temp, humidity = reading
+
+    # Rotate the reading onto the axes of the ellipsoid
+    u = temp * math.cos(theta) + humidity * math.sin(theta)
+    v = humidity * math.cos(theta) - temp * math.sin(theta)
+
+    return (math.pow(u, 2) / math.pow(a, 2)) + (math.pow(v, 2) / math.pow(b, 2)) > 1
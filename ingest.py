@@ -0,0 +1,741 @@
+""" This file contains the input functions used to read sensor datasets into
+the columnar form consumed by the baseline functions.
+
+Rather than splitting each line in Python, the file is read in large blocks
+and the row and field boundaries of every block are located with NumPy. The
+numeric fields are then parsed in bulk, by digit arithmetic over the
+characters of each field, into one contiguous array grouped by sensor, with
+a sensor id column and per-sensor offsets into it. The epoch and
+timestamp of every reading are kept alongside in the same order, as int32 and
+float64 columns. They are metadata only: a reading whose epoch or timestamp
+cannot be parsed is kept with MISSING_EPOCH or NaN in their place, and date
+timestamps such as "2004-02-28 00:59:16.02785" are read as UTC epoch seconds.
+
+The file can also be memory-mapped, in which case the blocks are views of
+the mapped pages rather than strings read from it, and processes reading the
+same dataset share its pages in the OS page cache. The parser never copies a
+block, it only gathers the characters of one field of its rows at a time.
+"""
+
+import calendar
+import collections
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+
+import numpy
+
+
+IBRL_FIELD_COUNT = 5 # temp., humidity, epoch, sensor id, timestamp
+BLOCK_SIZE = 1 << 20 # bytes read from the dataset per parsed block, bounding the parse temporaries
+CACHE_SUFFIX = '.npcache' # binary cache directory kept next to a dataset
+CACHE_ARRAYS = ('readings', 'sensor_id', 'epoch', 'timestamp', 'sensors', 'offsets')
+CACHE_COUNTS = ('row_count', 'bad_count', 'bad_time_count')
+
+MISSING_EPOCH = numpy.iinfo(numpy.int32).min # epoch of readings whose epoch field is unusable
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S' # date timestamps, optionally followed by fractional seconds
+
+NEWLINE = ord('\n')
+COMMA = ord(',')
+CARRIAGE_RETURN = ord('\r')
+ZERO = ord('0')
+MINUS = ord('-')
+POINT = ord('.')
+
+# Plain decimals of up to this many characters are parsed by digit arithmetic,
+# their digits forming a float64 mantissa that is exact below 2 ** 53
+MAX_PLAIN_WIDTH = 17
+MAX_MANTISSA = 2.0 ** 53
+
+# Layout of date timestamps, "YYYY-MM-DD HH:MM:SS" optionally followed by a
+# fraction: the columns of the digits of each part and of the separators
+DATE_WIDTH = 19
+DATE_PARTS = ((0, 4), (5, 7), (8, 10), (11, 13), (14, 16), (17, 19)) # year to second
+DATE_SEPARATORS = ((4, '-'), (7, '-'), (10, ' '), (13, ':'), (16, ':'))
+DAYS_IN_MONTH = numpy.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+
+"""Begin block parsing functions"""
+def parse_ibrl_block(block):
+    """Parses a block of complete IBRL rows into a 5xN array of temperature,
+    humidity, epoch, sensor id and timestamp values
+
+    Rows that do not contain exactly five fields are counted and dropped just
+    as read_ibrl_data has always done. A malformed temperature, humidity or
+    sensor id raises ValueError, while an epoch that is not an int32 integer
+    becomes MISSING_EPOCH and a timestamp that is neither a number nor a date
+    becomes NaN, the reading itself is kept.
+
+    :param block: string or uint8 array of complete rows read from an ibrl dataset
+    :return: tuple containing the 5xN float array of parsed values, the number
+    of rows in the block and the number of incomplete rows dropped
+    """
+    buf = numpy.frombuffer(block, dtype=numpy.uint8)
+    starts, ends, row_count, bad_count = locate_ibrl_fields(buf)
+
+    values = numpy.empty((IBRL_FIELD_COUNT, starts.shape[1]), float)
+    values[0] = parse_ibrl_field(buf, starts[0], ends[0])
+    values[1] = parse_ibrl_field(buf, starts[1], ends[1])
+    values[2] = parse_ibrl_epochs(buf, starts[2], ends[2])
+    values[3] = parse_ibrl_field(buf, starts[3], ends[3])
+    values[4] = parse_ibrl_timestamps(buf, starts[4], ends[4])
+
+    return (values, row_count, bad_count)
+
+def locate_ibrl_fields(buf):
+    """Locates the fields of the complete rows of a block
+
+    A carriage return ending a row is left out of its last field.
+
+    :param buf: uint8 array of the bytes of complete rows
+    :return: tuple containing 5xN arrays of the offsets of the first byte of
+    every field of the complete rows and of the offsets just past their last
+    bytes, the number of rows in the block and the number of incomplete rows
+    """
+    separators = numpy.flatnonzero((buf == COMMA) | (buf == NEWLINE))
+    row_ends = buf[separators] == NEWLINE
+    if len(buf) and buf[-1] != NEWLINE: # the final row of a file may not be newline terminated
+        separators = numpy.append(separators, len(buf))
+        row_ends = numpy.append(row_ends, True)
+    row_count = int(numpy.count_nonzero(row_ends))
+
+    if (len(separators) == IBRL_FIELD_COUNT * row_count
+            and row_ends[IBRL_FIELD_COUNT - 1::IBRL_FIELD_COUNT].all()):
+        complete = None # every row has five fields
+        bad_count = 0
+    else:
+        row_of = numpy.cumsum(row_ends) - row_ends
+        complete = numpy.bincount(row_of, minlength=row_count) == IBRL_FIELD_COUNT
+        bad_count = row_count - int(numpy.count_nonzero(complete))
+
+    row_starts = numpy.empty(row_count, numpy.intp)
+    row_starts[:1] = 0
+    row_starts[1:] = separators[row_ends][:-1] + 1
+    if complete is not None:
+        separators = separators[complete[row_of]]
+        row_starts = row_starts[complete]
+
+    ends = numpy.ascontiguousarray(separators.reshape(-1, IBRL_FIELD_COUNT).T)
+    starts = numpy.empty_like(ends)
+    starts[0] = row_starts
+    starts[1:] = ends[:-1] + 1
+
+    last = ends[-1]
+    last -= (last > starts[-1]) & (buf[last - 1] == CARRIAGE_RETURN)
+
+    return (starts, ends, row_count, bad_count)
+
+def parse_ibrl_field(buf, starts, ends, convert=None):
+    """Parses a field of every complete row of a block
+
+    Plain decimals such as "-19.9884" or "1077963316" are converted by digit
+    arithmetic, see parse_plain_decimals, over the fields of each length at a
+    time. Other fields, e.g. " 20.5" or "1e3", are converted one at a time.
+
+    :param buf: uint8 array of the bytes of a block
+    :param starts: offsets of the first byte of the field in every row
+    :param ends: offsets just past the last byte of the field in every row
+    :param convert: optional function converting the string of a field that
+    is not a plain decimal, by default float() raising ValueError
+    :return: float array of the values of the field
+    """
+    values = numpy.empty(len(starts), float)
+    plain = numpy.zeros(len(starts), bool)
+    lengths = ends - starts
+
+    for length in numpy.flatnonzero(numpy.bincount(lengths)[1:MAX_PLAIN_WIDTH + 1]) + 1:
+        rows = numpy.flatnonzero(lengths == length)
+        # Rows of the block's bytes starting at every offset, viewed without a copy
+        windows = numpy.lib.stride_tricks.as_strided(buf, (len(buf) - length + 1, length), (1, 1))
+        values[rows], plain[rows] = parse_plain_decimals(windows[starts[rows]])
+
+    for i in numpy.flatnonzero(~plain).tolist():
+        field = buf[starts[i]:ends[i]].tostring()
+        values[i] = parse_number(field) if convert is None else convert(field)
+
+    return values
+
+def parse_plain_decimals(characters):
+    """Converts fields of equal length that are plain decimals by digit
+    arithmetic
+
+    The digits of every field form an integer mantissa, the product of the
+    matrix of digits with their place values. The mantissa is exact below
+    2 ** 53, so dividing it by the exact power of ten of the decimal places
+    gives the correctly rounded value float() would.
+
+    :param characters: NxW uint8 matrix of the characters of the fields,
+    changed in place
+    :return: tuple containing the float array of the values and the boolean
+    array of the fields that are plain decimals, whose values are valid
+    """
+    count, width = characters.shape
+    negative = characters[:, 0] == MINUS
+    if negative.any():
+        characters[negative, 0] = ZERO
+
+    # The place value of a point is 0, so its character never needs clearing
+    points = characters == POINT
+    digits = characters - ZERO
+    plain = (digits <= 9) | points
+    plain = numpy.ones(count, bool) if plain.all() else plain.all(axis=1)
+
+    # Place of the point from the right, -1 without one, and the rows sharing it
+    point_count = numpy.count_nonzero(points)
+    point_column = points[0].argmax()
+    if not point_count:
+        point_places = numpy.full(count, -1)
+        groups = [(-1, slice(None))]
+    elif point_count == count and points[:, point_column].all(): # all in the same column
+        point_places = numpy.full(count, width - 1 - point_column)
+        groups = [(point_places[0], slice(None))]
+    else:
+        point_count = points.sum(axis=1)
+        plain &= point_count <= 1
+        point_places = numpy.where(point_count, width - 1 - points.argmax(axis=1), -1)
+        groups = [(point_place, numpy.flatnonzero(point_places == point_place))
+                  for point_place in numpy.unique(point_places).tolist()]
+    if width <= 2: # a sign or a point alone is not a number
+        plain &= width > negative + (point_places >= 0)
+
+    values = numpy.empty(count, float)
+    places = numpy.arange(width - 1, -1, -1)
+    for point_place, rows in groups:
+        weights = 10.0 ** (places - ((places > point_place) & (point_place >= 0)))
+        weights[places == point_place] = 0
+        mantissas = digits[rows].astype(float).dot(weights)
+        plain[rows] &= mantissas < MAX_MANTISSA
+        values[rows] = mantissas / 10.0 ** max(point_place, 0)
+
+    values[negative] *= -1
+
+    return (values, plain)
+
+def parse_number(field):
+    """Converts a numeric field, raising ValueError for a malformed one """
+    try:
+        return float(field)
+    except ValueError:
+        raise ValueError("Malformed numeric field in IBRL data block")
+
+def parse_optional_number(field):
+    """Converts a numeric field, returning NaN for a malformed one """
+    try:
+        return float(field)
+    except ValueError:
+        return float('nan')
+
+def parse_ibrl_epochs(buf, starts, ends):
+    """Parses the epoch field of every complete row of a block
+
+    :param buf: uint8 array of the bytes of a block
+    :param starts: offsets of the first byte of the field in every row
+    :param ends: offsets just past the last byte of the field in every row
+    :return: int32 array of the epochs, MISSING_EPOCH where an epoch is not
+    an int32 integer
+    """
+    epoch = parse_ibrl_field(buf, starts, ends, parse_optional_number)
+    valid = (epoch == numpy.floor(epoch)) & (numpy.abs(epoch) <= numpy.iinfo(numpy.int32).max)
+    epoch[~valid] = MISSING_EPOCH
+
+    return epoch.astype(numpy.int32)
+
+def parse_ibrl_timestamps(buf, starts, ends):
+    """Parses the timestamp field of every complete row of a block
+
+    Timestamps given in seconds are parsed by parse_ibrl_field and those in
+    the layout of DATE_FORMAT by parse_ibrl_dates.
+
+    :param buf: uint8 array of the bytes of a block
+    :param starts: offsets of the first byte of the field in every row
+    :param ends: offsets just past the last byte of the field in every row
+    :return: float array of the timestamps as returned by parse_timestamp
+    """
+    dates = ends - starts >= DATE_WIDTH
+    dates[dates] = buf[starts[dates] + DATE_SEPARATORS[0][0]] == ord(DATE_SEPARATORS[0][1])
+    if not dates.any():
+        return parse_ibrl_field(buf, starts, ends, parse_timestamp)
+
+    timestamps = numpy.empty(len(starts), float)
+    timestamps[~dates] = parse_ibrl_field(buf, starts[~dates], ends[~dates], parse_timestamp)
+    timestamps[dates] = parse_ibrl_dates(buf, starts[dates], ends[dates])
+
+    return timestamps
+
+def parse_ibrl_dates(buf, starts, ends):
+    """Parses date timestamps into UTC epoch seconds
+
+    Dates are converted by arithmetic over the digits of their fixed layout,
+    fields that do not match it by parse_timestamp one at a time.
+
+    :param buf: uint8 array of the bytes of a block
+    :param starts: offsets of the first byte of every date, each at least
+    DATE_WIDTH bytes long
+    :param ends: offsets just past the last byte of every date
+    :return: float array of the timestamps as returned by parse_timestamp
+    """
+    characters = buf[starts[:, numpy.newaxis] + numpy.arange(DATE_WIDTH)]
+    digits = characters.astype(numpy.int64) - ZERO
+
+    valid = numpy.ones(len(starts), bool)
+    for column, separator in DATE_SEPARATORS:
+        valid &= characters[:, column] == ord(separator)
+        digits[:, column] = 0
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+
+    year, month, day, hour, minute, second = [
+        digits[:, first:last].dot(10 ** numpy.arange(last - first - 1, -1, -1))
+        for (first, last) in DATE_PARTS]
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    valid &= (month >= 1) & (month <= 12) & (hour <= 23) & (minute <= 59) & (second <= 61)
+    month = numpy.clip(month, 1, 12)
+    valid &= (day >= 1) & (day <= DAYS_IN_MONTH[month - 1] + (leap & (month == 2)))
+
+    # Days since 1970-01-01 of the proleptic Gregorian calendar, counting
+    # years from March so leap days fall at their end
+    years = year - (month <= 2)
+    eras = years // 400
+    year_of_era = years - 400 * eras
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    days = (eras * 146097 + 365 * year_of_era + year_of_era // 4 - year_of_era // 100
+            + day_of_year - 719468)
+    timestamps = (86400 * days + 3600 * hour + 60 * minute + second).astype(float)
+
+    fractions = ends - starts > DATE_WIDTH
+    if fractions.any():
+        fraction_starts = starts[fractions] + DATE_WIDTH
+        valid[fractions] &= buf[fraction_starts] == POINT
+        timestamps[fractions] += parse_ibrl_field(buf, fraction_starts, ends[fractions],
+                                                  parse_optional_number)
+        valid &= ~numpy.isnan(timestamps)
+
+    for i in numpy.flatnonzero(~valid).tolist():
+        timestamps[i] = parse_timestamp(buf[starts[i]:ends[i]].tostring())
+
+    return timestamps
+
+def parse_timestamp(field):
+    """Parses a timestamp field given either in seconds or as a date
+
+    :param field: string of the timestamp field
+    :return: seconds since the epoch, dates being read as UTC, or NaN if the
+    field is neither
+    """
+    try:
+        return float(field)
+    except ValueError:
+        pass
+
+    date, _, fraction = field.strip().partition('.')
+    try:
+        seconds = calendar.timegm(time.strptime(date, DATE_FORMAT))
+        return seconds + (float('0.' + fraction) if fraction else 0.0)
+    except ValueError:
+        return float('nan')
+
+def iter_ibrl_chunks(data_file, block_size=BLOCK_SIZE):
+    """Reads an IBRL dataset in blocks of whole rows
+
+    :param data_file: string representing path to ibrl dataset
+    :param block_size: approximate number of bytes per block
+    :return: generator of strings of whole rows
+    """
+    with open(data_file, 'rb') as fp:
+        remainder = b''
+        while True:
+            chunk = fp.read(block_size)
+            if not chunk:
+                break
+            block = remainder + chunk
+            last_newline = block.rfind(b'\n')
+            if last_newline < 0: # row longer than a block, keep reading
+                remainder = block
+                continue
+            remainder = block[last_newline + 1:]
+            yield block[:last_newline + 1]
+
+        if remainder:
+            yield remainder
+
+def iter_mapped_ibrl_chunks(data_file, block_size=BLOCK_SIZE):
+    """Memory-maps an IBRL dataset and yields its blocks of whole rows
+
+    Blocks are uint8 views of the mapped file rather than strings read from
+    it. A view must not be used once the next block is requested, the mapping
+    is closed after the last one.
+
+    :param data_file: string representing path to ibrl dataset
+    :param block_size: approximate number of bytes per block
+    :return: generator of uint8 arrays of whole rows
+    """
+    with open(data_file, 'rb') as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if not size: # empty files cannot be mapped
+            return
+        mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buf = None
+    try:
+        buf = numpy.frombuffer(mapped, dtype=numpy.uint8)
+        start = 0
+        while start < size:
+            end = min(start + block_size, size)
+            if end < size:
+                last_newline = mapped.rfind(b'\n', start, end)
+                if last_newline < 0: # row longer than a block, extend to its end
+                    last_newline = mapped.find(b'\n', end)
+                end = size if last_newline < 0 else last_newline + 1
+            yield buf[start:end]
+            start = end
+    finally:
+        del buf # views must be released before the mapping is closed
+        mapped.close()
+
+def iter_ibrl_blocks(data_file, block_size=BLOCK_SIZE):
+    """Reads an IBRL dataset in blocks of whole rows and yields the parsed
+    values of each one
+
+    :param data_file: string representing path to ibrl dataset
+    :param block_size: approximate number of bytes parsed per block
+    :return: generator of (values, row_count, bad_count) tuples as returned by
+    parse_ibrl_block
+    """
+    for chunk in iter_ibrl_chunks(data_file, block_size):
+        yield parse_ibrl_block(chunk)
+
+def iter_mapped_ibrl_blocks(data_file, block_size=BLOCK_SIZE):
+    """Memory-maps an IBRL dataset and yields the parsed values of each block
+    of whole rows
+
+    :param data_file: string representing path to ibrl dataset
+    :param block_size: approximate number of bytes parsed per block
+    :return: generator of (values, row_count, bad_count) tuples as returned by
+    parse_ibrl_block
+    """
+    for chunk in iter_mapped_ibrl_chunks(data_file, block_size):
+        yield parse_ibrl_block(chunk)
+
+"""Begin columnar dataset functions"""
+def group_by_sensor(values, row_count=0, bad_count=0):
+    """Groups parsed IBRL values by sensor
+
+    Readings keep their original file order within each sensor.
+
+    :param values: 5xN array of temp., humidity, epoch, sensor id and
+    timestamp values as returned by parse_ibrl_block
+    :param row_count: number of rows read from the source dataset
+    :param bad_count: number of incomplete rows dropped from the source dataset
+    :return: dictionary containing the 2xN 'readings' array grouped by sensor,
+    the 'sensor_id', 'epoch' and 'timestamp' columns in the same order, the
+    unique 'sensors' and their 'offsets' into the readings as well as the row
+    counts, 'bad_time_count' being the number of readings kept without a
+    usable epoch or timestamp
+    """
+    sensor_column = sensor_ids(values[3])
+    order = numpy.argsort(sensor_column, kind='mergesort')
+    sensor_column = sensor_column[order]
+
+    boundaries = numpy.flatnonzero(sensor_column[1:] != sensor_column[:-1]) + 1
+    offsets = numpy.concatenate(([0], boundaries, [len(sensor_column)])) if len(sensor_column) \
+        else numpy.zeros(1, int)
+
+    return grouped_columns(values[:2, order], sensor_column, values[2, order].astype(numpy.int32),
+                           values[4, order], offsets, row_count, bad_count)
+
+def sensor_ids(values):
+    """Converts parsed sensor ids to int32, raising ValueError unless they
+    are all integers """
+    sensor_column = values.astype(numpy.int32)
+    if not numpy.array_equal(sensor_column, values):
+        raise ValueError("IBRL sensor ids must be integers")
+
+    return sensor_column
+
+def grouped_columns(readings, sensor_column, epoch, timestamp, offsets, row_count, bad_count):
+    """Returns the dictionary of a dataset's columns grouped by sensor
+
+    :param readings: 2xN array of temp. and humidity readings grouped by sensor
+    :param sensor_column: int32 sensor id of every reading
+    :param epoch: int32 epoch of every reading
+    :param timestamp: timestamp of every reading
+    :param offsets: offsets of the readings of every sensor, and of their end
+    :param row_count: number of rows read from the source dataset
+    :param bad_count: number of incomplete rows dropped from the source dataset
+    :return: dictionary of columns as returned by group_by_sensor
+    """
+    bad_time_count = int(numpy.count_nonzero((epoch == MISSING_EPOCH) | numpy.isnan(timestamp)))
+
+    return {
+        'readings': readings,
+        'sensor_id': sensor_column,
+        'epoch': epoch,
+        'timestamp': timestamp,
+        'sensors': sensor_column[offsets[:-1]],
+        'offsets': offsets,
+        'row_count': row_count,
+        'bad_count': bad_count,
+        'bad_time_count': bad_time_count
+    }
+
+def count_sensor_readings(ids, sensors, counts):
+    """Adds the readings of a block to the number of readings of every sensor
+
+    :param ids: int32 sensor ids of the readings of the block
+    :param sensors: sorted array of the sensors counted so far
+    :param counts: number of readings of each of those sensors
+    :return: tuple containing the sorted sensors and their counts
+    """
+    index = numpy.searchsorted(sensors, ids)
+    if not (len(sensors) and numpy.array_equal(sensors[numpy.minimum(index, len(sensors) - 1)], ids)):
+        merged = numpy.union1d(sensors, ids).astype(numpy.int32)
+        merged_counts = numpy.zeros(len(merged), int)
+        merged_counts[numpy.searchsorted(merged, sensors)] = counts
+        sensors, counts = merged, merged_counts
+        index = numpy.searchsorted(sensors, ids)
+
+    return (sensors, counts + numpy.bincount(index, minlength=len(sensors)))
+
+def block_destinations(index, filled):
+    """Returns the positions of the readings of a block in the grouped columns
+
+    :param index: index of the sensor of every reading of the block
+    :param filled: position of the next reading of every sensor, advanced
+    past the readings of the block
+    :return: array of the position of every reading, in file order within
+    each sensor
+    """
+    order = numpy.argsort(index, kind='mergesort')
+    counts = numpy.bincount(index, minlength=len(filled))
+    shifts = filled - (numpy.cumsum(counts) - counts)
+
+    destinations = numpy.empty_like(order)
+    destinations[order] = numpy.arange(len(order)) + shifts[index[order]]
+    filled += counts
+
+    return destinations
+
+def read_ibrl_columns(data_file, block_size=BLOCK_SIZE, mapped=False):
+    """Reads IBRL data from file into one contiguous array of readings grouped
+    by the sensor that collected them
+
+    The dataset is read twice. The first pass parses only the sensor ids,
+    counting the readings of every sensor, so the columns can be allocated at
+    their final size. The second parses the remaining fields of each block
+    straight into the positions of its readings in those columns. Besides the
+    columns only the int32 sensor ids of the readings and one block's parse
+    temporaries are held, and no sort of the whole dataset is needed.
+
+    :param data_file: string representing path to ibrl dataset
+    :param block_size: approximate number of bytes parsed per block
+    :param mapped: whether the file is memory-mapped rather than read
+    :return: dictionary of columns as returned by group_by_sensor
+    """
+    iter_chunks = iter_mapped_ibrl_chunks if mapped else iter_ibrl_chunks
+
+    # First pass: the sensor ids of every block
+    block_ids = collections.deque()
+    sensors = numpy.empty(0, numpy.int32)
+    counts = numpy.empty(0, int)
+    row_count = 0
+    bad_count = 0
+    for chunk in iter_chunks(data_file, block_size):
+        buf = numpy.frombuffer(chunk, dtype=numpy.uint8)
+        starts, ends, rows, bad = locate_ibrl_fields(buf)
+        ids = sensor_ids(parse_ibrl_field(buf, starts[3], ends[3]))
+        sensors, counts = count_sensor_readings(ids, sensors, counts)
+        block_ids.append(ids)
+        row_count = row_count + rows
+        bad_count = bad_count + bad
+        del buf, chunk # views of a mapped file must not outlive it
+
+    offsets = numpy.concatenate(([0], numpy.cumsum(counts)))
+    size = offsets[-1]
+    readings = numpy.empty((2, size), float)
+    epoch = numpy.empty(size, numpy.int32)
+    timestamp = numpy.empty(size, float)
+
+    # Second pass: the remaining fields, in place
+    filled = offsets[:-1].copy()
+    for chunk in iter_chunks(data_file, block_size):
+        buf = numpy.frombuffer(chunk, dtype=numpy.uint8)
+        starts, ends = locate_ibrl_fields(buf)[:2]
+        destinations = block_destinations(numpy.searchsorted(sensors, block_ids.popleft()), filled)
+        readings[0][destinations] = parse_ibrl_field(buf, starts[0], ends[0])
+        readings[1][destinations] = parse_ibrl_field(buf, starts[1], ends[1])
+        epoch[destinations] = parse_ibrl_epochs(buf, starts[2], ends[2])
+        timestamp[destinations] = parse_ibrl_timestamps(buf, starts[4], ends[4])
+        del buf, chunk
+
+    return grouped_columns(readings, numpy.repeat(sensors, counts), epoch, timestamp, offsets,
+                           row_count, bad_count)
+
+def columns_to_measurements(columns):
+    """Returns the dictionary of per-sensor 2xN arrays the baseline functions
+    expect from a columnar dataset
+
+    Each array is a view into the columnar readings, no data is copied.
+
+    :param columns: dictionary of columns as returned by read_ibrl_columns
+    :return: dictionary mapping sensor node to a 2D array of temp. and humidity
+    readings
+    """
+    readings = columns['readings']
+    offsets = columns['offsets']
+
+    return {str(sensor): readings[:, offsets[i]:offsets[i + 1]]
+            for (i, sensor) in enumerate(columns['sensors'])}
+
+"""Begin streaming functions"""
+def stream_ibrl_data(data_file, chunk_size=BLOCK_SIZE):
+    """Reads an IBRL dataset in fixed-size chunks and yields the readings of
+    each chunk grouped by sensor
+
+    Only one chunk is held in memory at a time, so datasets larger than the
+    available memory can be processed by consuming the batches as they arrive.
+
+    :param data_file: string representing path to ibrl dataset
+    :param chunk_size: approximate number of bytes read per chunk
+    :return: generator of tuples containing a dictionary mapping sensor node to
+    a 2D array of the chunk's temp. and humidity readings, the running total of
+    rows and the running total of incomplete rows
+    """
+    row_count = 0
+    bad_count = 0
+    for values, rows, bad in iter_ibrl_blocks(data_file, chunk_size):
+        row_count = row_count + rows
+        bad_count = bad_count + bad
+        yield (columns_to_measurements(group_by_sensor(values)), row_count, bad_count)
+
+"""Begin binary cache functions"""
+def file_signature(data_file, content_hash=True):
+    """Returns the size, modification time and optionally the SHA-1 hash of a
+    dataset's contents
+
+    :param data_file: string representing path to a dataset
+    :param content_hash: whether to hash the contents of the file
+    :return: dictionary containing the 'size', 'mtime' and 'sha1' of the file
+    """
+    stat = os.stat(data_file)
+    signature = {'size': stat.st_size, 'mtime': stat.st_mtime, 'sha1': None}
+
+    if content_hash:
+        sha1 = hashlib.sha1()
+        with open(data_file, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(BLOCK_SIZE), b''):
+                sha1.update(chunk)
+        signature['sha1'] = sha1.hexdigest()
+
+    return signature
+
+def cache_is_valid(data_file, cache_dir, required=()):
+    """Determines if a binary cache still represents its source dataset
+
+    The size and modification time are compared first; the contents are only
+    hashed when the file was touched without changing size. A touched file
+    whose contents are unchanged has its cached modification time refreshed.
+
+    :param data_file: string representing path to the source dataset
+    :param cache_dir: string representing path to the cache directory
+    :param required: names that must be recorded in the cache's key, a key
+    written before one of them was kept is invalid
+    :return: True if the cache may be used, else False
+    """
+    key_file = os.path.join(cache_dir, 'key.json')
+    if not os.path.exists(key_file):
+        return False
+    with open(key_file, 'r') as fp:
+        key = json.load(fp)
+
+    if any(name not in key for name in required):
+        return False
+
+    signature = file_signature(data_file, content_hash=False)
+    if signature['size'] != key['size']:
+        return False
+    if signature['mtime'] == key['mtime']:
+        return True
+
+    signature = file_signature(data_file)
+    if signature['sha1'] != key['sha1']:
+        return False
+
+    key['mtime'] = signature['mtime']
+    with open(key_file, 'w') as fp:
+        json.dump(key, fp)
+
+    return True
+
+def write_ibrl_cache(data_file, columns, cache_dir=None):
+    """Writes a columnar dataset to a binary cache next to its source file
+
+    The cache is written to a temporary directory first and moved into place
+    so an interrupted write never leaves a partial cache behind.
+
+    :param data_file: string representing path to the source dataset
+    :param columns: dictionary of columns as returned by read_ibrl_columns
+    :param cache_dir: optional path of the cache directory
+    :return: string representing path to the cache directory
+    """
+    if cache_dir is None:
+        cache_dir = data_file + CACHE_SUFFIX
+    signature = file_signature(data_file)
+
+    staging_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(cache_dir)))
+    for name in CACHE_ARRAYS:
+        numpy.save(os.path.join(staging_dir, name + '.npy'), columns[name])
+    for name in CACHE_COUNTS:
+        signature[name] = columns[name]
+    with open(os.path.join(staging_dir, 'key.json'), 'w') as fp:
+        json.dump(signature, fp)
+
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.rename(staging_dir, cache_dir)
+
+    return cache_dir
+
+def load_ibrl_cache(cache_dir):
+    """Loads a columnar dataset from a binary cache
+
+    The readings and the other columns are memory-mapped copy-on-write, so
+    they are paged in from disk on demand and in place changes never reach the
+    cache.
+
+    :param cache_dir: string representing path to the cache directory
+    :return: dictionary of columns as returned by read_ibrl_columns
+    """
+    with open(os.path.join(cache_dir, 'key.json'), 'r') as fp:
+        key = json.load(fp)
+
+    columns = {name: numpy.load(os.path.join(cache_dir, name + '.npy'), mmap_mode='c')
+               for name in CACHE_ARRAYS}
+    for name in CACHE_COUNTS:
+        columns[name] = key[name]
+
+    return columns
+
+def read_cached_ibrl_columns(data_file, block_size=BLOCK_SIZE, mapped=False):
+    """Reads IBRL data through a binary cache kept next to the dataset
+
+    The dataset is only parsed when the cache is missing, no longer matches
+    the size, modification time and content hash of the file or lacks one of
+    the CACHE_ARRAYS or CACHE_COUNTS, e.g. a cache written before the time
+    columns were kept.
+
+    :param data_file: string representing path to ibrl dataset
+    :param block_size: approximate number of bytes parsed per block
+    :param mapped: whether the file is memory-mapped when it is parsed
+    :return: dictionary of columns as returned by read_ibrl_columns
+    """
+    cache_dir = data_file + CACHE_SUFFIX
+
+    complete = all(os.path.exists(os.path.join(cache_dir, name + '.npy')) for name in CACHE_ARRAYS)
+    if not (complete and cache_is_valid(data_file, cache_dir, CACHE_COUNTS)):
+        columns = read_ibrl_columns(data_file, block_size, mapped)
+        write_ibrl_cache(data_file, columns, cache_dir)
+
+    return load_ibrl_cache(cache_dir)
@@ -0,0 +1,285 @@
+""" This file contains an online version of the baseline anomaly detection
+for live sensor feeds.
+
+Instead of shuffling, differencing and modeling a whole dataset, readings are
+ingested one at a time. Each sensor keeps only its previous reading and the
+running statistics of its successive differences, and every new difference
+is classified against the current regional ellipsoid in constant time.
+
+The WindowedDetector instead models only the differences of a sliding time
+window. Differences entering and leaving the window are added to and removed
+from the sufficient statistics of their sensor, and the sensor's share of the
+regional theta replaced, in constant time, so a run over a long deployment
+never refits a window from scratch.
+"""
+
+import collections
+import itertools
+import math
+
+import numpy
+
+import stats
+
+
+CHUNK_SIZE = 1 << 16 # readings converted for the windowed detector at a time
+
+
+class SensorState(object):
+    """ Per-sensor state kept by the OnlineDetector """
+    __slots__ = ('previous', 'statistics', 'theta')
+
+    def __init__(self):
+        self.previous = None
+        self.statistics = stats.RunningStatistics()
+        self.theta = None
+
+
+class OnlineDetector(object):
+    """ Classifies a feed of sensor readings against a regional ellipsoid
+
+    Like generate_regional_ellipsoid_parameters the regional theta is the mean
+    of the sensors' thetas; it is kept up to date by replacing a sensor's
+    previous contribution whenever its theta changes.
+    """
+
+    def __init__(self, a, b, theta=None):
+        """
+        :param a: a parameter of the regional ellipsoid
+        :param b: b parameter of the regional ellipsoid
+        :param theta: optional hardcoded theta value, otherwise theta is
+        learned from the successive differences of the feed
+        """
+        self.a = a
+        self.b = b
+        self.fixed_theta = theta
+        self.sensors = {}
+        self.theta_sum = 0.0
+        self.theta_count = 0
+
+    @property
+    def regional_ellipsoid(self):
+        """ The current (a, b, theta) of the regional ellipsoid, theta is None
+        until at least one sensor has an orientation """
+        if self.fixed_theta is not None:
+            return (self.a, self.b, self.fixed_theta)
+        if not self.theta_count:
+            return (self.a, self.b, None)
+
+        return (self.a, self.b, self.theta_sum / self.theta_count)
+
+    def update(self, sensor_id, temp, humidity):
+        """ Ingests a single reading and classifies its successive difference
+
+        The difference is classified against the regional ellipsoid as it was
+        before the reading arrived and then added to the sensor's statistics.
+
+        :param sensor_id: sensor that collected the reading
+        :param temp: temperature reading
+        :param humidity: humidity reading
+        :return: True if the difference is an anomaly, False if not and None
+        for the first reading of a sensor or while theta is unknown
+        """
+        state = self.sensors.get(sensor_id)
+        if state is None:
+            state = self.sensors[sensor_id] = SensorState()
+
+        previous = state.previous
+        state.previous = (temp, humidity)
+        if previous is None:
+            return None
+
+        difference_t = temp - previous[0]
+        difference_h = humidity - previous[1]
+
+        anomaly = self.classify(difference_t, difference_h)
+
+        state.statistics.push(difference_t, difference_h)
+        if self.fixed_theta is None:
+            self._update_theta(state)
+
+        return anomaly
+
+    def classify(self, difference_t, difference_h):
+        """ Classifies a successive difference against the regional ellipsoid
+
+        :param difference_t: temperature difference
+        :param difference_h: humidity difference
+        :return: True if the difference is an anomaly, False if not and None
+        while theta is unknown
+        """
+        a, b, theta = self.regional_ellipsoid
+        if theta is None:
+            return None
+
+        cos_theta = math.cos(theta)
+        sin_theta = math.sin(theta)
+        u = difference_t * cos_theta + difference_h * sin_theta
+        v = difference_h * cos_theta - difference_t * sin_theta
+
+        return (u * u) / (a * a) + (v * v) / (b * b) > 1
+
+    def _update_theta(self, state):
+        """ Replaces a sensor's contribution to the regional theta """
+        theta = state.statistics.orientation()
+        if theta is None:
+            return
+
+        if state.theta is None:
+            self.theta_count += 1
+        else:
+            self.theta_sum -= state.theta
+        self.theta_sum += theta
+        state.theta = theta
+
+
+class WindowedSensorState(object):
+    """ Per-sensor state kept by the WindowedDetector """
+    __slots__ = ('previous', 'statistics', 'theta')
+
+    def __init__(self):
+        self.previous = None
+        self.statistics = stats.SufficientStatistics()
+        self.theta = None
+
+
+class WindowedDetector(OnlineDetector):
+    """ Classifies a feed of timestamped sensor readings against a regional
+    ellipsoid modeled over a sliding time window
+
+    The window holds the successive differences of the last width seconds in
+    arrival order. Timestamps are expected in nondecreasing order, as in a
+    live feed or a dataset sorted by time. Each difference is pushed onto the
+    statistics of its sensor when it arrives and popped off them when it
+    leaves the window, and the sensor's contribution to the regional theta,
+    the mean of the sensors' thetas, is replaced, all in constant time.
+    """
+
+    def __init__(self, a, b, width, theta=None):
+        """
+        :param a: a parameter of the regional ellipsoid
+        :param b: b parameter of the regional ellipsoid
+        :param width: width of the window in seconds
+        :param theta: optional hardcoded theta value, otherwise theta is
+        learned from the successive differences of the window
+        """
+        OnlineDetector.__init__(self, a, b, theta)
+        self.width = width
+        self.window = collections.deque() # (timestamp, sensor_id, difference_t, difference_h)
+
+    def update(self, sensor_id, timestamp, temp, humidity):
+        """ Ingests a single reading and classifies its successive difference
+
+        Differences that have left the window by the reading's timestamp are
+        removed first, then the difference is classified against the regional
+        ellipsoid of the window and added to it.
+
+        :param sensor_id: sensor that collected the reading
+        :param timestamp: time of the reading in seconds
+        :param temp: temperature reading
+        :param humidity: humidity reading
+        :return: True if the difference is an anomaly, False if not and None
+        for the first reading of a sensor or while theta is unknown
+        """
+        self.expire(timestamp)
+
+        state = self.sensors.get(sensor_id)
+        if state is None:
+            state = self.sensors[sensor_id] = WindowedSensorState()
+
+        previous = state.previous
+        state.previous = (temp, humidity)
+        if previous is None:
+            return None
+
+        difference_t = temp - previous[0]
+        difference_h = humidity - previous[1]
+
+        anomaly = self.classify(difference_t, difference_h)
+
+        self.window.append((timestamp, sensor_id, difference_t, difference_h))
+        state.statistics.push(difference_t, difference_h)
+        if self.fixed_theta is None:
+            self._update_theta(state)
+
+        return anomaly
+
+    def expire(self, timestamp):
+        """ Removes the differences older than the window from the statistics
+
+        :param timestamp: current time in seconds
+        :return: number of differences removed
+        """
+        horizon = timestamp - self.width
+        window = self.window
+
+        removed = 0
+        while window and window[0][0] <= horizon:
+            _, sensor_id, difference_t, difference_h = window.popleft()
+            state = self.sensors[sensor_id]
+            state.statistics.pop(difference_t, difference_h)
+            if self.fixed_theta is None:
+                self._update_theta(state)
+            removed += 1
+
+        return removed
+
+    def _update_theta(self, state):
+        """ Replaces a sensor's contribution to the regional theta, dropping it
+        while the sensor has too few differences in the window for an orientation """
+        theta = None
+        if state.statistics.n > 1:
+            try:
+                theta = state.statistics.orientation()
+            except ZeroDivisionError: # no temperature spread
+                pass
+
+        if state.theta is not None:
+            self.theta_sum -= state.theta
+            self.theta_count -= 1
+        if theta is not None:
+            self.theta_sum += theta
+            self.theta_count += 1
+        elif not self.theta_count:
+            self.theta_sum = 0.0 # drop the rounding errors of removed thetas
+        state.theta = theta
+
+
+"""Begin windowed detection functions"""
+def windowed_anomalies(columns, a, b, width, theta=None):
+    """ Runs a WindowedDetector over a columnar dataset in timestamp order
+
+    Readings without a timestamp (NaN) cannot be placed in a window and are
+    skipped, they are never reported as anomalies.
+
+    :param columns: dictionary of columns as returned by ingest.read_ibrl_columns
+    :param a: a parameter of the regional ellipsoid
+    :param b: b parameter of the regional ellipsoid
+    :param width: width of the window in seconds
+    :param theta: optional hardcoded theta value
+    :return: dictionary mapping sensors to index arrays of their readings
+    whose difference from the sensor's previous reading in time is an anomaly
+    """
+    timestamps = columns['timestamp']
+    order = numpy.argsort(timestamps, kind='mergesort') # NaN sorts last
+    anomalous = numpy.zeros(len(order), bool)
+    order = order[:len(order) - numpy.count_nonzero(numpy.isnan(timestamps))]
+
+    detector = WindowedDetector(a, b, width, theta)
+    update = detector.update
+    readings = columns['readings']
+
+    # Only a chunk of the readings is converted to Python values at a time
+    for start in range(0, len(order), CHUNK_SIZE):
+        indices = order[start:start + CHUNK_SIZE]
+        rows = itertools.izip(indices.tolist(), columns['sensor_id'][indices].tolist(),
+                              timestamps[indices].tolist(), readings[0][indices].tolist(),
+                              readings[1][indices].tolist())
+        for index, sensor_id, timestamp, temp, humidity in rows:
+            if update(sensor_id, timestamp, temp, humidity):
+                anomalous[index] = True
+
+    offsets = columns['offsets']
+
+    return {str(sensor): numpy.flatnonzero(anomalous[offsets[i]:offsets[i + 1]])
+            for (i, sensor) in enumerate(columns['sensors'])}
@@ -0,0 +1,85 @@
+""" This file contains a parallel version of the per-sensor ellipsoid
+modeling performed by baseline.generate_ellipsoid_parameters.
+
+The successive differences are never copied: the worker processes of a pool
+are forked with the sensors' arrays, or the single array of a SensorFrame,
+already in their memory and read them in place, so only sensor indices and
+thetas are ever pickled between processes. With a single process the
+sensors are modeled in the calling process without a pool. The workers only
+model the ellipsoid parameters, no boundary points are calculated.
+"""
+
+import multiprocessing
+
+import numpy
+
+import baseline
+
+
+# Sensors and model parameters, set in each worker process by _init_worker
+_shared = {}
+
+
+def _init_worker(sensors, sensor_ids, a, b, theta):
+    """ Stores the sensors inherited from the parent process and the model
+    parameters in a worker process """
+    _shared.update(sensors=sensors, sensor_ids=sensor_ids, a=a, b=b, theta=theta)
+
+def _model_sensors(indices):
+    """ Models the ellipsoids of a chunk of sensors inside a worker process
+
+    :param indices: indices of the sensors to model
+    :return: list of (index, theta) tuples
+    """
+    sensors, sensor_ids = _shared['sensors'], _shared['sensor_ids']
+    thetas = []
+
+    for i in indices:
+        ellipsoid = baseline.generate_ellipsoid_parameters(sensors[sensor_ids[i]], _shared['a'],
+                                                           _shared['b'], _shared['theta'])
+        thetas.append((i, ellipsoid['theta']))
+
+    return thetas
+
+def generate_ellipsoids(sensors, a, b, theta=None, processes=None, chunk_size=1):
+    """ Calculates the ellipsoid of every sensor in a pool of processes
+
+    :param sensors: dictionary or SensorFrame mapping sensors to 2D arrays of
+    successive differences, shared with the workers without a copy
+    :param a: a parameter used in calculating ellipsoid parameters
+    :param b: b parameter used in calculating ellipsoid parameters
+    :param theta: optional hardcoded theta value
+    :param processes: number of worker processes, defaults to the number of CPUs,
+    1 models every sensor in the calling process
+    :param chunk_size: number of sensors handed to a worker at a time
+    :return: dictionary mapping sensors to the dictionaries of 'a', 'b',
+    'theta' and 'n' returned by baseline.generate_ellipsoid_parameters, ready
+    for generate_regional_ellipsoid_parameters
+    """
+    sensor_ids = list(sensors)
+    worker_args = (sensors, sensor_ids, a, b, theta)
+    chunks = [range(i, min(i + chunk_size, len(sensor_ids)))
+              for i in range(0, len(sensor_ids), chunk_size)]
+
+    if processes == 1:
+        _init_worker(*worker_args)
+        results = map(_model_sensors, chunks)
+        _shared.clear()
+    else:
+        pool = multiprocessing.Pool(processes, _init_worker, worker_args)
+        try:
+            results = pool.map(_model_sensors, chunks)
+        finally:
+            pool.close()
+            pool.join()
+
+    ellipsoid_parameters = {}
+    for i, sensor_theta in (result for chunk in results for result in chunk):
+        ellipsoid_parameters[sensor_ids[i]] = {
+            'a': a,
+            'b': b,
+            'theta': sensor_theta,
+            'n': numpy.shape(sensors[sensor_ids[i]])[1]
+        }
+
+    return ellipsoid_parameters
@@ -0,0 +1,209 @@
+""" This file contains the pipeline engine that runs the phases of the anomaly
+detection algorithm as a sequence of pluggable stages.
+
+Every stage is a function taking the pipeline state, a dictionary holding
+the parameters of the run and everything produced by the stages before it,
+and adding its own results to that state. The baseline functions are the
+default stages and any one of them can be swapped for a custom function,
+mirroring the "YOUR CODE HERE" cells of the notebook:
+
+    def my_differences(state):
+        state['differences'], state['lookup_table'] = my_generate_differences(state['measurements'])
+
+    state = pipeline.run_pipeline(data_file, stages={'differences': my_differences})
+
+While the transformation stages are the defaults they run fused: each
+sensor is shuffled in place and differenced straight into one contiguous
+buffer shared by all sensors, so no shuffled copies or per-sensor
+difference arrays are ever materialized.
+"""
+
+import numpy
+
+import baseline
+import ingest
+from sensorframe import SensorFrame
+
+
+STAGE_ORDER = ('ingest', 'randomize', 'differences', 'standardize', 'ellipsoid', 'regional',
+               'detection')
+
+# Adjacent array stages that run as one pass over the data while unmodified
+FUSED_STAGES = ('randomize', 'differences', 'standardize')
+
+RAW_AXES = (8.7886, 22.9904) # a and b for non-standardized successive differences with the IBRL dataset
+STANDARDIZED_AXES = (1.7601, 4.1168) # a and b for standardized successive differences
+
+DEFAULT_PARAMETERS = {
+    'a': None, # None picks the a and b of RAW_AXES or STANDARDIZED_AXES to match 'standardize'
+    'b': None,
+    'theta': None,
+    'seed': None,
+    'cache': False,
+    'mapped': False, # memory-map the dataset instead of reading it
+    'standardize': False,
+    'dtype': None # dtype of the differences, e.g. float32 for standardized runs
+}
+
+
+"""Begin default stages"""
+def ingest_stage(state):
+    """ Reads the dataset into a columnar array and per-sensor views of it """
+    parameters = state['parameters']
+    if parameters['cache']:
+        columns = ingest.read_cached_ibrl_columns(state['data_file'], mapped=parameters['mapped'])
+    else:
+        columns = ingest.read_ibrl_columns(state['data_file'], mapped=parameters['mapped'])
+
+    state['columns'] = columns
+    state['measurements'] = SensorFrame.from_columns(columns)
+
+def randomize_stage(state):
+    """ Shuffles every sensor's readings in place """
+    state['permutations'] = baseline.permute_readings(state['measurements'],
+                                                      state['parameters']['seed'])
+
+def differences_stage(state):
+    """ Calculates the successive differences of every sensor """
+    state['differences'], state['lookup_table'] = \
+        baseline.generate_differences(state['measurements'], state.get('permutations'))
+
+def standardize_stage(state):
+    """ Standardizes the successive differences when the run asks for it """
+    parameters = state['parameters']
+    if parameters['standardize']:
+        state['differences'], state['difference_statistics'] = baseline.standardize_readings(
+            state['differences'], state.get('difference_statistics'), parameters['dtype'])
+
+def ellipsoid_stage(state):
+    """ Models the ellipsoid of every sensor by its parameters """
+    parameters = state['parameters']
+    state['ellipsoid_parameters'] = {
+        sensor: baseline.generate_ellipsoid_parameters(sensor_readings, parameters['a'],
+                                                       parameters['b'], parameters['theta'])
+        for (sensor, sensor_readings) in state['differences'].iteritems()}
+
+def regional_stage(state):
+    """ Aggregates the sensors' ellipsoids into the regional ellipsoid """
+    state['regional_ellipsoid'] = \
+        baseline.generate_regional_ellipsoid_parameters(state['ellipsoid_parameters'])
+
+def detection_stage(state):
+    """ Segregates anomalies from true measurements """
+    state['true_measurements'], state['anomalies'] = \
+        baseline.inverse_transformation(state['differences'], state['regional_ellipsoid'])
+
+STAGES = {
+    'ingest': ingest_stage,
+    'randomize': randomize_stage,
+    'differences': differences_stage,
+    'standardize': standardize_stage,
+    'ellipsoid': ellipsoid_stage,
+    'regional': regional_stage,
+    'detection': detection_stage
+}
+DEFAULT_STAGES = dict(STAGES)
+
+"""Begin fused stages"""
+def fused_transform_stage(state):
+    """ Shuffles, differences and optionally standardizes every sensor in a
+    single pass
+
+    Produces the same 'permutations', 'differences', 'lookup_table' and
+    'difference_statistics' as the randomize, differences and standardize
+    stages for a given seed, with the differences of all sensors written into
+    the one contiguous 2D array of a SensorFrame and standardized in place
+    while they are still in cache.
+    """
+    parameters = state['parameters']
+    measurements = state['measurements']
+    sensors = sorted(measurements)
+    random_state = numpy.random.RandomState(parameters['seed'])
+
+    offsets = numpy.cumsum([0] + [max(measurements[sensor].shape[1] - 1, 0) for sensor in sensors])
+    # Like standardize_stage, the dtype only applies to standardized differences
+    dtype = parameters['dtype'] if parameters['standardize'] else None
+    buffer = numpy.empty((2, offsets[-1]), dtype or float)
+
+    permutations = {}
+    statistics = {}
+    for i, sensor in enumerate(sensors):
+        readings = measurements[sensor]
+        differences = buffer[:, offsets[i]:offsets[i + 1]]
+        permutations[sensor] = baseline.permute_sensor_readings(readings, random_state)
+        numpy.subtract(readings[:, 1:], readings[:, :-1], out=differences)
+        if parameters['standardize']:
+            baseline.standardize_readings({sensor: differences}, statistics)
+
+    state['permutations'] = permutations
+    state['differences'] = SensorFrame(buffer, sensors, offsets)
+    state['lookup_table'] = permutations # raw index of each shuffled reading
+    if parameters['standardize']:
+        state['difference_statistics'] = statistics
+
+"""Begin engine functions"""
+def register_stage(name, function):
+    """ Replaces the default function of a stage for every following run
+
+    :param name: name of the stage, one of STAGE_ORDER
+    :param function: function taking and updating the pipeline state
+    """
+    if name not in STAGE_ORDER:
+        raise KeyError("Unknown pipeline stage: %s" % name)
+
+    STAGES[name] = function
+
+def plan_pipeline(stages, fuse=True):
+    """ Determines the functions run by a pipeline in order
+
+    :param stages: dictionary mapping stage names to their functions
+    :param fuse: whether adjacent default array stages may be fused
+    :return: list of (name, function) tuples; fused stages are named after the
+    stages they replace joined by '+'
+    """
+    fusable = fuse and all(stages[name] is DEFAULT_STAGES[name] for name in FUSED_STAGES)
+
+    plan = []
+    for name in STAGE_ORDER:
+        if fusable and name in FUSED_STAGES:
+            if name == FUSED_STAGES[0]:
+                plan.append(('+'.join(FUSED_STAGES), fused_transform_stage))
+            continue
+        plan.append((name, stages[name]))
+
+    return plan
+
+def run_pipeline(data_file, stages=None, fuse=True, until=None, **parameters):
+    """ Runs every stage of the pipeline over a dataset
+
+    :param data_file: string representing path to ibrl dataset
+    :param stages: optional dictionary mapping stage names to custom functions
+    used in place of the registered ones for this run
+    :param fuse: whether adjacent default array stages may be fused
+    :param until: optional name of the last stage to run
+    :param parameters: parameters of the run overriding DEFAULT_PARAMETERS
+    :return: dictionary of the final pipeline state
+    """
+    unknown = set(stages or {}) - set(STAGE_ORDER)
+    if until is not None and until not in STAGE_ORDER:
+        unknown.add(until)
+    if unknown:
+        raise KeyError("Unknown pipeline stages: %s" % ', '.join(sorted(unknown)))
+
+    run_stages = dict(STAGES)
+    run_stages.update(stages or {})
+
+    run_parameters = dict(DEFAULT_PARAMETERS)
+    run_parameters.update(parameters)
+    axes = STANDARDIZED_AXES if run_parameters['standardize'] else RAW_AXES
+    for name, default in zip(('a', 'b'), axes):
+        if run_parameters[name] is None:
+            run_parameters[name] = default
+
+    state = {'data_file': data_file, 'parameters': run_parameters}
+    for name, function in plan_pipeline(run_stages, fuse):
+        function(state)
+        if until in name.split('+'):
+            break
+
+    return state
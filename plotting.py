@@ -0,0 +1,200 @@
+""" This file contains the density-binned rendering used to plot readings,
+successive differences and ellipsoid points of whole datasets.
+
+Rather than drawing one marker per point, the points are counted into a
+fixed grid of 2D histogram bins with vectorized binning, a chunk of points
+at a time, and the grid is drawn as a single image. The cost of a figure then
+depends on the number of bins rather than the number of points. The bins of
+a dataset can be cached next to it and are rebuilt whenever it changes.
+
+matplotlib is only imported when a grid is rendered.
+"""
+
+import json
+import os
+import shutil
+
+import numpy
+
+import baseline
+import ingest
+from sensorframe import SensorFrame
+
+
+DEFAULT_BINS = 400 # bins along each axis
+CHUNK_SIZE = 1 << 20 # points binned at a time
+BIN_CACHE_SUFFIX = '.bincache' # cache directory of the bins kept next to a dataset
+
+
+"""Begin binning functions"""
+def as_points(data):
+    """ Returns data as a single 2xN array of points
+
+    :param data: SensorFrame, dictionary mapping sensors to 2D arrays or a
+    2xN array
+    :return: 2xN float array
+    """
+    if isinstance(data, SensorFrame):
+        return data.readings
+    if isinstance(data, dict):
+        return numpy.hstack([data[sensor] for sensor in sorted(data)] or [numpy.empty((2, 0))])
+
+    return numpy.asarray(data, float)
+
+def ellipsoid_points(ellipsoid_parameters):
+    """ Returns the boundary points of many ellipsoids as a single 2xN array
+
+    :param ellipsoid_parameters: dictionary mapping sensors to the dictionaries
+    returned by baseline.generate_ellipsoid
+    :return: 2xN float array, NaN where an ellipsoid has no boundary point
+    """
+    return numpy.hstack([numpy.array(ellipsoid_parameters[sensor]['ellipsoid_points'], float).reshape(-1, 2).T
+                         for sensor in sorted(ellipsoid_parameters)] or [numpy.empty((2, 0))])
+
+def ellipsoid_outlines(ellipsoid_parameters, resolution=baseline.BOUNDARY_RESOLUTION):
+    """ Returns the parametric boundaries of many ellipsoids as one 2xN array
+    that draws as separate closed lines
+
+    :param ellipsoid_parameters: dictionary mapping sensors to dictionaries
+    containing the 'a', 'b' and 'theta' of their ellipsoids
+    :param resolution: number of points along each boundary
+    :return: 2xN float array, the boundaries separated by NaN points
+    """
+    separator = numpy.array([[numpy.nan, numpy.nan]])
+    outlines = []
+    for sensor in sorted(ellipsoid_parameters):
+        ellipsoid = ellipsoid_parameters[sensor]
+        outlines.append(baseline.ellipsoid_boundary(ellipsoid['a'], ellipsoid['b'],
+                                                    ellipsoid['theta'], resolution))
+        outlines.append(separator)
+
+    return numpy.vstack(outlines).T if outlines else numpy.empty((2, 0))
+
+def points_extent(points):
+    """ Returns the extent of the finite points
+
+    :param points: 2xN array of points
+    :return: tuple (xmin, xmax, ymin, ymax)
+    """
+    finite = numpy.isfinite(points).all(axis=0)
+    if not finite.any():
+        return (0.0, 1.0, 0.0, 1.0)
+    x, y = points[0][finite], points[1][finite]
+
+    return (float(x.min()), float(x.max()), float(y.min()), float(y.max()))
+
+def bin_points(points, bins=DEFAULT_BINS, extent=None, chunk_size=CHUNK_SIZE):
+    """ Counts points into a grid of 2D histogram bins
+
+    Points outside of the extent and points with NaN coordinates are ignored.
+
+    :param points: 2xN array of points
+    :param bins: number of bins along each axis
+    :param extent: optional tuple (xmin, xmax, ymin, ymax), defaults to the
+    extent of the points
+    :param chunk_size: number of points binned at a time
+    :return: tuple containing the bins x bins array of counts, rows being y,
+    and the extent
+    """
+    points = as_points(points)
+    if extent is None:
+        extent = points_extent(points)
+    xmin, xmax, ymin, ymax = extent
+    x_scale = bins / ((xmax - xmin) or 1.0)
+    y_scale = bins / ((ymax - ymin) or 1.0)
+
+    counts = numpy.zeros(bins * bins, numpy.int64)
+    for start in range(0, points.shape[1], chunk_size):
+        x = points[0, start:start + chunk_size]
+        y = points[1, start:start + chunk_size]
+        with numpy.errstate(invalid='ignore'):
+            inside = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax) # False for NaN
+
+        # Points on the upper edges belong to the last bins
+        column = numpy.minimum(((x[inside] - xmin) * x_scale).astype(numpy.intp), bins - 1)
+        row = numpy.minimum(((y[inside] - ymin) * y_scale).astype(numpy.intp), bins - 1)
+        counts += numpy.bincount(row * bins + column, minlength=bins * bins)
+
+    return (counts.reshape(bins, bins), tuple(float(value) for value in extent))
+
+"""Begin cache functions"""
+def bin_cache_dir(data_file):
+    """ Returns the bin cache directory of a dataset, emptying it when the
+    dataset has changed since the bins were cached
+
+    :param data_file: string representing path to the dataset
+    :return: string representing path to the cache directory
+    """
+    cache_dir = data_file + BIN_CACHE_SUFFIX
+    if not ingest.cache_is_valid(data_file, cache_dir):
+        if os.path.exists(cache_dir):
+            shutil.rmtree(cache_dir)
+        os.makedirs(cache_dir)
+        with open(os.path.join(cache_dir, 'key.json'), 'w') as fp:
+            json.dump(ingest.file_signature(data_file), fp)
+
+    return cache_dir
+
+def cached_bin_points(data_file, name, points, bins=DEFAULT_BINS, extent=None):
+    """ Counts points into bins through a cache kept next to their dataset
+
+    :param data_file: string representing path to the dataset the points
+    were derived from
+    :param name: name of the points within the dataset, e.g. 'readings'
+    :param points: 2xN array of points, or a function returning them which is
+    only called when the bins are not cached
+    :param bins: number of bins along each axis
+    :param extent: optional tuple (xmin, xmax, ymin, ymax)
+    :return: tuple containing the array of counts and the extent as returned
+    by bin_points
+    """
+    extent_key = 'auto' if extent is None else '_'.join('%g' % value for value in extent)
+    cache_file = os.path.join(bin_cache_dir(data_file), '%s-%d-%s.npz' % (name, bins, extent_key))
+
+    if os.path.exists(cache_file):
+        cached = numpy.load(cache_file)
+        return (cached['counts'], tuple(cached['extent']))
+
+    counts, extent = bin_points(points() if callable(points) else points, bins, extent)
+    numpy.savez(cache_file, counts=counts, extent=extent)
+
+    return (counts, extent)
+
+"""Begin rendering functions"""
+def render_bins(axes, counts, extent, log=True, cmap='Blues'):
+    """ Draws a grid of counts as a single image
+
+    :param axes: matplotlib axes to draw on
+    :param counts: array of counts as returned by bin_points
+    :param extent: tuple (xmin, xmax, ymin, ymax) of the counts
+    :param log: whether the colors follow the logarithm of the counts
+    :param cmap: name of the matplotlib color map
+    :return: the matplotlib image
+    """
+    from matplotlib.colors import LogNorm
+
+    density = numpy.ma.masked_equal(counts, 0) # empty bins stay blank
+    norm = LogNorm(vmin=1, vmax=max(counts.max(), 1)) if log else None
+
+    return axes.imshow(density, origin='lower', extent=extent, aspect='auto',
+                       interpolation='nearest', cmap=cmap, norm=norm)
+
+def plot_density(axes, points, bins=DEFAULT_BINS, extent=None, data_file=None, name=None, **options):
+    """ Bins points and draws them as a single image
+
+    :param axes: matplotlib axes to draw on
+    :param points: SensorFrame, dictionary mapping sensors to 2D arrays or 2xN array
+    :param bins: number of bins along each axis
+    :param extent: optional tuple (xmin, xmax, ymin, ymax)
+    :param data_file: optional dataset the points were derived from; with a
+    name the bins are cached next to it
+    :param name: name of the points within the dataset
+    :param options: options passed to render_bins
+    :return: the matplotlib image
+    """
+    if data_file is not None and name is not None:
+        counts, extent = cached_bin_points(data_file, name, lambda: as_points(points), bins, extent)
+    else:
+        counts, extent = bin_points(points, bins, extent)
+
+    return render_bins(axes, counts, extent, **options)
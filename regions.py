@@ -0,0 +1,171 @@
+""" This file contains the hierarchical aggregation of ellipsoid parameters for
+deployments grouped into regions and sub-regions.
+
+Every sensor is reduced to a compact record of its parameters and its number
+of readings. Each region of the tree keeps the weighted sums of the records
+below it, so its aggregate ellipsoid is a division away. The tree is built
+with a vectorized reduction from the leaves up, one level at a time, and a
+sensor reporting new parameters only adjusts the sums of its own region and
+of that region's ancestors.
+"""
+
+import numpy
+
+
+ROOT_REGION = 'root'
+
+# Compact per-sensor parameter record, weight being 0 until a sensor reports
+# usable parameters
+RECORD_DTYPE = numpy.dtype([('n', numpy.int64), ('a', float), ('b', float),
+                            ('theta', float), ('weight', float)])
+
+
+class RegionTree(object):
+    """ Weighted sums of the ellipsoid parameters of every region of a tree """
+    __slots__ = ('regions', 'parents', 'depths', 'sensors', 'sensor_region', 'records',
+                 'sums', 'weighted', '_region_index', '_sensor_index')
+
+    def __init__(self, sensor_regions, parent_regions=None, weighted=True):
+        """
+        :param sensor_regions: dictionary mapping sensors to the regions they
+        belong to
+        :param parent_regions: optional dictionary mapping regions to their
+        parent regions, regions without a parent belong to ROOT_REGION
+        :param weighted: whether sensors are weighted by their number of readings
+        rather than counted once
+        """
+        parent_regions = dict(parent_regions or {})
+        names = set(sensor_regions.itervalues()) | set(parent_regions) | \
+            set(parent for parent in parent_regions.itervalues() if parent is not None)
+        names.discard(ROOT_REGION)
+
+        self.regions = [ROOT_REGION] + sorted(names)
+        self._region_index = {region: i for (i, region) in enumerate(self.regions)}
+        self.parents = numpy.full(len(self.regions), -1, numpy.int32)
+        for region in self.regions[1:]:
+            self.parents[self._region_index[region]] = \
+                self._region_index[parent_regions.get(region) or ROOT_REGION]
+        self.depths = self._calculate_depths()
+
+        self.sensors = sorted(sensor_regions)
+        self._sensor_index = {sensor: i for (i, sensor) in enumerate(self.sensors)}
+        self.sensor_region = numpy.array([self._region_index[sensor_regions[sensor]]
+                                          for sensor in self.sensors], numpy.int32)
+        self.records = numpy.zeros(len(self.sensors), RECORD_DTYPE)
+        self.sums = numpy.zeros((len(self.regions), 4), float) # weight, a, b, theta
+        self.weighted = weighted
+
+    def _calculate_depths(self):
+        """ Returns the depth of every region, raising ValueError on cycles """
+        depths = numpy.zeros(len(self.regions), numpy.int32)
+        for i in range(1, len(self.regions)):
+            parent = self.parents[i]
+            while parent != 0:
+                depths[i] += 1
+                parent = self.parents[parent]
+                if depths[i] > len(self.regions):
+                    raise ValueError("Region hierarchy contains a cycle at %s" % self.regions[i])
+            depths[i] += 1
+
+        return depths
+
+    """Begin constructors"""
+    @classmethod
+    def from_ellipsoids(cls, ellipsoid_parameters, sensor_regions, parent_regions=None,
+                        weighted=True):
+        """ Builds the tree of the ellipsoids of every sensor
+
+        :param ellipsoid_parameters: dictionary mapping sensors to dictionaries
+        containing their 'a', 'b', 'theta' and number of readings 'n'
+        :param sensor_regions: dictionary mapping sensors to their regions
+        :param parent_regions: optional dictionary mapping regions to their parents
+        :param weighted: whether sensors are weighted by their number of readings
+        :return: RegionTree
+        """
+        tree = cls(sensor_regions, parent_regions, weighted)
+        for sensor, ellipsoid in ellipsoid_parameters.iteritems():
+            tree._set_record(tree._sensor_index[sensor], ellipsoid['a'], ellipsoid['b'],
+                             ellipsoid['theta'], ellipsoid.get('n', 1))
+        tree.rebuild()
+
+        return tree
+
+    """Begin aggregation functions"""
+    @staticmethod
+    def _contributions(records):
+        """ Returns the weighted contributions of records to the sums as rows of
+        weight, a, b and theta, records without a positive weight or with a
+        non-finite parameter contributing nothing """
+        columns = numpy.array([records['weight'], records['a'], records['b'],
+                               records['theta']], float).reshape(4, -1)
+        usable = (columns[0] > 0) & numpy.isfinite(columns).all(axis=0)
+        with numpy.errstate(invalid='ignore'):
+            columns[1:] *= columns[0]
+
+        return numpy.where(usable, columns, 0.0)
+
+    def _set_record(self, i, a, b, theta, n):
+        """ Stores the parameters of the i-th sensor and returns its weighted
+        contribution to the sums
+
+        A sensor modeled from no readings or with a non-finite parameter is
+        stored with a weight of 0 so that it drops out of every sum.
+        """
+        weight = float(n if self.weighted else 1)
+        if not numpy.isfinite([weight, a, b, theta]).all():
+            weight = 0.0
+        self.records[i] = (n, a, b, theta, max(weight, 0.0))
+
+        return self._contributions(self.records[i:i + 1])[:, 0]
+
+    def rebuild(self):
+        """ Recalculates the sums of every region from the sensor records as a
+        reduction from the deepest regions up to the root """
+        self.sums = numpy.column_stack([
+            numpy.bincount(self.sensor_region, values, len(self.regions))
+            for values in self._contributions(self.records)])
+
+        for depth in range(self.depths.max() if len(self.regions) > 1 else 0, 0, -1):
+            children = numpy.flatnonzero(self.depths == depth)
+            for column in range(4):
+                self.sums[:, column] += numpy.bincount(self.parents[children],
+                                                       self.sums[children, column],
+                                                       len(self.regions))
+
+    def update(self, sensor, a, b, theta, n=1):
+        """ Replaces the parameters reported by a sensor, adjusting only the sums
+        of its region and that region's ancestors
+
+        :param sensor: sensor of the tree
+        :param a: a parameter of the sensor's ellipsoid
+        :param b: b parameter of the sensor's ellipsoid
+        :param theta: theta of the sensor's ellipsoid
+        :param n: number of readings the parameters were modeled from
+        """
+        i = self._sensor_index[sensor]
+        old_sums = self._contributions(self.records[i:i + 1])[:, 0]
+        delta = self._set_record(i, a, b, theta, n) - old_sums
+
+        region = self.sensor_region[i]
+        while region != -1:
+            self.sums[region] += delta
+            region = self.parents[region]
+
+    def regional_ellipsoid(self, region=ROOT_REGION):
+        """ Returns the aggregate ellipsoid parameters of a region
+
+        :param region: region of the tree, defaults to the whole deployment
+        :return: tuple (a, b, theta) or None if no sensor of the region reported
+        """
+        weight, sum_a, sum_b, sum_theta = self.sums[self._region_index[region]]
+        if weight <= 0:
+            return None
+
+        return (sum_a / weight, sum_b / weight, sum_theta / weight)
+
+    def regional_ellipsoids(self):
+        """ Returns the aggregate ellipsoid parameters of every region
+
+        :return: dictionary mapping regions to (a, b, theta) tuples or None
+        """
+        return {region: self.regional_ellipsoid(region) for region in self.regions}
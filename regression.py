@@ -0,0 +1,315 @@
+""" This file contains the performance regression suite for the stages of the
+anomaly detection algorithm.
+
+Every stage is run on synthetic data of increasing size by each of its
+implementations: the original list-of-tuples functions in helpers.py, the
+array functions in baseline.py and the newer implementations built on top of
+them. The outputs of all implementations of a stage must agree within a
+tolerance, and their timings are appended to a history file. A timing more
+than the threshold slower than the recent history of the same stage,
+implementation and size is reported as a regression.
+
+Usage:
+    python regression.py --sizes 1000 100000 10000000 --threshold 0.25
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+
+import numpy
+
+import baseline
+import helpers
+import ingest
+import stats
+import sweep
+import synthetic
+from sensorframe import SensorFrame
+
+
+SIZES = (10**3, 10**4, 10**5, 10**6, 10**7) # readings per run
+HELPERS_MAX_SIZE = 10**5 # helpers.py is pure Python, larger runs take minutes
+SENSORS = 54
+HISTORY_FILE = 'regression_history.json'
+HISTORY_WINDOW = 5 # recent runs a timing is compared against
+DEFAULT_THRESHOLD = 0.25 # fraction a stage may slow down before it regresses
+MIN_SECONDS = 0.005 # timings below this are too noisy to flag
+TOLERANCE = 1e-8
+
+# a and b for non-standardized successive differences with the IBRL dataset
+DEFAULT_A = 8.7886
+DEFAULT_B = 22.9904
+
+
+"""Begin input functions"""
+def generate_inputs(size, seed=0):
+    """ Generates the inputs of every stage from a synthetic dataset
+
+    :param size: total number of readings
+    :param seed: seed of the synthetic dataset
+    :return: dictionary of the raw 'frame' and its successive 'differences' as
+    SensorFrames, the same as lists of tuples when small enough for helpers.py,
+    the 'theta' of all differences and the 'size'
+    """
+    chunks = list(synthetic.iter_synthetic_chunks(sensors=SENSORS, readings=max(2, size // SENSORS),
+                                                  seed=seed))
+    values = numpy.vstack([numpy.concatenate([chunk[name] for chunk in chunks])
+                           for name in synthetic.IBRL_DTYPE.names])
+    frame = SensorFrame.from_columns(ingest.group_by_sensor(values, values.shape[1]))
+    differences = frame.successive_differences()
+
+    inputs = {
+        'size': size,
+        'frame': frame,
+        'differences': differences,
+        'theta': stats.SufficientStatistics.from_readings(differences.readings).orientation()
+    }
+    if size <= HELPERS_MAX_SIZE:
+        inputs['tuples'] = frame.to_tuples()
+        inputs['difference_tuples'] = differences.to_tuples()
+
+    return inputs
+
+def flatten(sensors, values):
+    """ Concatenates per-sensor results in sensor order into one float array,
+    None becoming NaN """
+    return numpy.concatenate([numpy.ravel(numpy.array(values(sensors[sensor]), float))
+                              for sensor in sorted(sensors)] or [numpy.empty(0)])
+
+"""Begin stage implementations"""
+# Each implementation is a tuple (name, prepare, run, normalize): prepare
+# builds the untimed arguments from the inputs, run is timed and normalize
+# turns its result into a float array compared across implementations.
+# The helpers implementations are skipped above HELPERS_MAX_SIZE.
+IMPLEMENTATIONS = {
+    'differences': [
+        ('helpers', lambda inputs: (inputs['tuples'],), helpers.generate_differences,
+         lambda result: flatten(result[0], lambda readings: numpy.transpose(readings))),
+        ('baseline', lambda inputs: (inputs['frame'].as_measurements(),), baseline.generate_differences,
+         lambda result: flatten(result[0], lambda readings: readings)),
+        ('sensorframe', lambda inputs: (inputs['frame'],), SensorFrame.successive_differences,
+         lambda result: flatten(result, lambda readings: readings))
+    ],
+    'orientation': [
+        ('helpers', lambda inputs: (inputs['difference_tuples'],),
+         lambda sensors: {sensor: helpers.calculate_ellipsoid_orientation(readings)
+                          for (sensor, readings) in sensors.iteritems()},
+         lambda result: flatten(result, lambda theta: theta)),
+        ('baseline', lambda inputs: (inputs['differences'],),
+         lambda sensors: {sensor: baseline.calculate_ellipsoid_orientation(readings)
+                          for (sensor, readings) in sensors.iteritems()},
+         lambda result: flatten(result, lambda theta: theta)),
+        ('stats', lambda inputs: (inputs['differences'],),
+         lambda sensors: {sensor: stats.SufficientStatistics.from_readings(readings).orientation()
+                          for (sensor, readings) in sensors.iteritems()},
+         lambda result: flatten(result, lambda theta: theta))
+    ],
+    'standardize': [
+        ('helpers', lambda inputs: (copy.deepcopy(inputs['difference_tuples']),),
+         helpers.standardize_readings,
+         lambda result: flatten(result, lambda readings: numpy.transpose(readings))),
+        ('baseline', lambda inputs: (copy.deepcopy(inputs['differences']),),
+         baseline.standardize_readings,
+         lambda result: flatten(result[0], lambda readings: readings))
+    ],
+    'ellipsoid': [
+        ('helpers', lambda inputs: (inputs['difference_tuples'], inputs['theta']),
+         lambda sensors, theta: {sensor: helpers.generate_ellipsoid(readings, DEFAULT_A, DEFAULT_B, theta)
+                                 for (sensor, readings) in sensors.iteritems()},
+         lambda result: flatten(result, lambda ellipsoid: ellipsoid['ellipsoid_points'])),
+        ('baseline', lambda inputs: (inputs['differences'], inputs['theta']),
+         lambda sensors, theta: {sensor: baseline.generate_ellipsoid(readings, DEFAULT_A, DEFAULT_B, theta)
+                                 for (sensor, readings) in sensors.iteritems()},
+         lambda result: flatten(result, lambda ellipsoid: ellipsoid['ellipsoid_points']))
+    ],
+    'detection': [
+        ('helpers', lambda inputs: (inputs['difference_tuples'], (DEFAULT_A, DEFAULT_B, inputs['theta'])),
+         helpers.inverse_transformation,
+         lambda result: flatten(result[1], len)),
+        ('baseline', lambda inputs: (inputs['differences'], (DEFAULT_A, DEFAULT_B, inputs['theta'])),
+         baseline.inverse_transformation,
+         lambda result: flatten(result[1], len)),
+        ('sweep', lambda inputs: (inputs['differences'], [DEFAULT_A], [DEFAULT_B], [inputs['theta']]),
+         sweep.sweep_ellipse_parameters,
+         lambda result: result['anomalies'].ravel())
+    ]
+}
+STAGES = ('differences', 'orientation', 'standardize', 'ellipsoid', 'detection')
+
+"""Begin suite functions"""
+def outputs_agree(expected, actual, tolerance=TOLERANCE):
+    """ Compares the normalized outputs of two implementations
+
+    :param expected: float array of the reference implementation
+    :param actual: float array of another implementation
+    :param tolerance: relative and absolute tolerance
+    :return: True if both have the same shape, the same NaNs and close values
+    """
+    if expected.shape != actual.shape:
+        # Stages reporting totals only are compared to the reference's sum
+        if actual.size == 1 and expected.size > 1:
+            expected = numpy.array([expected.sum()])
+        else:
+            return False
+    missing = numpy.isnan(expected)
+    if not numpy.array_equal(missing, numpy.isnan(actual)):
+        return False
+
+    return numpy.allclose(expected[~missing], actual[~missing], tolerance, tolerance)
+
+def time_implementation(prepare, run, inputs, repeat=3):
+    """ Times an implementation of a stage
+
+    :param prepare: function building the arguments of run from the inputs
+    :param run: function implementing the stage
+    :param inputs: dictionary as returned by generate_inputs
+    :param repeat: number of timed runs
+    :return: tuple containing the result of the last run and the best time in seconds
+    """
+    best = None
+    for attempt in range(repeat):
+        args = prepare(inputs)
+        start = timeit.default_timer()
+        result = run(*args)
+        elapsed = timeit.default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return (result, best)
+
+def run_suite(sizes=SIZES, stages=STAGES, repeat=3, seed=0):
+    """ Runs and cross-checks every implementation of every stage at every size
+
+    :param sizes: numbers of readings to run the stages with
+    :param stages: names of the stages to run
+    :param repeat: number of timed runs of each implementation
+    :param seed: seed of the synthetic datasets
+    :return: dictionary containing the list of 'results', each a dictionary
+    of the 'stage', 'implementation', 'size' and 'seconds', and the list of
+    'mismatches' of implementations disagreeing with the first of their stage
+    """
+    results = []
+    mismatches = []
+
+    for size in sizes:
+        inputs = generate_inputs(size, seed)
+        for stage in stages:
+            reference = None
+            for name, prepare, run, normalize in IMPLEMENTATIONS[stage]:
+                if name == 'helpers' and 'tuples' not in inputs:
+                    continue
+                result, seconds = time_implementation(prepare, run, inputs, repeat)
+                output = normalize(result)
+                results.append({'stage': stage, 'implementation': name, 'size': size,
+                                'seconds': seconds})
+
+                if reference is None:
+                    reference = (name, output)
+                elif not outputs_agree(reference[1], output):
+                    mismatches.append({'stage': stage, 'implementation': name, 'size': size,
+                                       'reference': reference[0]})
+
+    return {'results': results, 'mismatches': mismatches}
+
+def load_history(history_file):
+    """ Loads the timing history, an empty history if the file does not exist
+
+    :param history_file: string representing path of the JSON history
+    :return: dictionary containing the list of previous 'runs'
+    """
+    if not os.path.exists(history_file):
+        return {'runs': []}
+
+    with open(history_file) as fp:
+        return json.load(fp)
+
+def find_regressions(results, history, threshold=DEFAULT_THRESHOLD, window=HISTORY_WINDOW,
+                     min_seconds=MIN_SECONDS):
+    """ Compares timings against the mean of their recent history
+
+    :param results: list of timings as returned by run_suite
+    :param history: dictionary as returned by load_history
+    :param threshold: fraction a timing may exceed its history by
+    :param window: number of recent runs the history mean is taken over
+    :param min_seconds: timings below this are never flagged
+    :return: list of the regressed results, each with its 'history' mean
+    """
+    previous = {}
+    for run in history['runs']:
+        for result in run['results']:
+            key = (result['stage'], result['implementation'], result['size'])
+            previous.setdefault(key, []).append(result['seconds'])
+
+    regressions = []
+    for result in results:
+        timings = previous.get((result['stage'], result['implementation'], result['size']))
+        if not timings or result['seconds'] < min_seconds:
+            continue
+        mean = sum(timings[-window:]) / len(timings[-window:])
+        if result['seconds'] > mean * (1 + threshold):
+            regressions.append(dict(result, history=mean))
+
+    return regressions
+
+def record_run(history_file, history, results):
+    """ Appends the timings of a run to the history file
+
+    :param history_file: string representing path of the JSON history
+    :param history: dictionary as returned by load_history
+    :param results: list of timings as returned by run_suite
+    """
+    history['runs'].append({
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'results': results
+    })
+    with open(history_file, 'w') as fp:
+        json.dump(history, fp, indent=2, sort_keys=True)
+
+def check_regressions(sizes=SIZES, history_file=HISTORY_FILE, threshold=DEFAULT_THRESHOLD,
+                      repeat=3, seed=0, min_seconds=MIN_SECONDS):
+    """ Runs the suite, checks it against the history and records it
+
+    :param sizes: numbers of readings to run the stages with
+    :param history_file: string representing path of the JSON history
+    :param threshold: fraction a timing may exceed its history by
+    :param repeat: number of timed runs of each implementation
+    :param seed: seed of the synthetic datasets
+    :param min_seconds: timings below this are never flagged
+    :return: dictionary as returned by run_suite with the list of 'regressions'
+    """
+    history = load_history(history_file)
+    suite = run_suite(sizes, repeat=repeat, seed=seed)
+    suite['regressions'] = find_regressions(suite['results'], history, threshold,
+                                            min_seconds=min_seconds)
+    record_run(history_file, history, suite['results'])
+
+    return suite
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the stages for equivalence and performance regressions')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='numbers of readings')
+    parser.add_argument('--history', default=HISTORY_FILE, help='path of the JSON timing history')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='fraction a stage may slow down before failing')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs of each implementation')
+    args = parser.parse_args()
+
+    suite = check_regressions(args.sizes, args.history, args.threshold, args.repeat)
+
+    for result in suite['results']:
+        print "%-12s %-12s %10d %10.4f" % (result['stage'], result['implementation'],
+                                           result['size'], result['seconds'])
+    for mismatch in suite['mismatches']:
+        print "MISMATCH %(stage)s: %(implementation)s disagrees with %(reference)s at %(size)d" % mismatch
+    for regression in suite['regressions']:
+        print "REGRESSION %(stage)s: %(implementation)s took %(seconds).4fs at %(size)d " \
+              "(history %(history).4fs)" % regression
+
+    sys.exit(1 if suite['mismatches'] or suite['regressions'] else 0)
@@ -0,0 +1,156 @@
+""" This file contains the SensorFrame, the compact container for the readings
+of every sensor shared by helpers.py, baseline.py and the notebook.
+
+All readings are stored in one flat 2xN float array, temperatures in the
+first row and humidities in the second, grouped by sensor. Like a CSR matrix
+the frame keeps the offset of each sensor's first reading, so a sensor's 2D
+array of readings is a zero-copy view of the flat array. A frame behaves like
+the dictionaries mapping sensors to 2D arrays used by the baseline functions,
+and adapters convert from and to the lists of tuples used by helpers.py.
+"""
+
+import numpy
+
+
+class SensorFrame(object):
+    """ Readings of every sensor in flat arrays with per-sensor offsets """
+    __slots__ = ('readings', 'sensors', 'offsets', '_index')
+
+    def __init__(self, readings, sensors, offsets):
+        """
+        :param readings: 2xN array of temp. and humidity readings grouped by sensor
+        :param sensors: sequence of sensor ids in the order of their readings
+        :param offsets: array of len(sensors) + 1 offsets of each sensor's first
+        reading, the last one being N
+        """
+        self.readings = readings
+        self.sensors = [str(sensor) for sensor in sensors]
+        self.offsets = numpy.asarray(offsets, dtype=numpy.int64)
+        self._index = {sensor: i for (i, sensor) in enumerate(self.sensors)}
+
+    """Begin constructors"""
+    @classmethod
+    def from_columns(cls, columns):
+        """ Returns a frame sharing the arrays of a columnar dataset
+
+        :param columns: dictionary of columns as returned by
+        ingest.read_ibrl_columns
+        :return: SensorFrame
+        """
+        return cls(columns['readings'], columns['sensors'], columns['offsets'])
+
+    @classmethod
+    def from_measurements(cls, measurements, dtype=float):
+        """ Packs a dictionary of per-sensor 2D arrays into a frame
+
+        :param measurements: dictionary mapping sensors to 2D arrays of temp.
+        and humidity readings
+        :param dtype: dtype of the packed readings
+        :return: SensorFrame
+        """
+        sensors = sorted(measurements)
+        offsets = numpy.cumsum([0] + [numpy.shape(measurements[sensor])[1] for sensor in sensors])
+
+        readings = numpy.empty((2, offsets[-1]), dtype)
+        for i, sensor in enumerate(sensors):
+            readings[:, offsets[i]:offsets[i + 1]] = measurements[sensor]
+
+        return cls(readings, sensors, offsets)
+
+    @classmethod
+    def from_tuples(cls, tuple_readings, dtype=float):
+        """ Packs a dictionary of lists of (temp., humidity) tuples, as used by
+        helpers.py, into a frame
+
+        :param tuple_readings: dictionary mapping sensors to lists of tuples
+        :param dtype: dtype of the packed readings
+        :return: SensorFrame
+        """
+        sensors = sorted(tuple_readings)
+        offsets = numpy.cumsum([0] + [len(tuple_readings[sensor]) for sensor in sensors])
+
+        readings = numpy.empty((2, offsets[-1]), dtype)
+        for i, sensor in enumerate(sensors):
+            if tuple_readings[sensor]:
+                readings[:, offsets[i]:offsets[i + 1]] = numpy.transpose(tuple_readings[sensor])
+
+        return cls(readings, sensors, offsets)
+
+    """Begin adapters"""
+    def as_measurements(self):
+        """ Returns the dictionary of per-sensor views the baseline functions use
+
+        :return: dictionary mapping sensors to 2D arrays of temp. and humidity readings
+        """
+        return dict(self.iteritems())
+
+    def to_tuples(self):
+        """ Returns the dictionary of lists of tuples used by helpers.py
+
+        :return: dictionary mapping sensors to lists of (temp., humidity) tuples
+        """
+        return {sensor: zip(readings[0].tolist(), readings[1].tolist())
+                for (sensor, readings) in self.iteritems()}
+
+    @property
+    def sensor_id(self):
+        """ Index of the sensor of every reading """
+        return numpy.repeat(numpy.arange(len(self.sensors), dtype=numpy.int32),
+                            numpy.diff(self.offsets))
+
+    @property
+    def sizes(self):
+        """ Number of readings of every sensor """
+        return numpy.diff(self.offsets)
+
+    def successive_differences(self):
+        """ Calculates the successive differences of every sensor into a new
+        frame backed by a single array
+
+        :return: SensorFrame of the successive differences
+        """
+        sizes = numpy.maximum(self.sizes - 1, 0)
+        offsets = numpy.concatenate(([0], numpy.cumsum(sizes)))
+        differences = numpy.empty((2, offsets[-1]), self.readings.dtype)
+
+        for i in range(len(self.sensors)):
+            readings = self.readings[:, self.offsets[i]:self.offsets[i + 1]]
+            numpy.subtract(readings[:, 1:], readings[:, :-1],
+                           out=differences[:, offsets[i]:offsets[i + 1]])
+
+        return SensorFrame(differences, self.sensors, offsets)
+
+    """Begin mapping interface"""
+    def __len__(self):
+        return len(self.sensors)
+
+    def __iter__(self):
+        return iter(self.sensors)
+
+    def __contains__(self, sensor):
+        return sensor in self._index
+
+    def __getitem__(self, sensor):
+        i = self._index[sensor]
+        return self.readings[:, self.offsets[i]:self.offsets[i + 1]]
+
+    def __setitem__(self, sensor, readings):
+        """ Overwrites a sensor's readings in place, the number of readings of a
+        sensor cannot change """
+        self[sensor][...] = readings
+
+    def keys(self):
+        return list(self.sensors)
+
+    def values(self):
+        return [self[sensor] for sensor in self.sensors]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def iteritems(self):
+        for i, sensor in enumerate(self.sensors):
+            yield (sensor, self.readings[:, self.offsets[i]:self.offsets[i + 1]])
+
+    def __repr__(self):
+        return '<SensorFrame: %d sensors, %d readings>' % (len(self.sensors), self.readings.shape[1])
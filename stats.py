@@ -0,0 +1,217 @@
+""" This file contains the sufficient statistics used when modeling ellipsoid
+boundaries from sensor readings.
+
+The orientation of an ellipsoid only depends on the count and a handful of
+sums over a sensor's readings. Keeping those sums instead of the readings
+lets them be filled in one vectorized pass, merged across chunks, sensors
+and processes, and turned into theta in constant time.
+"""
+
+import math
+import numpy
+
+
+class SufficientStatistics(object):
+    """ Count and sums of a set of temp. and humidity readings
+
+    Statistics of disjoint sets of readings are merged by adding their fields.
+    """
+    __slots__ = ('n', 'sum_t', 'sum_h', 'sum_th', 'sum_tt', 'sum_hh')
+
+    def __init__(self, n=0, sum_t=0.0, sum_h=0.0, sum_th=0.0, sum_tt=0.0, sum_hh=0.0):
+        self.n = n
+        self.sum_t = sum_t
+        self.sum_h = sum_h
+        self.sum_th = sum_th
+        self.sum_tt = sum_tt
+        self.sum_hh = sum_hh
+
+    @classmethod
+    def from_readings(cls, readings):
+        """ Returns the statistics of a 2D array of temp. and humidity readings
+
+        :param readings: 2D array of temp. and humidity readings
+        :return: SufficientStatistics of the readings
+        """
+        return cls().update(readings)
+
+    @classmethod
+    def combine(cls, statistics):
+        """ Merges any number of statistics into new statistics
+
+        :param statistics: iterable of SufficientStatistics
+        :return: SufficientStatistics of all of the underlying readings
+        """
+        combined = cls()
+        for other in statistics:
+            combined.merge(other)
+
+        return combined
+
+    def update(self, readings):
+        """ Adds a 2D array of temp. and humidity readings to the statistics
+
+        :param readings: 2D array of temp. and humidity readings
+        :return: the updated statistics
+        """
+        readings = numpy.asarray(readings, float)
+        products = numpy.dot(readings, readings.T) # [[tt, th], [ht, hh]]
+        sums = readings.sum(axis=1)
+
+        self.n += readings.shape[1]
+        self.sum_t += sums[0]
+        self.sum_h += sums[1]
+        self.sum_th += products[0, 1]
+        self.sum_tt += products[0, 0]
+        self.sum_hh += products[1, 1]
+
+        return self
+
+    def merge(self, other):
+        """ Adds the statistics of another disjoint set of readings
+
+        :param other: SufficientStatistics to merge into these statistics
+        :return: the merged statistics
+        """
+        self.n += other.n
+        self.sum_t += other.sum_t
+        self.sum_h += other.sum_h
+        self.sum_th += other.sum_th
+        self.sum_tt += other.sum_tt
+        self.sum_hh += other.sum_hh
+
+        return self
+
+    def subtract(self, other):
+        """ Removes the statistics of a subset of the underlying readings
+
+        :param other: SufficientStatistics of readings previously added
+        :return: the remaining statistics
+        """
+        self.n -= other.n
+        self.sum_t -= other.sum_t
+        self.sum_h -= other.sum_h
+        self.sum_th -= other.sum_th
+        self.sum_tt -= other.sum_tt
+        self.sum_hh -= other.sum_hh
+
+        return self
+
+    def push(self, temp, humidity):
+        """ Adds a single reading to the statistics in constant time
+
+        :param temp: temperature reading
+        :param humidity: humidity reading
+        :return: the updated statistics
+        """
+        self.n += 1
+        self.sum_t += temp
+        self.sum_h += humidity
+        self.sum_th += temp * humidity
+        self.sum_tt += temp * temp
+        self.sum_hh += humidity * humidity
+
+        return self
+
+    def pop(self, temp, humidity):
+        """ Removes a single reading previously pushed in constant time
+
+        Once no readings are left the sums are reset, so rounding errors of
+        earlier additions and removals do not carry over.
+
+        :param temp: temperature reading
+        :param humidity: humidity reading
+        :return: the updated statistics
+        """
+        self.n -= 1
+        if not self.n:
+            self.sum_t = self.sum_h = self.sum_th = self.sum_tt = self.sum_hh = 0.0
+            return self
+
+        self.sum_t -= temp
+        self.sum_h -= humidity
+        self.sum_th -= temp * humidity
+        self.sum_tt -= temp * temp
+        self.sum_hh -= humidity * humidity
+
+        return self
+
+    def __add__(self, other):
+        return SufficientStatistics().merge(self).merge(other)
+
+    def __sub__(self, other):
+        return SufficientStatistics().merge(self).subtract(other)
+
+    def mean(self):
+        """ Calculates the means of the underlying readings
+
+        :return: tuple containing the temperature and humidity means
+        """
+        return (self.sum_t / self.n, self.sum_h / self.n)
+
+    def std(self):
+        """ Calculates the (population) standard deviations of the underlying
+        readings
+
+        :return: tuple containing the temperature and humidity standard deviations
+        """
+        mean_t, mean_h = self.mean()
+
+        return (math.sqrt(max(self.sum_tt / self.n - mean_t * mean_t, 0.0)),
+                math.sqrt(max(self.sum_hh / self.n - mean_h * mean_h, 0.0)))
+
+    def orientation(self):
+        """ Calculates the orientation of the underlying readings
+
+        :return: float, theta of ellipsoid orientation
+        """
+        tan_theta = (self.n * self.sum_th - self.sum_t * self.sum_h) / \
+            (self.n * self.sum_tt - math.pow(self.sum_t, 2))
+
+        return math.atan(tan_theta)
+
+
+class RunningStatistics(object):
+    """ Running means and co-moments of a stream of temp. and humidity readings
+
+    Readings are added one at a time with Welford's update, which is
+    numerically stable and takes constant time and memory per reading.
+    """
+    __slots__ = ('n', 'mean_t', 'mean_h', 'm2_t', 'm2_h', 'c_th')
+
+    def __init__(self):
+        self.n = 0
+        self.mean_t = 0.0
+        self.mean_h = 0.0
+        self.m2_t = 0.0
+        self.m2_h = 0.0
+        self.c_th = 0.0
+
+    def push(self, temp, humidity):
+        """ Adds a single reading to the statistics
+
+        :param temp: temperature reading
+        :param humidity: humidity reading
+        :return: the updated statistics
+        """
+        self.n += 1
+        delta_t = temp - self.mean_t
+        delta_h = humidity - self.mean_h
+        self.mean_t += delta_t / self.n
+        self.mean_h += delta_h / self.n
+        self.m2_t += delta_t * (temp - self.mean_t)
+        self.m2_h += delta_h * (humidity - self.mean_h)
+        self.c_th += delta_t * (humidity - self.mean_h)
+
+        return self
+
+    def orientation(self):
+        """ Calculates the orientation of the readings seen so far
+
+        :return: float, theta of ellipsoid orientation or None while the
+        temperatures have no spread
+        """
+        if self.m2_t <= 0:
+            return None
+
+        return math.atan(self.c_th / self.m2_t)
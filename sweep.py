@@ -0,0 +1,129 @@
+""" This file contains the parameter sweep used to tune the a and b (and
+optionally theta) parameters of the ellipsoid boundary.
+
+Rather than re-running generate_ellipsoid for one pair of parameters at a
+time, every candidate ellipse of a grid is counted from sorted thresholds.
+The differences are rotated once per theta into (u, v). For a given a, a
+difference lies inside the ellipse u^2 / a^2 + v^2 / b^2 <= 1 exactly when
+b^2 >= v^2 / (1 - u^2 / a^2), so sorting those thresholds once per (theta, a)
+counts the inliers of every b with a single searchsorted, in
+O(|theta| |a| N log N) rather than O(|theta| |a| |b| N).
+"""
+
+import numpy
+
+import stats
+from sensorframe import SensorFrame
+
+
+def _flatten(differences):
+    """ Returns the differences of every sensor as a single 2xN array
+
+    :param differences: SensorFrame, dictionary mapping sensors to 2D arrays of
+    successive differences or a single 2D array
+    :return: 2xN float array
+    """
+    if isinstance(differences, SensorFrame):
+        return differences.readings
+    if isinstance(differences, dict):
+        return numpy.hstack([differences[sensor] for sensor in sorted(differences)])
+
+    return numpy.asarray(differences, float)
+
+def mean_orientation(differences):
+    """ Returns the mean of the orientations of every sensor, the theta that
+    generate_regional_ellipsoid_parameters gives a region
+
+    Sensors whose orientation is not finite, such as sensors without
+    differences, are left out as they are from the regional ellipsoid.
+
+    :param differences: SensorFrame, dictionary mapping sensors to 2D arrays of
+    successive differences or a single 2D array of one sensor
+    :return: float, mean theta or NaN if no sensor has an orientation
+    """
+    if isinstance(differences, (SensorFrame, dict)):
+        sensors = [differences[sensor] for sensor in differences]
+    else:
+        sensors = [numpy.asarray(differences, float)]
+    thetas = numpy.array([stats.SufficientStatistics.from_readings(readings).orientation()
+                          for readings in sensors], float)
+    thetas = thetas[numpy.isfinite(thetas)]
+
+    return thetas.mean() if len(thetas) else float('nan')
+
+def count_inliers(u2, v2, a, b_values):
+    """ Counts the rotated differences inside the ellipse of a and each b
+
+    :param u2: squared coordinates of the differences along the a axis
+    :param v2: squared coordinates of the differences along the b axis
+    :param a: a parameter of the ellipses
+    :param b_values: array of candidate b parameters
+    :return: int array of the number of inliers of each b
+    """
+    scaled = u2 / (a * a)
+    inside = scaled < 1
+    thresholds = numpy.sort(v2[inside] / (1 - scaled[inside]))
+
+    # Differences on the tip of the a axis are inside for every b
+    tips = numpy.count_nonzero((scaled == 1) & (v2 == 0))
+
+    return numpy.searchsorted(thresholds, numpy.square(b_values), side='right') + tips
+
+def sweep_ellipse_parameters(differences, a_values, b_values, theta_values=None):
+    """ Counts the inliers and anomalies of every candidate ellipse of a grid
+
+    :param differences: SensorFrame or dictionary mapping sensors to 2D arrays
+    of successive differences
+    :param a_values: sequence of candidate a parameters
+    :param b_values: sequence of candidate b parameters
+    :param theta_values: optional sequence of candidate thetas, defaults to the
+    mean orientation of the sensors as returned by mean_orientation
+    :return: dictionary containing the 'a', 'b' and 'theta' grids and the
+    'inliers' and 'anomalies' counts of each candidate, arrays of shape
+    (len(a_values), len(b_values), len(theta_values))
+    """
+    points = _flatten(differences)
+    a_values = numpy.asarray(a_values, float)
+    b_values = numpy.asarray(b_values, float)
+    if theta_values is None:
+        theta_values = [mean_orientation(differences)]
+    theta_values = numpy.asarray(theta_values, float)
+
+    inliers = numpy.zeros((len(a_values), len(b_values), len(theta_values)), numpy.int64)
+    for k, theta in enumerate(theta_values):
+        cos_theta = numpy.cos(theta)
+        sin_theta = numpy.sin(theta)
+        u2 = numpy.square(points[0] * cos_theta + points[1] * sin_theta)
+        v2 = numpy.square(points[1] * cos_theta - points[0] * sin_theta)
+
+        for i, a in enumerate(a_values):
+            inliers[i, :, k] = count_inliers(u2, v2, a, b_values)
+
+    a_grid, b_grid, theta_grid = numpy.meshgrid(a_values, b_values, theta_values, indexing='ij')
+
+    return {
+        'a': a_grid,
+        'b': b_grid,
+        'theta': theta_grid,
+        'inliers': inliers,
+        'anomalies': points.shape[1] - inliers
+    }
+
+def best_parameters(sweep, anomaly_rate):
+    """ Picks the smallest candidate ellipse whose anomaly rate does not exceed
+    a target rate
+
+    :param sweep: dictionary as returned by sweep_ellipse_parameters
+    :param anomaly_rate: highest acceptable fraction of anomalies
+    :return: tuple (a, b, theta) of the candidate with the smallest area
+    meeting the rate, or None if no candidate does
+    """
+    total = sweep['inliers'] + sweep['anomalies']
+    rates = sweep['anomalies'] / numpy.maximum(total, 1).astype(float)
+    area = numpy.where(rates <= anomaly_rate, sweep['a'] * sweep['b'], numpy.inf)
+    if not numpy.isfinite(area).any():
+        return None
+
+    index = numpy.unravel_index(numpy.argmin(area), area.shape)
+
+    return (sweep['a'][index], sweep['b'][index], sweep['theta'][index])
@@ -0,0 +1,176 @@
+"""Test cases for baseline code."""
+
+import unittest
+
+import numpy
+
+import baseline
+import helpers
+
+
+class testBaseline(unittest.TestCase):
+
+    def setUp(self):
+
+        # Original test data dict "Sensor: [[temps], [humidities]]"
+        self.measurements = {
+            '1': numpy.array([[1, 3, 2, 6, 4, 7], [5, 5, 4, 3, 1, 2]], float),
+            '2': numpy.array([[3, 8, 3, 1, 5, 2], [3, 1, 8, 6, 2, 7]], float)
+        }
+
+        # Same readings split into batches as read by ingest.stream_ibrl_data
+        self.batches = [
+            {'1': self.measurements['1'][:, :2], '2': self.measurements['2'][:, :1]},
+            {'2': self.measurements['2'][:, 1:4]},
+            {'1': self.measurements['1'][:, 2:], '2': self.measurements['2'][:, 4:]}
+        ]
+
+    def test_stream_differences(self):
+
+        differences, lookup_table = baseline.generate_differences(self.measurements)
+        streamed = list(baseline.stream_differences(self.batches))
+
+        for sensor in differences:
+            numpy.testing.assert_array_equal(
+                numpy.hstack([batch[sensor] for batch in streamed if sensor in batch]),
+                differences[sensor])
+
+    def test_stream_orientation(self):
+
+        orientations = baseline.stream_orientation(self.batches)
+
+        for sensor in self.measurements:
+            self.assertAlmostEqual(
+                baseline.calculate_ellipsoid_orientation(self.measurements[sensor]),
+                orientations[sensor],
+                10)
+
+    def test_generate_ellipsoid(self):
+
+        a = 1.7601
+        b = 4.1168
+        theta = 0.717564
+        sensor = numpy.array([[3.0, -1.0, 9.0], [0.0, 0.0, 0.0]])
+
+        ellipsoid = baseline.generate_ellipsoid(sensor, a, b, theta)
+        points = ellipsoid['ellipsoid_points']
+
+        A = baseline.calc_A(a, b, theta)
+        for i, temp in enumerate(sensor[0]):
+            B = baseline.calc_B(a, b, temp, theta)
+            C = baseline.calc_C(a, b, temp, theta)
+            for point, expected in zip(points[2*i:2*i + 2],
+                                       (baseline.calc_hi1(A, B, C), baseline.calc_hi2(A, B, C))):
+                assert point[0] == temp
+                if expected is None: # outside of the ellipsoid
+                    assert numpy.isnan(point[1])
+                else:
+                    self.assertAlmostEqual(expected, point[1], 10)
+
+    def test_generate_ellipsoid_parameters(self):
+
+        for sensor, readings in self.measurements.items():
+            expected = baseline.generate_ellipsoid(readings, 1.7601, 4.1168)
+            parameters = baseline.generate_ellipsoid_parameters(readings, 1.7601, 4.1168)
+
+            assert sorted(parameters) == ['a', 'b', 'n', 'theta']
+            for key in parameters:
+                assert parameters[key] == expected[key]
+
+    def test_ellipsoid_boundary(self):
+
+        boundary = baseline.ellipsoid_boundary(1.7601, 4.1168, 0.717564, 64)
+
+        assert boundary.shape == (65, 2)
+        assert baseline.ellipsoid_boundary(1.7601, 4.1168, 0.717564, 64) is boundary
+        numpy.testing.assert_array_equal(boundary[0], boundary[-1])
+        assert not boundary.flags.writeable
+
+        # The boundary separates true measurements from anomalies
+        ellipsoid = (1.7601, 4.1168, 0.717564)
+        assert not baseline.is_anomaly(0.999 * boundary.T, ellipsoid).any()
+        assert baseline.is_anomaly(1.001 * boundary.T, ellipsoid).all()
+
+    def test_detect_anomalies(self):
+
+        aggregate_ellipsoid = (1.7601, 4.1168, 0.717564)
+        differences, lookup_table = baseline.generate_differences(self.measurements)
+
+        anomaly_masks = baseline.detect_anomalies(differences, aggregate_ellipsoid)
+        true_measurements, anomalies = baseline.inverse_transformation(
+            differences, aggregate_ellipsoid)
+
+        for sensor in differences:
+            expected = [helpers.is_anomaly(reading, aggregate_ellipsoid)
+                        for reading in differences[sensor].T]
+            assert list(anomaly_masks[sensor]) == expected
+            assert list(anomalies[sensor]) == [i for i in range(len(expected)) if expected[i]]
+            assert list(true_measurements[sensor]) == [i for i in range(len(expected)) if not expected[i]]
+            assert baseline.is_anomaly(differences[sensor][:, 0], aggregate_ellipsoid) == expected[0]
+
+    def test_randomize_readings(self):
+
+        original = {sensor: readings.copy() for (sensor, readings) in self.measurements.items()}
+        shuffled = {sensor: readings.copy() for (sensor, readings) in self.measurements.items()}
+
+        permutations = baseline.permute_readings(shuffled, seed=1)
+
+        for sensor in original:
+            numpy.testing.assert_array_equal(shuffled[sensor], original[sensor][:, permutations[sensor]])
+            assert sorted(permutations[sensor]) == range(original[sensor].shape[1])
+
+        # the same seed reproduces the same shuffle
+        baseline.randomize_readings(self.measurements, seed=1)
+        for sensor in original:
+            numpy.testing.assert_array_equal(shuffled[sensor], self.measurements[sensor])
+
+    def test_generate_differences(self):
+
+        differences, lookup_table = baseline.generate_differences(self.measurements)
+
+        numpy.testing.assert_array_equal(differences['1'], [[2, -1, 4, -2, 3], [0, -1, -1, -2, 1]])
+        numpy.testing.assert_array_equal(baseline.successive_diff(self.measurements['2'][0]),
+                                         [5, -5, -2, 4, -3])
+
+    def test_lookup_table(self):
+
+        original = {sensor: readings.copy() for (sensor, readings) in self.measurements.items()}
+        permutations = {}
+        baseline.randomize_readings(self.measurements, seed=1, permutations=permutations)
+        differences, lookup_table = baseline.generate_differences(self.measurements, permutations)
+
+        anomalies = {sensor: numpy.arange(differences[sensor].shape[1]) for sensor in differences}
+        raw_readings = baseline.lookup_raw_readings(lookup_table, anomalies)
+
+        for sensor in differences:
+            assert lookup_table[sensor].dtype == numpy.int32
+            numpy.testing.assert_array_equal(lookup_table[sensor], permutations[sensor])
+            first, second = raw_readings[sensor]
+            numpy.testing.assert_array_equal(differences[sensor],
+                                             original[sensor][:, second] - original[sensor][:, first])
+
+        # Unshuffled readings are differenced in their raw order
+        differences, lookup_table = baseline.generate_differences(original)
+        numpy.testing.assert_array_equal(lookup_table['1'], range(6))
+        numpy.testing.assert_array_equal(baseline.lookup_raw_readings(lookup_table, {'1': [4]})['1'],
+                                         [[4], [5]])
+
+    def test_standardize_readings(self):
+
+        original = {sensor: readings.copy() for (sensor, readings) in self.measurements.items()}
+        standardized, statistics = baseline.standardize_readings(self.measurements)
+
+        for sensor, readings in original.items():
+            expected = helpers.standardize_readings({sensor: map(tuple, readings.T)})[sensor]
+            numpy.testing.assert_allclose(standardized[sensor].T, expected)
+
+        # float32 output leaves the (standardized) input untouched
+        float_readings, float_statistics = baseline.standardize_readings(
+            original, dtype=numpy.float32)
+        assert float_readings['1'].dtype == numpy.float32
+        numpy.testing.assert_allclose(float_readings['1'], standardized['1'], rtol=1e-6)
+
+        # cached statistics map the readings back to raw units
+        baseline.inverse_standardization(standardized, statistics)
+        for sensor, readings in original.items():
+            numpy.testing.assert_allclose(standardized[sensor], readings)
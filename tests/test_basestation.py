@@ -0,0 +1,80 @@
+"""Test cases for the base station service."""
+
+import unittest
+
+import numpy
+
+import baseline
+import basestation
+import regions
+
+
+class testBaseStation(unittest.TestCase):
+
+    def setUp(self):
+
+        self.station = basestation.BaseStation({1: regions.ROOT_REGION, 2: regions.ROOT_REGION,
+                                                3: regions.ROOT_REGION})
+        self.updates = [(1, 0, 1.5, 4.0, 0.7, 10), (2, 0, 2.5, 3.0, -0.1, 20),
+                        (1, 1, 1.7, 4.2, 0.6, 15)]
+
+    def test_protocol(self):
+
+        data = basestation.encode_updates(self.updates)
+        assert len(data) == 3 * basestation.UPDATE_DTYPE.itemsize == 108
+
+        updates, remainder = basestation.decode_updates(data[:-5])
+        assert len(updates) == 2 and remainder == data[72:-5]
+        assert updates.tolist() == self.updates[:2]
+
+        acks = self.station.apply_updates(basestation.decode_updates(data)[0])
+        assert basestation.decode_acks(acks.tobytes()).tolist() == acks.tolist()
+
+    def test_apply_updates(self):
+
+        acks = self.station.apply_updates(
+            basestation.decode_updates(basestation.encode_updates(self.updates + [(4, 2, 1, 1, 0, 1)]))[0])
+
+        assert list(acks['sequence']) == [0, 0, 1, 2]
+        assert list(acks['status']) == [basestation.STATUS_OK] * 3 + [basestation.STATUS_UNKNOWN_SENSOR]
+        assert self.station.updates == 4 and self.station.rejected == 1
+
+        # The regional values are those of the latest parameters of every sensor
+        expected = baseline.generate_regional_ellipsoid_parameters({
+            1: {'a': 1.7, 'b': 4.2, 'theta': 0.6}, 2: {'a': 2.5, 'b': 3.0, 'theta': -0.1}})
+        numpy.testing.assert_allclose(self.station.regional_ellipsoid(), expected)
+        numpy.testing.assert_allclose(list(acks[2])[2:], expected)
+        numpy.testing.assert_allclose(list(acks[0])[2:], (1.5, 4.0, 0.7))
+
+    def test_bad_packet(self):
+
+        self.station.apply_updates(basestation.decode_updates(basestation.encode_updates(self.updates))[0])
+        expected = self.station.regional_ellipsoid()
+        sums = self.station.tree.sums.copy()
+
+        nan, inf = float('nan'), float('inf')
+        acks = self.station.apply_updates(basestation.decode_updates(basestation.encode_updates([
+            (1, 2, nan, 4.0, 0.7, 10), (2, 1, 2.5, inf, -0.1, 20), (3, 0, 1.0, 1.0, -inf, 5),
+            (7, 0, 1.0, 1.0, 0.0, 5), (3, 1, 2.0, 3.0, 0.2, 5)]))[0])
+
+        assert list(acks['status']) == [basestation.STATUS_INVALID] * 3 + [
+            basestation.STATUS_UNKNOWN_SENSOR, basestation.STATUS_OK]
+        assert self.station.rejected == 4
+        numpy.testing.assert_allclose(list(acks[3])[2:], expected)
+        assert numpy.isfinite(self.station.tree.sums).all()
+
+        # Only the valid update moved the regional values
+        numpy.testing.assert_allclose(self.station.tree.sums[:, 0], sums[:, 0] + 1)
+        assert numpy.isfinite(self.station.regional_ellipsoid()).all()
+
+    def test_load_test(self):
+
+        summary = basestation.run_load_test(nodes=50, updates=3, connections=8, seed=1)
+
+        assert summary['updates'] == 150 and summary['failed'] == 0
+        assert summary['throughput'] > 0 and summary['latency_max'] >= summary['latency_p50']
+
+        expected = baseline.generate_regional_ellipsoid_parameters({
+            sensor_id: {'a': a, 'b': b, 'theta': theta}
+            for (sensor_id, (a, b, theta)) in summary['reported'].items()})
+        numpy.testing.assert_allclose(summary['regional_ellipsoid'], expected)
@@ -0,0 +1,76 @@
+"""Test cases for the batch command line tool."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import batch
+import synthetic
+
+
+class testBatch(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.tmp_dir, 'results')
+        os.makedirs(os.path.join(self.tmp_dir, 'logs', 'day2'))
+
+        self.datasets = [os.path.join(self.tmp_dir, 'logs', 'sensors.csv'),
+                         os.path.join(self.tmp_dir, 'logs', 'day2', 'sensors.csv')]
+        for seed, data_file in enumerate(self.datasets):
+            synthetic.write_ibrl_csv(data_file, sensors=3, readings=40, seed=seed)
+        with open(os.path.join(self.tmp_dir, 'logs', 'notes.txt'), 'w') as fp:
+            fp.write('not a dataset')
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_find_datasets(self):
+
+        assert batch.find_datasets([os.path.join(self.tmp_dir, 'logs')]) == sorted(self.datasets)
+
+    def test_run_batch(self):
+
+        for processes in (1, 2):
+            summary = batch.run_batch('detect', self.datasets, self.output_dir, processes, seed=1)
+
+            assert summary['datasets'] == 2 and summary['failed'] == []
+            assert summary['rows'] == 240
+            for data_file in self.datasets:
+                result = summary['results'][data_file]
+                assert result['sensors'] == 3
+                assert result['anomaly_count'] == sum(result['anomalies'].values())
+            assert summary['anomaly_count'] == sum(result['anomaly_count']
+                                                   for result in summary['results'].values())
+
+        report = batch.summarize_results(batch.load_results(self.output_dir, 'detect'))
+        assert report['results'] == summary['results']
+
+    def test_failed_dataset(self):
+
+        missing = os.path.join(self.tmp_dir, 'missing.csv')
+        summary = batch.run_batch('model', [missing] + self.datasets, self.output_dir, 1)
+
+        assert summary['failed'] == [missing]
+        assert summary['rows'] == 240
+        assert 'anomaly_count' not in summary
+        assert len(summary['results'][self.datasets[0]]['regional_ellipsoid']) == 3
+
+    def test_report_mixed_commands(self):
+
+        batch.run_batch('ingest', self.datasets, self.output_dir, 1)
+        batch.run_batch('detect', self.datasets, self.output_dir, 1, seed=1)
+
+        report = batch.summarize_results(batch.load_results(self.output_dir))
+        assert report['datasets'] == 2 and report['rows'] == 240
+        for data_file in self.datasets:
+            assert report['results'][data_file]['command'] == 'detect'
+
+    def test_result_file(self):
+
+        names = set(batch.result_file(self.output_dir, data_file, 'detect')
+                    for data_file in ('x.csv', '../x.csv', 'a_b/c.csv', 'a/b_c.csv'))
+        assert len(names) == 4
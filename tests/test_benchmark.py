@@ -0,0 +1,69 @@
+"""Test cases for the benchmarking harness."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import benchmark
+
+
+class testBenchmark(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp_dir, 'ibrl.csv')
+
+        with open(self.data_file, 'w') as fp:
+            for i in range(60):
+                fp.write('%s,%s,%s,%s,%s\n' % (18 + (i * 7) % 5, 35 + (i * 3) % 11, i, 1 + i % 3, i))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_run_blocks(self):
+
+        block_benchmarks = benchmark.run_blocks(self.data_file)
+
+        assert sorted(block_benchmarks) == sorted(benchmark.PHASES)
+        assert block_benchmarks['ingest']['rows'] == 60
+        assert block_benchmarks['differences']['rows'] == 60
+        assert block_benchmarks['detection']['rows'] == 57
+        assert block_benchmarks['regional']['rows'] == 3
+
+    def test_block_peak_memory(self):
+
+        if not benchmark.reset_peak_memory():
+            self.skipTest('resident high-water mark cannot be reset here')
+
+        large = benchmark.measure_block(lambda: len(bytearray(64 << 20)))[1]
+        small = benchmark.measure_block(lambda: None)[1]
+
+        assert large['memory_growth'] > 32 << 10
+        assert small['memory_growth'] < 8 << 10
+        assert small['peak_memory'] < large['peak_memory']
+
+    def test_cold_trials(self):
+
+        trial_benchmarks = benchmark.run_trials(self.data_file, trials=1, cold=True)
+
+        assert len(trial_benchmarks) == 1
+        assert sorted(trial_benchmarks[0]) == sorted(benchmark.PHASES)
+        assert trial_benchmarks[0]['detection']['rows'] == 57
+
+    def test_benchmark_report(self):
+
+        report = benchmark.benchmark_report(benchmark.run_trials(self.data_file, trials=2),
+                                            self.data_file)
+        output_file = os.path.join(self.tmp_dir, 'report.json')
+        benchmark.write_benchmark_report(report, output_file)
+
+        with open(output_file) as fp:
+            written = json.load(fp)
+        assert written['trials'] == 2
+        assert written['mode'] == 'warm'
+        assert sorted(written['blocks']) == sorted(benchmark.PHASES)
+        assert 'detection' in benchmark.format_benchmark_table(report)
@@ -181,9 +181,21 @@ class testHelpers(unittest.TestCase):
                                helpers.calc_hi2(A, B, C),
                                5)
 
-    # TODO(hrybacki)
     def test_genererate_lookup_table(self):
-        pass
+
+        random.seed(1)
+        shuffled = copy.deepcopy(self.original_dict)
+        permutations = {}
+        helpers.randomize_readings(shuffled, permutations)
+        differences, lookup_table = helpers.generate_differences(shuffled, permutations)
+
+        assert shuffled == self.shuffled_dict
+        for sensor in differences:
+            original = self.original_dict[sensor]
+            for index, difference in enumerate(differences[sensor]):
+                first = original[lookup_table[sensor][index]]
+                second = original[lookup_table[sensor][index + 1]]
+                assert difference == (second[0] - first[0], second[1] - first[1])
 
     # TODO(hrybacki)
     def test_model_ellipsoid_of_single_sensor(self):
@@ -193,14 +205,29 @@ class testHelpers(unittest.TestCase):
     def test_model_region_aggregate(self):
         pass
 
-    # TODO(hrybacki)
     def test_model_inverse_transformation(self):
-        pass
 
-    # TODO(hrybacki)
+        aggregate_ellipsoid = (1.7601, 4.1168, 0.717564)
+
+        true_measurements, anomalies = helpers.inverse_transformation(
+            self.differences_dict, aggregate_ellipsoid)
+
+        for sensor in self.differences_dict:
+            assert sorted(true_measurements[sensor] + anomalies[sensor]) == \
+                sorted(self.differences_dict[sensor])
+            for reading in anomalies[sensor]:
+                assert helpers.is_anomaly(reading, aggregate_ellipsoid)
+
     def test_model_is_anomaly_true(self):
-        pass
 
-    # TODO(hrybacki)
+        aggregate_ellipsoid = (1.7601, 4.1168, 0.717564)
+
+        assert helpers.is_anomaly((3.0, -1.5), aggregate_ellipsoid)
+        assert helpers.is_anomaly((-1, 4.5), aggregate_ellipsoid)
+
     def test_model_is_anomaly_false(self):
-        pass
\ No newline at end of file
+
+        aggregate_ellipsoid = (1.7601, 4.1168, 0.717564)
+
+        assert not helpers.is_anomaly((0, 0), aggregate_ellipsoid)
+        assert not helpers.is_anomaly((3.0, -2.2), aggregate_ellipsoid)
\ No newline at end of file
@@ -0,0 +1,202 @@
+"""Test cases for the columnar input functions."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import baseline
+import ingest
+
+
+class testIngest(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp_dir, 'ibrl.csv')
+
+        # "temp, humidity, epoch, sensor id, timestamp" rows with incomplete
+        # rows mixed in and no trailing newline
+        rows = [
+            '19.9884,37.0933,2,1,1077963316.0',
+            '19.3024,38.4629,3,2,1077963337.0',
+            '19.1652,38.8039,3,1,1077963346.0',
+            '',
+            '19.175,38.8379,4,11',
+            '19.1456,38.9401,5,2,1077963418.0',
+            ' 20.5,-1.25,6,11,1077963419.0\r',
+            '18.44,37.0,7,1,1077963420.0'
+        ]
+        with open(self.data_file, 'w') as fp:
+            fp.write('\n'.join(rows))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_read_ibrl_columns(self):
+
+        columns = ingest.read_ibrl_columns(self.data_file)
+
+        assert columns['row_count'] == 8
+        assert columns['bad_count'] == 2
+        assert list(columns['sensors']) == [1, 2, 11]
+        assert list(columns['offsets']) == [0, 3, 5, 6]
+        assert list(columns['sensor_id']) == [1, 1, 1, 2, 2, 11]
+        numpy.testing.assert_array_equal(
+            columns['readings'],
+            [[19.9884, 19.1652, 18.44, 19.3024, 19.1456, 20.5],
+             [37.0933, 38.8039, 37.0, 38.4629, 38.9401, -1.25]])
+
+    def test_time_columns(self):
+
+        columns = ingest.read_ibrl_columns(self.data_file)
+
+        assert columns['epoch'].dtype == numpy.int32
+        assert list(columns['epoch']) == [2, 3, 7, 3, 5, 6]
+        numpy.testing.assert_array_equal(
+            columns['timestamp'],
+            [1077963316.0, 1077963346.0, 1077963420.0, 1077963337.0, 1077963418.0, 1077963419.0])
+
+        # a cache written before the time columns were kept is rebuilt
+        cache_dir = ingest.write_ibrl_cache(self.data_file, columns)
+        os.remove(os.path.join(cache_dir, 'epoch.npy'))
+        cached = ingest.read_cached_ibrl_columns(self.data_file)
+        numpy.testing.assert_array_equal(cached['epoch'], columns['epoch'])
+
+    def test_small_blocks(self):
+
+        expected = ingest.read_ibrl_columns(self.data_file)
+
+        for block_size in (1, 7, 64):
+            columns = ingest.read_ibrl_columns(self.data_file, block_size)
+            assert columns['row_count'] == expected['row_count']
+            assert columns['bad_count'] == expected['bad_count']
+            numpy.testing.assert_array_equal(columns['readings'], expected['readings'])
+            numpy.testing.assert_array_equal(columns['timestamp'], expected['timestamp'])
+
+    def test_mapped_blocks(self):
+
+        expected = ingest.read_ibrl_columns(self.data_file)
+
+        for block_size in (1, 7, 64, ingest.BLOCK_SIZE):
+            columns = ingest.read_ibrl_columns(self.data_file, block_size, mapped=True)
+            assert columns['row_count'] == expected['row_count']
+            assert columns['bad_count'] == expected['bad_count']
+            numpy.testing.assert_array_equal(columns['readings'], expected['readings'])
+            numpy.testing.assert_array_equal(columns['sensor_id'], expected['sensor_id'])
+
+        open(self.data_file, 'w').close()
+        assert ingest.read_ibrl_columns(self.data_file, mapped=True)['row_count'] == 0
+
+    def test_columns_to_measurements(self):
+
+        columns = ingest.read_ibrl_columns(self.data_file)
+        measurements = ingest.columns_to_measurements(columns)
+
+        assert sorted(measurements) == ['1', '11', '2']
+        numpy.testing.assert_array_equal(measurements['2'],
+                                         [[19.3024, 19.1456], [38.4629, 38.9401]])
+        # per-sensor arrays are views into the columnar readings
+        assert measurements['11'].base is columns['readings']
+
+    def test_unusable_time_fields(self):
+
+        expected = ingest.read_ibrl_columns(self.data_file)
+        with open(self.data_file, 'a') as fp:
+            fp.write('\n21.0,40.0,8.5,1,1077963421.0\n21.5,41.0,9,1,2004-02-28 00:59:16.02785'
+                     '\n22.0,42.0,x,2,yesterday')
+
+        # the readings are kept, only their time fields are missing
+        columns = ingest.read_ibrl_columns(self.data_file)
+        assert columns['row_count'] == expected['row_count'] + 3
+        assert columns['bad_count'] == expected['bad_count']
+        assert columns['bad_time_count'] == expected['bad_time_count'] + 2 == 2
+        numpy.testing.assert_array_equal(columns['readings'][:, 3:5], [[21.0, 21.5], [40.0, 41.0]])
+        numpy.testing.assert_array_equal(columns['readings'][:, 7], [22.0, 42.0])
+
+        assert list(columns['epoch'][3:5]) == [ingest.MISSING_EPOCH, 9]
+        assert columns['epoch'][7] == ingest.MISSING_EPOCH
+        self.assertAlmostEqual(columns['timestamp'][4], 1077929956.02785, 5)
+        assert numpy.isnan(columns['timestamp'][7])
+
+        cache_dir = ingest.write_ibrl_cache(self.data_file, columns)
+        assert ingest.load_ibrl_cache(cache_dir)['bad_time_count'] == 2
+
+    def test_parse_ibrl_block(self):
+
+        fields = ['-3.25', '1e3', ' 20.5', '.5', '7.', '-0', '12345678901234567.5',
+                  '0.1', '-1.000001', '42']
+        block = ''.join('%s,%s,%d,%d,%s\r\n' % (field, field[::-1].strip(' e-.') or '1',
+                                                 index, index + 1, field)
+                        for index, field in enumerate(fields))
+        values, row_count, bad_count = ingest.parse_ibrl_block(block)
+
+        assert (row_count, bad_count) == (len(fields), 0)
+        assert values[0].tolist() == [float(field) for field in fields]
+        assert values[4].tolist() == [float(field) for field in fields]
+        assert values[2].tolist() == range(len(fields))
+
+        values = ingest.parse_ibrl_block('1,2,3,4,2004-02-29 00:59:16.02785')[0]
+        assert values[4, 0] == 1078016356.02785
+
+    def test_malformed_field(self):
+
+        with open(self.data_file, 'a') as fp:
+            fp.write('\nnan?,37.0,8,1,1077963421.0\n')
+
+        self.assertRaises(ValueError, ingest.read_ibrl_columns, self.data_file)
+
+    def test_read_cached_ibrl_columns(self):
+
+        expected = ingest.read_ibrl_columns(self.data_file)
+        cache_dir = self.data_file + ingest.CACHE_SUFFIX
+
+        columns = ingest.read_cached_ibrl_columns(self.data_file)
+        assert os.path.isdir(cache_dir)
+        assert isinstance(columns['readings'], numpy.memmap)
+        assert columns['row_count'] == expected['row_count']
+        numpy.testing.assert_array_equal(columns['readings'], expected['readings'])
+
+        # touching the dataset without changing it keeps the cache
+        os.utime(self.data_file, (0, 0))
+        assert ingest.cache_is_valid(self.data_file, cache_dir)
+
+        # changing the dataset invalidates the cache
+        with open(self.data_file, 'a') as fp:
+            fp.write('\n21.0,40.0,8,3,1077963421.0')
+        assert not ingest.cache_is_valid(self.data_file, cache_dir)
+
+        columns = ingest.read_cached_ibrl_columns(self.data_file)
+        assert list(columns['sensors']) == [1, 2, 3, 11]
+
+    def test_stream_ibrl_data(self):
+
+        expected = ingest.columns_to_measurements(ingest.read_ibrl_columns(self.data_file))
+
+        batches = list(ingest.stream_ibrl_data(self.data_file, 40))
+        assert len(batches) > 1
+        assert batches[-1][1:] == (8, 2) # running row and incomplete row totals
+
+        for sensor in expected:
+            streamed = numpy.hstack([batch[sensor] for (batch, rows, bad) in batches
+                                     if sensor in batch])
+            numpy.testing.assert_array_equal(streamed, expected[sensor])
+
+    def test_stream_into_baseline(self):
+
+        measurements = ingest.columns_to_measurements(ingest.read_ibrl_columns(self.data_file))
+        differences, lookup_table = baseline.generate_differences(measurements)
+
+        streamed = list(baseline.stream_differences(ingest.stream_ibrl_data(self.data_file, 40)))
+        for sensor in ('1', '2'): # sensor 11 has a single reading
+            numpy.testing.assert_array_equal(
+                numpy.hstack([batch[sensor] for batch in streamed if sensor in batch]),
+                differences[sensor])
+
+        orientations = baseline.stream_orientation(ingest.stream_ibrl_data(self.data_file, 40))
+        self.assertAlmostEqual(baseline.calculate_ellipsoid_orientation(measurements['1']),
+                               orientations['1'], 10)
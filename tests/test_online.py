@@ -0,0 +1,112 @@
+"""Test cases for the online anomaly detector."""
+
+import unittest
+
+import numpy
+
+import baseline
+import online
+
+
+class testOnlineDetector(unittest.TestCase):
+
+    def setUp(self):
+
+        # Original test data dict "Sensor: [[temps], [humidities]]"
+        self.measurements = {
+            '1': numpy.array([[1, 3, 2, 6, 4, 7], [5, 5, 4, 3, 1, 2]], float),
+            '2': numpy.array([[3, 8, 3, 1, 5, 2], [3, 1, 8, 6, 2, 7]], float)
+        }
+        self.differences, self.lookup_table = baseline.generate_differences(self.measurements)
+
+    def feed(self, detector):
+
+        results = {sensor: [] for sensor in self.measurements}
+        for i in range(6):
+            for sensor in sorted(self.measurements):
+                temp, humidity = self.measurements[sensor][:, i]
+                results[sensor].append(detector.update(sensor, temp, humidity))
+
+        return results
+
+    def test_fixed_theta(self):
+
+        aggregate_ellipsoid = (1.7601, 4.1168, 0.717564)
+        results = self.feed(online.OnlineDetector(*aggregate_ellipsoid))
+
+        for sensor in self.measurements:
+            assert results[sensor][0] is None
+            assert results[sensor][1:] == list(
+                baseline.is_anomaly(self.differences[sensor], aggregate_ellipsoid))
+
+    def test_learned_theta(self):
+
+        detector = online.OnlineDetector(8.7886, 22.9904)
+        self.feed(detector)
+
+        thetas = [baseline.calculate_ellipsoid_orientation(self.differences[sensor])
+                  for sensor in self.differences]
+        for sensor in self.differences:
+            self.assertAlmostEqual(baseline.calculate_ellipsoid_orientation(self.differences[sensor]),
+                                   detector.sensors[sensor].theta,
+                                   10)
+        self.assertAlmostEqual(sum(thetas) / len(thetas), detector.regional_ellipsoid[2], 10)
+
+    def test_windowed_detector(self):
+
+        a, b, width = 8.7886, 22.9904, 3
+        detector = online.WindowedDetector(a, b, float(width))
+
+        # Both sensors report once per second, so difference k of a sensor
+        # arrives at time k + 1 and leaves the window at time k + 1 + width
+        for i in range(6):
+            for sensor in sorted(self.measurements):
+                temp, humidity = self.measurements[sensor][:, i]
+                anomaly = detector.update(sensor, float(i), temp, humidity)
+                if i == 0:
+                    assert anomaly is None
+                    continue
+
+                # Refit the window from scratch for the same classification
+                thetas = []
+                for other in sorted(self.measurements):
+                    differences = self.differences[other][:, max(0, i - width):i - (other >= sensor)]
+                    if differences.shape[1] > 1:
+                        thetas.append(baseline.calculate_ellipsoid_orientation(differences))
+                expected = None
+                if thetas:
+                    ellipsoid = (a, b, sum(thetas) / len(thetas))
+                    expected = bool(baseline.is_anomaly(self.differences[sensor][:, i - 1], ellipsoid))
+                assert anomaly == expected
+
+        # Only the differences of the last three seconds remain
+        assert len(detector.window) == 2 * width
+        assert [state.statistics.n for state in detector.sensors.values()] == [width, width]
+        detector.expire(100.0)
+        assert not detector.window and detector.regional_ellipsoid[2] is None
+
+    def test_windowed_anomalies(self):
+
+        columns = {
+            'readings': numpy.hstack([self.measurements['1'], self.measurements['2']]),
+            'sensor_id': numpy.repeat([1, 2], 6).astype(numpy.int32),
+            'timestamp': numpy.tile(numpy.arange(6, dtype=float), 2),
+            'sensors': numpy.array([1, 2], numpy.int32),
+            'offsets': numpy.array([0, 6, 12])
+        }
+        aggregate_ellipsoid = (1.7601, 4.1168, 0.717564)
+
+        # An unbounded window with a fixed theta matches the batch detection
+        anomalies = online.windowed_anomalies(columns, *aggregate_ellipsoid[:2], width=1e9,
+                                              theta=aggregate_ellipsoid[2])
+        for sensor in self.measurements:
+            expected = baseline.is_anomaly(self.differences[sensor], aggregate_ellipsoid)
+            assert list(anomalies[sensor]) == list(numpy.flatnonzero(expected) + 1)
+
+        # Readings without a timestamp are skipped
+        columns['timestamp'][:6] = numpy.nan
+        anomalies = online.windowed_anomalies(columns, *aggregate_ellipsoid[:2], width=1e9,
+                                              theta=aggregate_ellipsoid[2])
+        assert not len(anomalies['1'])
+        expected = baseline.is_anomaly(self.differences['2'], aggregate_ellipsoid)
+        assert list(anomalies['2']) == list(numpy.flatnonzero(expected) + 1)
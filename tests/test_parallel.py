@@ -0,0 +1,60 @@
+"""Test cases for the parallel ellipsoid modeling."""
+
+import timeit
+import unittest
+
+import numpy
+
+import baseline
+import parallel
+import sensorframe
+
+
+class testParallel(unittest.TestCase):
+
+    def setUp(self):
+
+        random_state = numpy.random.RandomState(1)
+        self.differences = {str(sensor): random_state.normal(0, 3, (2, 20 + sensor))
+                            for sensor in range(7)}
+
+    def test_generate_ellipsoids(self):
+
+        for processes in (1, 3):
+            ellipsoids = parallel.generate_ellipsoids(self.differences, 1.7601, 4.1168,
+                                                      processes=processes, chunk_size=2)
+
+            assert sorted(ellipsoids) == sorted(self.differences)
+            for sensor, readings in self.differences.items():
+                expected = baseline.generate_ellipsoid_parameters(readings, 1.7601, 4.1168)
+                assert sorted(ellipsoids[sensor]) == ['a', 'b', 'n', 'theta']
+                assert ellipsoids[sensor]['n'] == expected['n'] == readings.shape[1]
+                self.assertAlmostEqual(expected['theta'], ellipsoids[sensor]['theta'], 10)
+
+            self.assertEqual(
+                baseline.generate_regional_ellipsoid_parameters(ellipsoids),
+                baseline.generate_regional_ellipsoid_parameters(
+                    {sensor: baseline.generate_ellipsoid(readings, 1.7601, 4.1168)
+                     for (sensor, readings) in self.differences.items()}))
+
+    def test_sensor_frame(self):
+
+        frame = sensorframe.SensorFrame.from_measurements(self.differences)
+        self.assertEqual(parallel.generate_ellipsoids(self.differences, 1.7601, 4.1168,
+                                                      processes=1),
+                         parallel.generate_ellipsoids(frame, 1.7601, 4.1168, processes=2))
+
+    def test_single_process_overhead(self):
+
+        # Modeling in the calling process shares the readings rather than
+        # copying them, so it costs about as much as the serial baseline
+        random_state = numpy.random.RandomState(2)
+        differences = {str(sensor): random_state.normal(0, 3, (2, 20000))
+                       for sensor in range(100)}
+        serial = min(timeit.repeat(lambda: {
+            sensor: baseline.generate_ellipsoid_parameters(readings, 1.7601, 4.1168)
+            for (sensor, readings) in differences.items()}, number=1, repeat=3))
+        single = min(timeit.repeat(lambda: parallel.generate_ellipsoids(
+            differences, 1.7601, 4.1168, processes=1), number=1, repeat=3))
+
+        assert single < 2 * serial + 0.005
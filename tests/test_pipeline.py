@@ -0,0 +1,96 @@
+"""Test cases for the pipeline engine."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import baseline
+import pipeline
+import sensorframe
+
+
+class testPipeline(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp_dir, 'ibrl.csv')
+
+        random_state = numpy.random.RandomState(3)
+        with open(self.data_file, 'w') as fp:
+            for i in range(200):
+                fp.write('%.4f,%.4f,%d,%d,%d\n' % (random_state.normal(20, 2),
+                                                    random_state.normal(38, 4),
+                                                    i, 1 + i % 4, i))
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_fused_matches_unfused(self):
+
+        for options in ({}, {'dtype': 'float32'}, {'dtype': 'float32', 'standardize': True}):
+            fused = pipeline.run_pipeline(self.data_file, seed=7, **options)
+            unfused = pipeline.run_pipeline(self.data_file, fuse=False, seed=7, **options)
+
+            assert isinstance(fused['differences'], sensorframe.SensorFrame)
+            for sensor in unfused['differences']:
+                numpy.testing.assert_array_equal(fused['permutations'][sensor],
+                                                 unfused['permutations'][sensor])
+                assert fused['differences'][sensor].dtype == unfused['differences'][sensor].dtype
+                numpy.testing.assert_array_equal(fused['differences'][sensor],
+                                                 unfused['differences'][sensor])
+                numpy.testing.assert_array_equal(fused['anomalies'][sensor],
+                                                 unfused['anomalies'][sensor])
+                numpy.testing.assert_array_equal(fused['lookup_table'][sensor],
+                                                 unfused['lookup_table'][sensor])
+            assert fused['regional_ellipsoid'] == unfused['regional_ellipsoid']
+
+    def test_default_axes(self):
+
+        raw = pipeline.run_pipeline(self.data_file, until='regional', seed=7)
+        standardized = pipeline.run_pipeline(self.data_file, until='regional', seed=7, standardize=True)
+
+        assert raw['regional_ellipsoid'][:2] == pipeline.RAW_AXES
+        assert standardized['regional_ellipsoid'][:2] == pipeline.STANDARDIZED_AXES
+        assert pipeline.run_pipeline(self.data_file, until='regional', standardize=True,
+                                     a=2.0)['parameters']['b'] == pipeline.STANDARDIZED_AXES[1]
+
+    def test_until(self):
+
+        state = pipeline.run_pipeline(self.data_file, until='differences', seed=7)
+
+        assert 'differences' in state and 'ellipsoid_parameters' not in state
+        assert 'anomalies' not in pipeline.run_pipeline(self.data_file, until='regional')
+        self.assertRaises(KeyError, pipeline.run_pipeline, self.data_file, until='plotting')
+
+    def test_custom_stage(self):
+
+        def sorted_differences(state):
+            state['differences'], state['lookup_table'] = baseline.generate_differences(
+                {sensor: readings[:, numpy.argsort(readings[0])]
+                 for (sensor, readings) in state['measurements'].items()})
+
+        plan = pipeline.plan_pipeline(dict(pipeline.STAGES, differences=sorted_differences))
+        assert [name for (name, function) in plan] == list(pipeline.STAGE_ORDER)
+
+        state = pipeline.run_pipeline(self.data_file, stages={'differences': sorted_differences})
+        for sensor, differences in state['differences'].items():
+            assert (differences[0] >= 0).all()
+
+        self.assertRaises(KeyError, pipeline.run_pipeline, self.data_file, {'shuffle': sorted_differences})
+
+    def test_fused_standardization(self):
+
+        fused = pipeline.run_pipeline(self.data_file, seed=7, standardize=True, a=1.7601, b=4.1168)
+        unfused = pipeline.run_pipeline(self.data_file, fuse=False, seed=7, standardize=True,
+                                        a=1.7601, b=4.1168)
+
+        for sensor in unfused['differences']:
+            numpy.testing.assert_allclose(fused['differences'][sensor],
+                                          unfused['differences'][sensor])
+            numpy.testing.assert_allclose(fused['differences'][sensor].mean(axis=1), 0, atol=1e-12)
+            numpy.testing.assert_allclose(fused['differences'][sensor].std(axis=1), 1)
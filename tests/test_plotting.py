@@ -0,0 +1,81 @@
+"""Test cases for the density-binned rendering."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy
+
+import plotting
+from sensorframe import SensorFrame
+
+
+class testPlotting(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp_dir, 'ibrl.csv')
+        with open(self.data_file, 'w') as fp:
+            fp.write('19.9884,37.0933,2,1,1077963316.0\n')
+
+        random_state = numpy.random.RandomState(2)
+        self.points = random_state.normal(0, 3, (2, 1000))
+        self.points[:, 5] = numpy.nan
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_bin_points(self):
+
+        extent = (-5, 5, -4, 6)
+        counts, binned_extent = plotting.bin_points(self.points, 20, extent, chunk_size=77)
+        expected, x_edges, y_edges = numpy.histogram2d(self.points[1], self.points[0], 20,
+                                                       [extent[2:], extent[:2]])
+
+        assert binned_extent == extent
+        numpy.testing.assert_array_equal(counts, expected)
+
+        counts, binned_extent = plotting.bin_points(self.points, 8)
+        assert counts.sum() == 999
+        assert binned_extent == plotting.points_extent(self.points)
+
+    def test_frames_and_ellipsoids(self):
+
+        frame = SensorFrame.from_measurements({'1': self.points[:, :400], '2': self.points[:, 400:]})
+        numpy.testing.assert_array_equal(plotting.bin_points(frame, 10)[0],
+                                         plotting.bin_points(self.points, 10)[0])
+
+        ellipsoids = {'1': {'ellipsoid_points': [(1.0, 2.0), (1.0, None)]},
+                      '2': {'ellipsoid_points': numpy.array([[3.0, 4.0], [3.0, 5.0]])}}
+        numpy.testing.assert_array_equal(plotting.ellipsoid_points(ellipsoids),
+                                         [[1.0, 1.0, 3.0, 3.0], [2.0, numpy.nan, 4.0, 5.0]])
+
+    def test_ellipsoid_outlines(self):
+
+        ellipsoids = {'1': {'a': 1.0, 'b': 2.0, 'theta': 0.0}, '2': {'a': 3.0, 'b': 1.0, 'theta': 0.5}}
+        outlines = plotting.ellipsoid_outlines(ellipsoids, 10)
+
+        assert outlines.shape == (2, 24)
+        assert numpy.isnan(outlines[:, [11, 23]]).all()
+        numpy.testing.assert_allclose(outlines[:, 0], [1.0, 0.0], atol=1e-12)
+
+    def test_cached_bin_points(self):
+
+        counts, extent = plotting.cached_bin_points(self.data_file, 'readings', self.points, 16)
+
+        def fail():
+            raise AssertionError("cached bins were recalculated")
+        cached_counts, cached_extent = plotting.cached_bin_points(self.data_file, 'readings', fail, 16)
+        numpy.testing.assert_array_equal(counts, cached_counts)
+        assert cached_extent == extent
+
+        # A changed dataset invalidates its bins
+        time.sleep(0.01)
+        with open(self.data_file, 'a') as fp:
+            fp.write('19.3024,38.4629,3,2,1077963337.0\n')
+        counts, extent = plotting.cached_bin_points(self.data_file, 'readings', self.points[:, 10:20], 16)
+        assert counts.sum() == 10
@@ -0,0 +1,88 @@
+"""Test cases for the hierarchical aggregation of ellipsoid parameters."""
+
+import unittest
+
+import numpy
+
+import baseline
+import regions
+
+
+class testRegionTree(unittest.TestCase):
+
+    def setUp(self):
+
+        random_state = numpy.random.RandomState(5)
+        self.differences = {str(sensor): random_state.normal(0, 2, (2, 10 + 3 * sensor))
+                            for sensor in range(8)}
+        self.ellipsoids = {sensor: baseline.generate_ellipsoid(readings, 1.7601, 4.1168)
+                           for (sensor, readings) in self.differences.items()}
+
+        # Two buildings of two floors each, below the root
+        self.sensor_regions = {str(sensor): 'floor%d' % (sensor % 4) for sensor in range(8)}
+        self.parent_regions = {'floor0': 'north', 'floor1': 'north',
+                               'floor2': 'south', 'floor3': 'south'}
+
+    def assertEllipsoidAlmostEqual(self, expected, actual):
+
+        numpy.testing.assert_allclose(expected, actual, rtol=1e-10)
+
+    def test_regional_ellipsoids(self):
+
+        tree = regions.RegionTree.from_ellipsoids(self.ellipsoids, self.sensor_regions,
+                                                  self.parent_regions)
+
+        self.assertEllipsoidAlmostEqual(
+            baseline.generate_regional_ellipsoid_parameters(self.ellipsoids, weighted=True),
+            tree.regional_ellipsoid())
+        north = {sensor: ellipsoid for (sensor, ellipsoid) in self.ellipsoids.items()
+                 if int(sensor) % 4 in (0, 1)}
+        self.assertEllipsoidAlmostEqual(
+            baseline.generate_regional_ellipsoid_parameters(north, weighted=True),
+            tree.regional_ellipsoid('north'))
+
+        unweighted = regions.RegionTree.from_ellipsoids(self.ellipsoids, self.sensor_regions,
+                                                        self.parent_regions, weighted=False)
+        self.assertEllipsoidAlmostEqual(
+            baseline.generate_regional_ellipsoid_parameters(self.ellipsoids),
+            unweighted.regional_ellipsoid())
+
+    def test_update(self):
+
+        tree = regions.RegionTree(self.sensor_regions, self.parent_regions)
+        assert tree.regional_ellipsoid() is None
+
+        for sensor, ellipsoid in self.ellipsoids.items():
+            tree.update(sensor, ellipsoid['a'], ellipsoid['b'], ellipsoid['theta'], ellipsoid['n'])
+        tree.update('3', 2.0, 5.0, 0.5, 40)
+        self.ellipsoids['3'].update(a=2.0, b=5.0, theta=0.5, n=40)
+
+        rebuilt = regions.RegionTree.from_ellipsoids(self.ellipsoids, self.sensor_regions,
+                                                     self.parent_regions)
+        for region in tree.regions:
+            self.assertEllipsoidAlmostEqual(rebuilt.regional_ellipsoid(region),
+                                            tree.regional_ellipsoid(region))
+
+    def test_unusable_ellipsoids(self):
+
+        expected = baseline.generate_regional_ellipsoid_parameters(self.ellipsoids, weighted=True)
+        self.ellipsoids['8'] = baseline.generate_ellipsoid(numpy.empty((2, 0)), 1.7601, 4.1168)
+        self.ellipsoids['9'] = dict(self.ellipsoids['1'], a=float('inf'))
+        self.sensor_regions.update({'8': 'floor0', '9': 'floor1'})
+        assert numpy.isnan(self.ellipsoids['8']['theta'])
+
+        self.assertEllipsoidAlmostEqual(
+            expected, baseline.generate_regional_ellipsoid_parameters(self.ellipsoids,
+                                                                      weighted=True))
+        tree = regions.RegionTree.from_ellipsoids(self.ellipsoids, self.sensor_regions,
+                                                  self.parent_regions)
+        self.assertEllipsoidAlmostEqual(expected, tree.regional_ellipsoid())
+
+        tree.update('8', 2.0, 5.0, 0.5, 40)
+        tree.update('8', 2.0, 5.0, float('nan'), 0)
+        self.assertEllipsoidAlmostEqual(expected, tree.regional_ellipsoid())
+
+    def test_cycle(self):
+
+        with self.assertRaises(ValueError):
+            regions.RegionTree({'1': 'a'}, {'a': 'b', 'b': 'a'})
@@ -0,0 +1,52 @@
+"""Test cases for the performance regression suite."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import regression
+
+
+class testRegression(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.history_file = os.path.join(self.tmp_dir, 'history.json')
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_implementations_agree(self):
+
+        suite = regression.check_regressions([1000], self.history_file, repeat=1)
+
+        assert suite['mismatches'] == []
+        assert suite['regressions'] == []
+        assert len(suite['results']) == sum(len(implementations) for implementations
+                                            in regression.IMPLEMENTATIONS.values())
+        assert len(regression.load_history(self.history_file)['runs']) == 1
+
+    def test_find_regressions(self):
+
+        results = [{'stage': 'detection', 'implementation': 'baseline', 'size': 1000, 'seconds': 2.0},
+                   {'stage': 'detection', 'implementation': 'sweep', 'size': 1000, 'seconds': 1.1}]
+        history = {'runs': [{'results': [dict(result, seconds=1.0) for result in results]}]}
+
+        regressions = regression.find_regressions(results, history, threshold=0.25, min_seconds=0)
+
+        assert [result['implementation'] for result in regressions] == ['baseline']
+        assert regressions[0]['history'] == 1.0
+        assert regression.find_regressions(results, history, threshold=0.25, min_seconds=5) == []
+
+    def test_outputs_agree(self):
+
+        nan = float('nan')
+
+        assert regression.outputs_agree(numpy.array([1.0, nan]), numpy.array([1.0 + 1e-12, nan]))
+        assert not regression.outputs_agree(numpy.array([1.0, nan]), numpy.array([1.0, 2.0]))
+        assert regression.outputs_agree(numpy.array([1.0, 2.0]), numpy.array([3.0]))
@@ -0,0 +1,68 @@
+"""Test cases for the SensorFrame container."""
+
+import unittest
+
+import numpy
+
+import baseline
+import helpers
+from sensorframe import SensorFrame
+
+
+class testSensorFrame(unittest.TestCase):
+
+    def setUp(self):
+
+        # Original test data dict "Sensor: [(temp, humid), ...]"
+        self.original_dict = {
+            '1': [(1, 5), (3, 5), (2, 4), (6, 3)],
+            '2': [(3, 3), (8, 1), (3, 8), (1, 6)],
+            '3': [(1, 3), (9, 5), (6, 9), (4, 7)],
+            '4': [(8, 4), (3, 4), (3, 9), (4, 9)]
+        }
+        self.frame = SensorFrame.from_tuples(self.original_dict)
+
+    def test_from_tuples(self):
+
+        assert len(self.frame) == 4
+        assert sorted(self.frame) == ['1', '2', '3', '4']
+        assert list(self.frame.offsets) == [0, 4, 8, 12, 16]
+        assert list(self.frame.sensor_id) == [0] * 4 + [1] * 4 + [2] * 4 + [3] * 4
+        assert self.frame.to_tuples() == self.original_dict
+
+    def test_zero_copy_views(self):
+
+        readings = self.frame['3']
+        assert readings.base is self.frame.readings
+        numpy.testing.assert_array_equal(readings, [[1, 9, 6, 4], [3, 5, 9, 7]])
+
+        self.frame['3'] = readings[:, ::-1].copy()
+        assert self.frame.to_tuples()['3'] == self.original_dict['3'][::-1]
+        self.assertRaises(ValueError, self.frame.__setitem__, '3', numpy.zeros((2, 5)))
+
+    def test_from_measurements(self):
+
+        measurements = self.frame.as_measurements()
+        packed = SensorFrame.from_measurements(measurements, dtype=numpy.float32)
+
+        assert packed.readings.dtype == numpy.float32
+        numpy.testing.assert_array_equal(packed.readings, self.frame.readings)
+
+    def test_successive_differences(self):
+
+        expected, lookup_table = helpers.generate_differences(self.original_dict)
+        differences, lookup_table = baseline.generate_differences(self.frame)
+
+        assert isinstance(differences, SensorFrame)
+        assert differences.to_tuples() == expected
+
+    def test_detect_anomalies(self):
+
+        aggregate_ellipsoid = (1.7601, 4.1168, 0.717564)
+        differences, lookup_table = baseline.generate_differences(self.frame)
+
+        anomaly_masks = baseline.detect_anomalies(differences, aggregate_ellipsoid)
+        expected = baseline.detect_anomalies(differences.as_measurements(), aggregate_ellipsoid)
+
+        for sensor in differences:
+            numpy.testing.assert_array_equal(anomaly_masks[sensor], expected[sensor])
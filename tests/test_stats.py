@@ -0,0 +1,59 @@
+"""Test cases for the sufficient statistics."""
+
+import unittest
+
+import numpy
+
+import helpers
+import stats
+
+
+class testSufficientStatistics(unittest.TestCase):
+
+    def setUp(self):
+
+        # Test data "[(temp, humid), ...]" and the same readings as a 2D array
+        self.readings = [(1, 5), (3, 5), (2, 4), (6, 3), (4, 1), (7, 2)]
+        self.array = numpy.array(self.readings, float).T
+
+    def test_orientation(self):
+
+        self.assertAlmostEqual(
+            helpers.calculate_ellipsoid_orientation(self.readings),
+            stats.SufficientStatistics.from_readings(self.array).orientation(),
+            10)
+
+    def test_merge(self):
+
+        expected = stats.SufficientStatistics.from_readings(self.array)
+        merged = stats.SufficientStatistics.combine(
+            stats.SufficientStatistics.from_readings(chunk)
+            for chunk in (self.array[:, :1], self.array[:, 1:4], self.array[:, 4:]))
+
+        for field in stats.SufficientStatistics.__slots__:
+            self.assertAlmostEqual(getattr(expected, field), getattr(merged, field), 10)
+
+        added = stats.SufficientStatistics.from_readings(self.array[:, :3]) + \
+            stats.SufficientStatistics.from_readings(self.array[:, 3:])
+        self.assertAlmostEqual(expected.orientation(), added.orientation(), 10)
+
+    def test_push_pop(self):
+
+        expected = stats.SufficientStatistics.from_readings(self.array[:, 2:])
+
+        statistics = stats.SufficientStatistics()
+        for temp, humidity in self.readings:
+            statistics.push(temp, humidity)
+        for temp, humidity in self.readings[:2]:
+            statistics.pop(temp, humidity)
+
+        for field in stats.SufficientStatistics.__slots__:
+            self.assertAlmostEqual(getattr(expected, field), getattr(statistics, field), 10)
+
+        subtracted = stats.SufficientStatistics.from_readings(self.array) - \
+            stats.SufficientStatistics.from_readings(self.array[:, :2])
+        self.assertAlmostEqual(expected.orientation(), subtracted.orientation(), 10)
+
+        for temp, humidity in self.readings[2:]:
+            statistics.pop(temp, humidity)
+        assert statistics.n == 0 and statistics.sum_tt == 0.0
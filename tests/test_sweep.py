@@ -0,0 +1,72 @@
+"""Test cases for the ellipse parameter sweep."""
+
+import unittest
+
+import numpy
+
+import baseline
+import sweep
+from sensorframe import SensorFrame
+
+
+class testSweep(unittest.TestCase):
+
+    def setUp(self):
+
+        random_state = numpy.random.RandomState(3)
+        self.differences = {str(sensor): random_state.normal(0, 2, (2, 50 + sensor))
+                            for sensor in range(5)}
+        self.a_values = [0.5, 1.7601, 3.0]
+        self.b_values = [1.0, 4.1168]
+        self.theta_values = [0.0, 0.717564]
+
+    def test_sweep_matches_detect_anomalies(self):
+
+        result = sweep.sweep_ellipse_parameters(self.differences, self.a_values, self.b_values,
+                                                self.theta_values)
+
+        assert result['inliers'].shape == (3, 2, 2)
+        for i, a in enumerate(self.a_values):
+            for j, b in enumerate(self.b_values):
+                for k, theta in enumerate(self.theta_values):
+                    anomalies = baseline.detect_anomalies(self.differences, (a, b, theta))
+                    expected = sum(mask.sum() for mask in anomalies.values())
+                    self.assertEqual(expected, result['anomalies'][i, j, k])
+                    self.assertEqual(a, result['a'][i, j, k])
+                    self.assertEqual(theta, result['theta'][i, j, k])
+
+    def test_sweep_frames_and_default_theta(self):
+
+        frame = SensorFrame.from_measurements(self.differences)
+        expected = sweep.sweep_ellipse_parameters(self.differences, self.a_values, self.b_values)
+        result = sweep.sweep_ellipse_parameters(frame, self.a_values, self.b_values)
+
+        numpy.testing.assert_array_equal(expected['inliers'], result['inliers'])
+        numpy.testing.assert_array_equal(result['inliers'] + result['anomalies'],
+                                         frame.readings.shape[1])
+
+        # The default theta is the regional theta of the sensors' ellipsoids
+        regional = baseline.generate_regional_ellipsoid_parameters(
+            {sensor: baseline.generate_ellipsoid_parameters(readings, 1.0, 1.0)
+             for (sensor, readings) in self.differences.items()})
+        self.assertAlmostEqual(regional[2], result['theta'][0, 0, 0], 12)
+
+    def test_count_inliers(self):
+
+        # On the a axis, on the boundary and outside of the ellipse of a = 2
+        u2 = numpy.array([4.0, 1.0, 1.0, 9.0])
+        v2 = numpy.array([0.0, 3.0, 0.25, 0.0])
+
+        numpy.testing.assert_array_equal(sweep.count_inliers(u2, v2, 2.0, [0.5, 2.0, 10.0]),
+                                         [1, 3, 3])
+
+    def test_best_parameters(self):
+
+        result = sweep.sweep_ellipse_parameters(self.differences, self.a_values, self.b_values,
+                                                self.theta_values)
+
+        a, b, theta = sweep.best_parameters(result, 0.5)
+        index = (self.a_values.index(a), self.b_values.index(b), self.theta_values.index(theta))
+        assert result['anomalies'][index] <= 0.5 * sum(readings.shape[1] for readings in self.differences.values())
+        assert sweep.best_parameters(result, -1) is None
+
@@ -0,0 +1,74 @@
+"""Test cases for the synthetic dataset generator."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import ingest
+import synthetic
+
+
+class testSynthetic(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.options = {'sensors': 7, 'readings': 300, 'seed': 4, 'anomaly_rate': 0.05,
+                        'chunk_rows': 100}
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_format_field(self):
+
+        characters, keep = synthetic.format_field(numpy.array([19.9884, -1.25, 0.0, -0.00001, 105.5]),
+                                                  4, ingest.COMMA)
+
+        assert characters[keep].tostring() == '19.9884,-1.2500,0.0000,0.0000,105.5000,'
+
+    def test_csv_matches_binary(self):
+
+        data_file = os.path.join(self.tmp_dir, 'synthetic.csv')
+        label_file = os.path.join(self.tmp_dir, 'labels.npy')
+        binary_file = os.path.join(self.tmp_dir, 'synthetic.npy')
+
+        written = synthetic.write_ibrl_csv(data_file, label_file, **self.options)
+        assert written == synthetic.write_ibrl_binary(binary_file, **self.options)
+        assert written['rows'] == 2100
+
+        columns = ingest.read_ibrl_columns(data_file)
+        binary = synthetic.read_ibrl_binary(binary_file)
+        assert columns['row_count'] == 2100 and columns['bad_count'] == 0
+        numpy.testing.assert_array_equal(columns['readings'], binary['readings'])
+        numpy.testing.assert_array_equal(columns['offsets'], binary['offsets'])
+
+        labels = numpy.load(label_file)
+        assert labels.sum() == written['anomalies']
+        numpy.testing.assert_array_equal(labels, numpy.concatenate(
+            [chunk['anomaly'] for chunk in synthetic.iter_synthetic_chunks(**self.options)]))
+
+    def test_deterministic(self):
+
+        first = list(synthetic.iter_synthetic_chunks(**self.options))
+        second = list(synthetic.iter_synthetic_chunks(**self.options))
+
+        for chunk, other in zip(first, second):
+            for name in chunk:
+                numpy.testing.assert_array_equal(chunk[name], other[name])
+
+        # The rows do not depend on how they are chunked
+        whole = list(synthetic.iter_synthetic_chunks(**dict(self.options, chunk_rows=1 << 20)))
+        assert len(whole) == 1 and len(first) == 22
+        for name in whole[0]:
+            numpy.testing.assert_array_equal(whole[0][name],
+                                             numpy.concatenate([chunk[name] for chunk in first]))
+
+        anomaly = numpy.concatenate([chunk['anomaly'] for chunk in first])
+        temperature = numpy.concatenate([chunk['temperature'] for chunk in first])
+        assert 0 < anomaly.mean() < 0.1
+        assert numpy.abs(temperature[anomaly] - numpy.median(temperature)).min() > \
+            numpy.abs(temperature[~anomaly] - numpy.median(temperature)).mean()
@@ -0,0 +1,40 @@
+"""Test cases for the headless entry point."""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import synthetic
+import workbook
+
+
+class testWorkbook(unittest.TestCase):
+
+    def setUp(self):
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_file = os.path.join(self.tmp_dir, 'synthetic.csv')
+        synthetic.write_ibrl_csv(self.data_file, sensors=4, readings=50, seed=2)
+
+    def tearDown(self):
+
+        shutil.rmtree(self.tmp_dir)
+
+    def test_run(self):
+
+        state, timings = workbook.run(self.data_file, seed=1)
+
+        assert state['columns']['row_count'] == 200
+        assert sorted(state['anomalies']) == ['1', '2', '3', '4']
+        assert timings['startup_time'] >= timings['import_time'] > 0
+        assert timings['plot_time'] < timings['run_time']
+
+    def test_lazy_imports(self):
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        code = "import sys, workbook; sys.exit('matplotlib' in sys.modules)"
+
+        assert subprocess.call([sys.executable, '-c', code], cwd=root) == 0
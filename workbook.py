@@ -1,109 +1,125 @@
-import matplotlib.pyplot as pyplot
-
-import helpers
-
-
-"""
-Begin phase one - Read Input
-
-Note: This phase will need slight tweaking for each data source as they do not follow a truly standard data format.
-As a result, interfaces will likely need to be written for each source akin to read_ibrl_data()
-
-Note: While I had originally intended to use Pandas DataFrame objects to store / manipulate the data I opted out as
-it expects each column (sensor) to be of the same length (number of measurements) but that isn't the case with the IBRL
-dataset. I could cast each column to a Pandas Series (1 dimensional vector object) and add each Series to the DataFrame
-but that might be overkill. For know I am using a simple dictionary mapping each sensor to a list of tuples containing
-temperature and humidity data.
-"""
-# location of IBRL sensor measurements dataset
-ibrl_sensor_measurements_file = "./datasets/Reduced2530K.csv"
-
-
-# Create dictionary of original sensors mapping to their measurements
-# x1, x2, ..., xn where xi = (ti', hi') and X = (T, H)
-raw_measurements = helpers.read_ibrl_data(ibrl_sensor_measurements_file)
-
-"""
-Begin phase two - Process Data
-"""
-
-# 1A - Transformation
-
-# Shuffle measurements
-shuffled_measurements = helpers.randomize_readings(raw_measurements)
-
-# Calculate successive differences
-differences, lookup_table = helpers.generate_differences(shuffled_measurements)
-
-# Sensor One Test Data
-sensor_one_data = raw_measurements['2']
-sensor_one_shuffle = shuffled_measurements['2']
-sensor_one_differences = differences['2']
-
-
-pyplot.figure(1)
-
-# Plot of Original Data
-pyplot.subplot(311) # Num rows, num cols, figure num
-for sensor in raw_measurements:
-    pyplot.plot([reading[0] for reading in raw_measurements[sensor]],
-                [reading[1] for reading in raw_measurements[sensor]],
-                'ro')
-pyplot.axis([0, 100, 0, 100]) # [xmin, xmax, ymin, ymax]
-pyplot.xlabel('Temperature')
-pyplot.ylabel('Humidity')
-pyplot.title('Original Data')
-
-# Plot of Shuffled   Sensor One Data
-pyplot.subplot(312)
-for sensor in shuffled_measurements:
-    pyplot.plot([reading[0] for reading in shuffled_measurements[sensor]],
-                [reading[1] for reading in shuffled_measurements[sensor]],
-                'ro')
-pyplot.axis([0, 100, 0, 100]) # [xmin, xmax, ymin, ymax]
-pyplot.xlabel('Temperature')
-pyplot.ylabel('Humidity')
-pyplot.title('Randomized Data')
-
-# Plot of Original Sensor One Data
-pyplot.subplot(313)
-for sensor in differences:
-    pyplot.plot([reading[0] for reading in differences[sensor]],
-                [reading[1] for reading in differences[sensor]],
-                'ro')
-pyplot.axis([-50, 50, -50, 50]) # [xmin, xmax, ymin, ymax]
-pyplot.xlabel('Temperature')
-pyplot.ylabel('Humidity')
-pyplot.title('Successive Differences')
-
-pyplot.tight_layout()
-
-# Save the plot
-pyplot.savefig('wsn_data_transformation.png')
-
-
-# 1B - Ellipsoid Boundary Modeling
-print len(differences['11'])
-print len(shuffled_measurements['11'])
-
-pyplot.figure(2)
-
-min_temp, max_temp = helpers.get_min_max_temp(differences['3'])
-
-pyplot.subplot(311)
-pyplot.plot([reading[0] for reading in differences['5']],
-            [reading[1] for reading in differences['5']])
-pyplot.xlabel('Temperature')
-pyplot.ylabel('Humidity')
-pyplot.title('Successive Differences from Sensor 5')
-pyplot.show()
-
-
-
-# 1C - Inverse Transformation
-
-"""
-Begin phase four - Visually model data
+""" This file contains the headless entry point running the anomaly detection
+algorithm from the command line or a scheduled job.
+
+The phases run as the stages of pipeline.py: ingest, transformation,
+ellipsoid boundary modeling and inverse transformation (detection). Only
+numpy and the pipeline modules are imported up front; matplotlib is imported
+when figures are requested and then with a non-interactive backend, so a
+batch run never pays for or waits on the GUI stack. The time spent importing
+and starting up is reported along with the run.
+
+Usage:
+    python workbook.py ./datasets/Reduced2530K.csv --cache --figures wsn_data
 """
 
-print "Completed..."
\ No newline at end of file
+import timeit
+_started = timeit.default_timer()
+
+import argparse
+
+import baseline
+import pipeline
+import plotting
+
+IMPORT_TIME = timeit.default_timer() - _started
+
+
+"""Begin plotting functions"""
+def import_pyplot():
+    """ Imports matplotlib.pyplot with a non-interactive backend
+
+    :return: the matplotlib.pyplot module
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as pyplot
+
+    return pyplot
+
+def plot_transformation(state, output_file):
+    """ Plots the density of the readings, of their successive differences and
+    the regional ellipsoid of a pipeline run
+
+    :param state: dictionary as returned by pipeline.run_pipeline
+    :param output_file: string representing path of the saved figure
+    """
+    pyplot = import_pyplot()
+    a, b, theta = state['regional_ellipsoid']
+
+    figure = pyplot.figure()
+
+    axes = figure.add_subplot(211)
+    plotting.plot_density(axes, state['measurements'], extent=(0, 100, 0, 100),
+                          data_file=state['data_file'], name='readings')
+    axes.set_xlabel('Temperature')
+    axes.set_ylabel('Humidity')
+    axes.set_title('Original Data')
+
+    axes = figure.add_subplot(212)
+    plotting.plot_density(axes, state['differences'], extent=(-50, 50, -50, 50))
+    boundary = baseline.ellipsoid_boundary(a, b, theta)
+    axes.plot(boundary[:, 0], boundary[:, 1], 'r-')
+    axes.set_xlabel('Temperature')
+    axes.set_ylabel('Humidity')
+    axes.set_title('Successive Differences')
+
+    figure.tight_layout()
+    figure.savefig(output_file)
+    pyplot.close(figure)
+
+"""Begin run functions"""
+def run(data_file, figures=None, **parameters):
+    """ Runs the anomaly detection pipeline over a dataset
+
+    :param data_file: string representing path to ibrl dataset
+    :param figures: optional prefix of the figure files to save
+    :param parameters: parameters of the run overriding pipeline.DEFAULT_PARAMETERS
+    :return: tuple containing the final pipeline state and a dictionary of
+    the 'import_time', 'startup_time' (imports included), 'run_time' and
+    'plot_time' in seconds
+    """
+    startup_time = timeit.default_timer() - _started
+
+    start = timeit.default_timer()
+    state = pipeline.run_pipeline(data_file, **parameters)
+    run_time = timeit.default_timer() - start
+
+    start = timeit.default_timer()
+    if figures:
+        plot_transformation(state, figures + '_transformation.png')
+    plot_time = timeit.default_timer() - start
+
+    return (state, {
+        'import_time': IMPORT_TIME,
+        'startup_time': startup_time,
+        'run_time': run_time,
+        'plot_time': plot_time
+    })
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Detect anomalies in an ibrl dataset')
+    parser.add_argument('data_file', nargs='?', default='./datasets/Reduced2530K.csv',
+                        help='path to an ibrl dataset')
+    parser.add_argument('-a', type=float, default=None, help='defaults to %g, or %g with --standardize' % (
+        pipeline.RAW_AXES[0], pipeline.STANDARDIZED_AXES[0]))
+    parser.add_argument('-b', type=float, default=None, help='defaults to %g, or %g with --standardize' % (
+        pipeline.RAW_AXES[1], pipeline.STANDARDIZED_AXES[1]))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--standardize', action='store_true')
+    parser.add_argument('--cache', action='store_true', help='read through the binary cache')
+    parser.add_argument('--mapped', action='store_true', help='memory-map the dataset')
+    parser.add_argument('--figures', help='prefix of the figure files to save')
+    args = parser.parse_args()
+
+    state, timings = run(args.data_file, args.figures, a=args.a, b=args.b, seed=args.seed,
+                         standardize=args.standardize, cache=args.cache, mapped=args.mapped)
+
+    columns = state['columns']
+    anomaly_count = sum(len(anomalies) for anomalies in state['anomalies'].itervalues())
+    print "Total rows: %s" % columns['row_count']
+    print "Total incomplete rows: %s" % columns['bad_count']
+    print "Regional ellipsoid: a=%.4f b=%.4f theta=%.4f" % state['regional_ellipsoid']
+    print "Anomalies: %d of %d differences" % (anomaly_count, state['differences'].readings.shape[1])
+    print "Import time: %.3fs, startup time: %.3fs, run time: %.3fs, plot time: %.3fs" % (
+        timings['import_time'], timings['startup_time'], timings['run_time'], timings['plot_time'])